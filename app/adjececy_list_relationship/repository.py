@@ -0,0 +1,34 @@
+"""Queries of the adjacency-list example, built once with bound parameters."""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import selectinload
+
+from app.adjececy_list_relationship.entities import NodeEntity, NodeTable, _hierarchy_statement
+from app.lib.repository import Prepared, Repository
+
+
+class NodeRepository(Repository):
+    with_children = Prepared(
+        select(NodeEntity)
+        .options(selectinload(NodeEntity.children))  # pyright: ignore[reportArgumentType]
+        .where(NodeTable.c.id == bindparam("node_id")),
+        {"node_id": select(NodeTable.c.id).limit(1)},
+    )
+    hierarchy = Prepared(
+        _hierarchy_statement(),
+        {"root_id": select(NodeTable.c.id).limit(1)},
+    )
+
+    async def get_with_children(self, node_id: uuid.UUID) -> NodeEntity | None:
+        return (await self.execute(self.with_children, node_id=node_id)).scalar_one_or_none()
+
+    async def get_hierarchy(self, root_id: uuid.UUID) -> list[tuple[NodeEntity, int]]:
+        """`root_id` and its descendants with their level (the root is 1), level by level."""
+
+        result = await self.execute(self.hierarchy, root_id=root_id)
+        return [(node, level) for node, level in result.unique()]
+
+
+REPOSITORIES: list[type[Repository]] = [NodeRepository]
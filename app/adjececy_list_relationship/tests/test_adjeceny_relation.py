@@ -1,9 +1,12 @@
+import uuid
+
 import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.adjececy_list_relationship.entities import NodeEntity
+from app.adjececy_list_relationship.entities import NodeEntity, _hierarchy_statement
+from app.db.explain import assert_uses_index
 
 
 @pytest.mark.asyncio
@@ -51,3 +54,8 @@ async def test_adjececy_orm_mapping(db_session: AsyncSession):
     assert great_grand_child_level == 4
     assert great_grand_child.parent.id == grand_child.id
     assert len(great_grand_child.children) == 0
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_walks_the_parent_id_index(db_session: AsyncSession):
+    await assert_uses_index(db_session, _hierarchy_statement(), "ix_node_parent_id", {"root_id": uuid.uuid4()})
@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adjececy_list_relationship.entities import NodeTable
+from app.lib.bulk import bulk_insert, bulk_upsert
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["insert", "copy"])
+async def test_bulk_insert_keeps_keys_only_later_rows_have(db_session: AsyncSession, method):
+    root, child, other = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    rows = [
+        {"id": root, "data": "root"},
+        {"id": child, "data": "child", "parent_id": root},
+        {"id": other, "data": "other"},
+    ]
+    report = await bulk_insert(db_session, NodeTable, rows, method=method)
+    await db_session.commit()
+
+    assert report.rows == 3
+    parents = await db_session.execute(select(NodeTable.c.id, NodeTable.c.parent_id))
+    assert dict(parents.tuples().all()) == {root: None, child: root, other: None}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_updates_keys_only_later_rows_have(db_session: AsyncSession):
+    root, child = uuid.uuid4(), uuid.uuid4()
+    await bulk_insert(db_session, NodeTable, [{"id": root, "data": "root"}, {"id": child, "data": "child"}])
+
+    report = await bulk_upsert(
+        db_session, NodeTable, [{"id": root, "data": "root"}, {"id": child, "data": "child", "parent_id": root}]
+    )
+    await db_session.commit()
+
+    assert (report.inserted, report.updated, report.unchanged) == (0, 1, 1)
+    parents = await db_session.execute(select(NodeTable.c.id, NodeTable.c.parent_id))
+    assert dict(parents.tuples().all()) == {root: None, child: root}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_names_a_missing_conflict_column(db_session: AsyncSession):
+    with pytest.raises(ValueError, match="no value for conflict column id"):
+        await bulk_upsert(db_session, NodeTable, [{"id": uuid.uuid4(), "data": "root"}, {"data": "orphan"}])
+    with pytest.raises(ValueError, match="node has no column name"):
+        await bulk_upsert(db_session, NodeTable, [{"id": uuid.uuid4(), "data": "root"}], conflict=["name"])
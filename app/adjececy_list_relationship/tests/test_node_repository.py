@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adjececy_list_relationship.entities import NodeEntity
+from app.adjececy_list_relationship.repository import REPOSITORIES, NodeRepository
+from app.lib.repository import track_compile_cache, warm_repositories
+
+
+@pytest.fixture
+async def root(db_session: AsyncSession) -> NodeEntity:
+    root = NodeEntity(data="root")
+    child = NodeEntity(data="child")
+    child.children.append(NodeEntity(data="grand_child"))
+    root.children.append(child)
+    db_session.add(root)
+    await db_session.commit()
+    await db_session.reset()
+    return root
+
+
+@pytest.mark.asyncio
+async def test_repository_loads_children_and_hierarchy(db_session: AsyncSession, root: NodeEntity):
+    repository = NodeRepository(db_session)
+
+    node = await repository.get_with_children(root.id)
+    assert node
+    assert [child.data for child in node.children] == ["child"]
+
+    hierarchy = await repository.get_hierarchy(root.id)
+    assert [(node.data, level) for node, level in hierarchy] == [("root", 1), ("child", 2), ("grand_child", 3)]
+
+
+@pytest.mark.asyncio
+async def test_warmed_statements_come_from_the_compiled_cache(db_session: AsyncSession, root: NodeEntity):
+    stats = track_compile_cache(db_session.bind)
+    try:
+        assert await warm_repositories(db_session.bind, *REPOSITORIES) == 2
+        stats.reset()
+
+        repository = NodeRepository(db_session)
+        assert await repository.get_with_children(root.id)
+        db_session.expunge_all()
+        assert await repository.get_hierarchy(root.id)
+
+        assert stats.misses == 0
+        assert stats.hits == 4  # each statement and its selectin query
+    finally:
+        stats.detach()
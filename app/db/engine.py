@@ -0,0 +1,35 @@
+from typing import Any
+
+from sqlalchemy import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.explain import capture_plans
+from app.db.metrics import TimedAsyncQueuePool, instrument
+from app.db.settings import DatabaseSettings
+
+
+def create_engine(
+    settings: DatabaseSettings | None = None, *, url: str | URL | None = None, **kwargs: Any
+) -> AsyncEngine:
+    """An engine configured from `settings` (the environment by default).
+
+    Args:
+        settings: Connection and pool settings; `DatabaseSettings.from_env()` if omitted
+        url: Overrides `settings.url`
+        kwargs: Extra `create_async_engine` arguments, e.g. `poolclass`
+    """
+
+    settings = settings if settings is not None else DatabaseSettings.from_env()
+    options = settings.engine_options() | kwargs
+    if settings.metrics:
+        options.setdefault("poolclass", TimedAsyncQueuePool)
+    engine = create_async_engine(url if url is not None else settings.url, **options)
+    if settings.metrics:
+        instrument(engine)
+    if settings.explain_threshold >= 0:
+        capture_plans(engine, settings.explain_threshold, analyze=settings.explain_analyze)
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
@@ -0,0 +1,330 @@
+"""EXPLAIN capture for slow statements, and plan assertions for tests.
+
+``capture_plans(engine, threshold)`` runs ``EXPLAIN (FORMAT JSON)`` for every
+``SELECT`` slower than ``threshold`` seconds and keeps the plan of its slowest
+run per statement fingerprint (see ``app.db.instrumentation``). It is opt-in:
+``create_engine`` installs it when ``DATABASE_EXPLAIN_THRESHOLD`` is set, and
+``PlanStore.dump()`` writes what was captured to JSON. Writes (and ``WITH``
+queries that write) are never explained.
+
+Between runs, ``PlanStore.load()`` reads a previous dump back as the baseline.
+``store.changes(baseline)`` then lists the statements whose scans changed, e.g.
+an index scan that became a sequential scan; ``assert_plans_unchanged()``
+fails on any. Costs and timings are ignored: they vary from run to run.
+
+``analyze=True`` (``DATABASE_EXPLAIN_ANALYZE``) adds actual row counts and
+timings with ``EXPLAIN (ANALYZE, BUFFERS)``, which executes the statement a
+second time. It runs on the same connection, in a savepoint switched to
+``READ ONLY`` and rolled back afterwards. A statement that would still change
+something, e.g. ``SELECT nextval(...)`` (sequences ignore rollbacks), fails
+there and is not captured.
+
+``assert_uses_index()`` is for tests: it fails when a query can no longer
+use an index, e.g. after a migration drops it or a rewrite stops matching
+an expression index. Test tables are too small for the planner to prefer an
+index, so it plans with ``enable_seqscan`` off: a sequential scan in that
+plan means no index applies at all.
+
+Example:
+    await assert_uses_index(session, select(BorrowerEntity).where(borrower_name == "bella"), "ix_borrower_info_name")
+"""
+
+import json
+import re
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ClauseElement, Executable
+from sqlalchemy.sql.compiler import SQLCompiler
+
+from app.db.instrumentation import STATEMENT_PREVIEW, statement_fingerprint
+
+_START_KEY = "_explain_started"
+_SAVEPOINT = "explain_capture"
+
+_EXPLAINABLE = re.compile(r"\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Every node of an `EXPLAIN (FORMAT JSON)` plan, depth first."""
+
+    stack = [plan.get("Plan", plan)]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.get("Plans", [])))
+
+
+@dataclass(frozen=True, slots=True)
+class Scan:
+    node_type: str
+    relation: str | None
+    index: str | None
+
+
+def scans(plan: dict[str, Any]) -> list[Scan]:
+    """The table and index scans of `plan`, in plan order."""
+
+    return [
+        Scan(node["Node Type"], node.get("Relation Name"), node.get("Index Name"))
+        for node in plan_nodes(plan)
+        if "Relation Name" in node or "Index Name" in node
+    ]
+
+
+def _describe(found: list[Scan]) -> str:
+    return ", ".join(f"{scan.node_type} on {scan.index or scan.relation}" for scan in found) or "no scans"
+
+
+@dataclass(frozen=True, slots=True)
+class PlanChange:
+    """A statement whose scans differ from the baseline's."""
+
+    fingerprint: str
+    before: list[Scan]
+    after: list[Scan]
+    plan: dict[str, Any]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.fingerprint[:STATEMENT_PREVIEW]}\n  was: {_describe(self.before)}\n  now: {_describe(self.after)}"
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CapturedPlan:
+    fingerprint: str
+    statement: str
+    duration: float
+    plan: dict[str, Any]
+    captured_at: datetime = field(default_factory=lambda: datetime.now(tz=UTC))
+
+
+class PlanStore:
+    """The plan of each fingerprint's slowest captured execution."""
+
+    def __init__(self) -> None:
+        self.plans: dict[str, CapturedPlan] = {}
+
+    def __len__(self) -> int:
+        return len(self.plans)
+
+    def wants(self, fingerprint: str, duration: float) -> bool:
+        captured = self.plans.get(fingerprint)
+        return captured is None or duration > captured.duration
+
+    def add(self, captured: CapturedPlan) -> None:
+        if self.wants(captured.fingerprint, captured.duration):
+            self.plans[captured.fingerprint] = captured
+
+    def dump(self, path: str | Path) -> None:
+        documents = [
+            asdict(captured) | {"scans": [asdict(scan) for scan in scans(captured.plan)]}
+            for captured in sorted(self.plans.values(), key=lambda captured: captured.fingerprint)
+        ]
+        Path(path).write_text(json.dumps(documents, indent=2, default=str) + "\n")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PlanStore":
+        """A store holding the plans `dump` wrote to `path`."""
+
+        store = cls()
+        for document in json.loads(Path(path).read_text()):
+            store.plans[document["fingerprint"]] = CapturedPlan(
+                fingerprint=document["fingerprint"],
+                statement=document["statement"],
+                duration=document["duration"],
+                plan=document["plan"],
+                captured_at=datetime.fromisoformat(document["captured_at"]),
+            )
+        return store
+
+    def changes(self, baseline: "PlanStore") -> list[PlanChange]:
+        """Statements captured in both stores whose scans differ, by fingerprint."""
+
+        changed = []
+        for fingerprint in sorted(self.plans.keys() & baseline.plans.keys()):
+            before, after = scans(baseline.plans[fingerprint].plan), scans(self.plans[fingerprint].plan)
+            if before != after:
+                changed.append(PlanChange(fingerprint, before, after, self.plans[fingerprint].plan))
+        return changed
+
+
+PLANS = PlanStore()
+
+
+def _explainable(statement: str) -> bool:
+    return bool(_EXPLAINABLE.match(statement)) and not _WRITES.search(statement)
+
+
+def _plan(value: Any) -> dict[str, Any]:
+    # asyncpg returns the json column as text, psycopg decodes it
+    document = json.loads(value) if isinstance(value, str) else value
+    return document[0]
+
+
+class _Capture:
+    def __init__(self, threshold: float, store: PlanStore, analyze: bool):
+        self.threshold = threshold
+        self.store = store
+        self.analyze = analyze
+
+    def before(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        setattr(context, _START_KEY, time.perf_counter())
+
+    def after(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        duration = time.perf_counter() - getattr(context, _START_KEY)
+        if duration < self.threshold or executemany or not _explainable(statement):
+            return
+        # the EXPLAIN runs in a savepoint, so a failure can't abort the caller's transaction
+        if not conn.in_transaction() or getattr(conn.connection.dbapi_connection, "autocommit", False):
+            return
+        fingerprint = statement_fingerprint(statement)
+        if not self.store.wants(fingerprint, duration):
+            return
+        plan = self.explain(conn, statement, parameters)
+        if plan is not None:
+            self.store.add(CapturedPlan(fingerprint, statement, duration, plan))
+
+    def explain(self, conn: Connection, statement: str, parameters: Any) -> dict[str, Any] | None:
+        # on the raw connection, so the listeners (and other instrumentation) don't see it;
+        # in a savepoint, so a failure can't abort the caller's transaction
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+            try:
+                if self.analyze:
+                    # ANALYZE really runs the statement: refuse anything it would change
+                    cursor.execute("SET TRANSACTION READ ONLY")
+                options = "ANALYZE, BUFFERS, FORMAT JSON" if self.analyze else "FORMAT JSON"
+                cursor.execute(f"EXPLAIN ({options}) {statement}", parameters)
+                row = cursor.fetchone()
+            finally:
+                # also on success: drops the re-run's row locks and ends READ ONLY
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+        except Exception:  # noqa: BLE001 - capture is best effort, the statement itself succeeded
+            return None
+        finally:
+            cursor.close()
+        return _plan(row[0]) if row else None
+
+
+def capture_plans(
+    engine: AsyncEngine | Engine,
+    threshold: float,
+    store: PlanStore = PLANS,
+    *,
+    analyze: bool = False,
+) -> PlanStore:
+    """EXPLAIN `engine`'s SELECTs slower than `threshold` seconds into `store`.
+
+    Args:
+        engine: Engine whose statements are timed
+        threshold: Seconds a SELECT must take to be explained
+        store: Where the plans are kept
+        analyze: Re-run the statement with EXPLAIN ANALYZE, read only, for actual rows and timings
+    """
+
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    capture = _Capture(threshold, store, analyze)
+    event.listen(sync_engine, "before_cursor_execute", capture.before)
+    event.listen(sync_engine, "after_cursor_execute", capture.after)
+    return store
+
+
+class PlanRegressionError(AssertionError):
+    """A query's plan no longer uses the index it is expected to, or changed from the baseline."""
+
+    def __init__(self, message: str, plan: dict[str, Any]):
+        super().__init__(message)
+        self.plan = plan
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (<options>) <statement>`, binding the statement's parameters as usual."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Executable, options: str = "FORMAT JSON"):
+        self.statement = statement
+        self.options = options
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    return f"EXPLAIN ({element.options}) {compiler.process(element.statement, **kw)}"
+
+
+async def explain(
+    bind: AsyncSession | AsyncConnection,
+    statement: Executable,
+    parameters: dict[str, Any] | None = None,
+    *,
+    analyze: bool = False,
+) -> dict[str, Any]:
+    """The JSON plan of `statement`; `analyze` executes it."""
+
+    connection = await bind.connection() if isinstance(bind, AsyncSession) else bind
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = await connection.execute(Explain(statement, options), parameters or {})
+    return _plan(result.scalar_one())
+
+
+async def assert_uses_index(
+    bind: AsyncSession | AsyncConnection,
+    statement: Executable,
+    index: str,
+    parameters: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Fail unless `statement` can be planned with a scan of `index`.
+
+    Args:
+        bind: Session or connection; its transaction is left as it was
+        statement: The query, e.g. `select(BorrowerEntity).where(borrower_name == "bella")`
+        index: The index name
+        parameters: Values for `bindparam`s of the statement
+
+    Returns:
+        The plan
+
+    Raises:
+        PlanRegressionError: Listing the scans of the plan (an `AssertionError`)
+    """
+
+    connection = await bind.connection() if isinstance(bind, AsyncSession) else bind
+    previous = await connection.scalar(text("SELECT current_setting('enable_seqscan')"))
+    await connection.execute(text("SELECT set_config('enable_seqscan', 'off', true)"))
+    try:
+        plan = await explain(connection, statement, parameters)
+    finally:
+        await connection.execute(text("SELECT set_config('enable_seqscan', :value, true)"), {"value": previous})
+
+    found = scans(plan)
+    if not any(scan.index == index for scan in found):
+        raise PlanRegressionError(f"expected a scan of {index}, the plan has: {_describe(found)}", plan)
+    return plan
+
+
+def assert_plans_unchanged(store: PlanStore, baseline: PlanStore | str | Path) -> None:
+    """Fail if a statement in both `store` and `baseline` (a store or a `dump` file) is planned differently.
+
+    Raises:
+        PlanRegressionError: Listing every changed statement, with the first one's current plan
+    """
+
+    if not isinstance(baseline, PlanStore):
+        baseline = PlanStore.load(baseline)
+    changed = store.changes(baseline)
+    if changed:
+        listed = "\n".join(map(str, changed))
+        raise PlanRegressionError(f"{len(changed)} plan(s) changed from the baseline:\n{listed}", changed[0].plan)
@@ -0,0 +1,177 @@
+"""Statement counting, fingerprinting and query budgets.
+
+``count_queries()`` records every statement sent to the database while it is
+active, from any engine, by the current task and the tasks it starts
+(``before_cursor_execute`` on ``Engine``; scopes live in a context variable, so
+concurrent requests don't count each other's queries). Each statement gets a
+fingerprint: the SQL with bind parameters, literals and ``IN`` lists collapsed,
+so the same query for different ids compares equal. Transaction control
+(``SAVEPOINT``, ``RELEASE``, ``ROLLBACK TO``) isn't counted: it depends on how
+the caller's session is bound, not on the code under test.
+
+``query_budget(n)`` fails with the statements issued when the code inside uses
+more than ``n``, and ``max_repeats`` catches N+1 patterns: the same fingerprint
+issued once per parent.
+
+Example:
+    with query_budget(2, max_repeats=1):
+        publishers = await PublisherRepository(session).find_by_name("abel")
+"""
+
+import contextvars
+import functools
+import re
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# characters of a statement shown in failure messages
+STATEMENT_PREVIEW = 300
+
+_scopes: contextvars.ContextVar[tuple["QueryLog", ...]] = contextvars.ContextVar("query_log_scopes", default=())
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+# `$1::UUID` (asyncpg), `%(name)s` / `%s` (psycopg), `:name`, `?`
+_PARAMETER = re.compile(r"\$\d+(?:::[\w\[\]]+(?:\(\d+\))?)?|%\(\w+\)s|%s|(?<!:):\w+|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_TRANSACTION_CONTROL = re.compile(r"\s*(?:SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b", re.IGNORECASE)
+
+
+def statement_fingerprint(statement: str) -> str:
+    """`statement` with parameters and literals replaced by `?`, lists by `(?...)`."""
+
+    statement = _STRING.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _LIST.sub("(?...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class QueryRecord:
+    statement: str
+    parameters: Any
+    fingerprint: str
+    executemany: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class RepeatedStatement:
+    fingerprint: str
+    count: int
+    example: QueryRecord
+
+
+@dataclass
+class QueryLog:
+    """Statements issued while a `count_queries` scope is active."""
+
+    records: list[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def statements(self) -> list[str]:
+        return [record.statement for record in self.records]
+
+    def fingerprints(self) -> Counter[str]:
+        return Counter(record.fingerprint for record in self.records)
+
+    def repeated(self, max_repeats: int = 1) -> list[RepeatedStatement]:
+        """Fingerprints issued more than `max_repeats` times, most repeated first."""
+
+        examples = {record.fingerprint: record for record in reversed(self.records)}
+        return [
+            RepeatedStatement(fingerprint, count, examples[fingerprint])
+            for fingerprint, count in self.fingerprints().most_common()
+            if count > max_repeats
+        ]
+
+    def report(self) -> str:
+        lines = [f"  {number}. {_preview(record.statement)}" for number, record in enumerate(self.records, 1)]
+        return "\n".join(lines)
+
+
+class QueryBudgetExceededError(AssertionError):
+    """More statements than the budget, or one statement repeated (N+1)."""
+
+    def __init__(self, message: str, log: QueryLog):
+        super().__init__(message)
+        self.log = log
+
+
+def _preview(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement if len(statement) <= STATEMENT_PREVIEW else statement[:STATEMENT_PREVIEW] + "..."
+
+
+def _record(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    scopes = _scopes.get()
+    if not scopes or _TRANSACTION_CONTROL.match(statement):
+        return
+    record = QueryRecord(statement, parameters, statement_fingerprint(statement), executemany)
+    for log in scopes:
+        log.records.append(record)
+
+
+@functools.cache
+def _install() -> None:
+    # once per process, for every engine; costs a context variable lookup when no scope is active
+    event.listen(Engine, "before_cursor_execute", _record)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Record the statements issued inside the block (nested scopes each see them)."""
+
+    _install()
+    log = QueryLog()
+    token = _scopes.set((*_scopes.get(), log))
+    try:
+        yield log
+    finally:
+        _scopes.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int, *, max_repeats: int | None = None) -> Iterator[QueryLog]:
+    """Fail if the block issues more than `max_statements` statements.
+
+    Args:
+        max_statements: Statements allowed
+        max_repeats: If set, also fail when one fingerprint is issued more often than this
+
+    Raises:
+        QueryBudgetExceededError: Listing the statements issued (an `AssertionError`, so pytest
+            reports it as a test failure)
+    """
+
+    with count_queries() as log:
+        yield log
+
+    problems = []
+    if log.count > max_statements:
+        problems.append(f"expected at most {max_statements} statements, {log.count} were issued")
+    if max_repeats is not None:
+        problems.extend(
+            f"N+1: issued {repeated.count} times: {_preview(repeated.example.statement)}"
+            for repeated in log.repeated(max_repeats)
+        )
+    if problems:
+        raise QueryBudgetExceededError("\n".join([*problems, "statements:", log.report()]), log)
@@ -0,0 +1,260 @@
+"""Per-statement latency histograms, row counts and pool wait times, in process.
+
+``instrument(engine)`` times every statement between ``before_cursor_execute``
+and ``after_cursor_execute`` and files it under its fingerprint (see
+``app.db.instrumentation``) and an entity label:
+
+- the ``metrics_label`` execution option when set, e.g. ``NodeEntity.get_hierarchy``
+- otherwise the ORM entity the statement selects or writes (``UserEntity``)
+- otherwise the table it reads or writes (Core statements, and the inserts
+  and updates of a session flush, which are Core statements too)
+
+Fingerprint and entity are worked out once per compiled statement, which
+SQLAlchemy caches, so the per-execution cost is two clock reads, a couple of
+dict lookups and a bisect.
+
+Connection checkout time is measured by ``TimedAsyncQueuePool``, which
+``create_engine`` uses when ``DATABASE_METRICS`` is on. A checkout happens
+before any statement is known, so waits are labelled by pool only.
+
+``MetricsRegistry.render()`` returns the Prometheus text exposition format for
+a ``/metrics`` endpoint; no client library or external service is needed.
+"""
+
+import bisect
+import time
+import weakref
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.db.instrumentation import statement_fingerprint
+
+# seconds; Prometheus' default buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# finer at the low end for statements and checkouts, which are mostly sub-millisecond to tens of ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, *DEFAULT_BUCKETS)
+
+# characters of the fingerprint exported as the `statement` label
+STATEMENT_LABEL_LENGTH = 200
+
+_START_KEY = "_metrics_started"
+
+
+@dataclass(slots=True)
+class Histogram:
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=list)  # per bucket, not cumulative; last is +Inf
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        """`(le, count)` pairs as Prometheus exports them, ending with `+Inf`."""
+
+        total = 0
+        for bound, count in zip((*map(_number, self.buckets), "+Inf"), self.counts, strict=True):
+            total += count
+            yield bound, total
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile (inf if beyond the last bucket)."""
+
+        rank, total = q * self.count, 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts, strict=True):
+            total += count
+            if total >= rank and total:
+                return bound
+        return 0.0
+
+
+@dataclass(slots=True)
+class StatementMetrics:
+    fingerprint: str
+    entity: str
+    latency: Histogram = field(default_factory=Histogram)
+    rows: int = 0
+
+    @property
+    def executions(self) -> int:
+        return self.latency.count
+
+
+@dataclass(frozen=True, slots=True)
+class _Labels:
+    fingerprint: str
+    entity: str
+
+
+class MetricsRegistry:
+    """Metrics of instrumented engines, keyed by (statement fingerprint, entity)."""
+
+    def __init__(self) -> None:
+        self.statements: dict[tuple[str, str], StatementMetrics] = {}
+        self.pool_waits: dict[str, Histogram] = {}
+
+    def observe_statement(self, fingerprint: str, entity: str, seconds: float, rows: int) -> None:
+        metrics = self.statements.get((fingerprint, entity))
+        if metrics is None:
+            metrics = self.statements[fingerprint, entity] = StatementMetrics(fingerprint, entity)
+        metrics.latency.observe(seconds)
+        if rows > 0:
+            metrics.rows += rows
+
+    def observe_pool_wait(self, pool: str, seconds: float) -> None:
+        histogram = self.pool_waits.get(pool)
+        if histogram is None:
+            histogram = self.pool_waits[pool] = Histogram()
+        histogram.observe(seconds)
+
+    def by_entity(self, entity: str) -> list[StatementMetrics]:
+        return [metrics for metrics in self.statements.values() if metrics.entity == entity]
+
+    def slowest(self, n: int = 10) -> list[StatementMetrics]:
+        """Statements with the highest total time."""
+
+        return sorted(self.statements.values(), key=lambda metrics: metrics.latency.sum, reverse=True)[:n]
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.pool_waits.clear()
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        statements = sorted(self.statements.values(), key=lambda metrics: (metrics.entity, metrics.fingerprint))
+
+        def statement_labels(metrics: StatementMetrics) -> dict[str, str]:
+            return {"entity": metrics.entity, "statement": metrics.fingerprint[:STATEMENT_LABEL_LENGTH]}
+
+        _histogram_family(
+            lines,
+            "db_statement_duration_seconds",
+            "Statement execution time, from sending it to receiving its result.",
+            ((statement_labels(metrics), metrics.latency) for metrics in statements),
+        )
+        lines += [
+            "# HELP db_statement_rows_total Rows returned or affected.",
+            "# TYPE db_statement_rows_total counter",
+        ]
+        lines.extend(f"db_statement_rows_total{_labels(statement_labels(m))} {m.rows}" for m in statements)
+        _histogram_family(
+            lines,
+            "db_pool_wait_seconds",
+            "Time to check a connection out of the pool, connecting included.",
+            (({"pool": pool}, histogram) for pool, histogram in sorted(self.pool_waits.items())),
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_family(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    series: Iterable[tuple[dict[str, str], Histogram]],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+
+REGISTRY = MetricsRegistry()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` recording checkout waits into `metrics`, if set."""
+
+    metrics: MetricsRegistry | None = None
+    metrics_name: str = "default"
+
+    def _do_get(self) -> Any:
+        if self.metrics is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.observe_pool_wait(self.metrics_name, time.perf_counter() - start)
+
+    def recreate(self) -> "TimedAsyncQueuePool":
+        # engine.dispose() swaps in a fresh pool
+        pool: TimedAsyncQueuePool = super().recreate()  # type: ignore[assignment]
+        pool.metrics, pool.metrics_name = self.metrics, self.metrics_name
+        return pool
+
+
+def _entity(statement: Any) -> str:
+    if isinstance(statement, Select):
+        for description in statement.column_descriptions:
+            if description.get("entity") is not None:
+                return description["entity"].__name__
+        froms = statement.get_final_froms()
+        return getattr(froms[0], "name", "") if froms else ""
+    if isinstance(statement, UpdateBase):
+        entity = statement.entity_description.get("entity")
+        return entity.__name__ if entity is not None else getattr(statement.table, "name", "")
+    return ""
+
+
+class _Instrumentation:
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        # compiled statements are cached by SQLAlchemy, their labels here
+        self.labels: weakref.WeakKeyDictionary[Any, _Labels] = weakref.WeakKeyDictionary()
+
+    def before(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        setattr(context, _START_KEY, time.perf_counter())
+
+    def after(self, conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        seconds = time.perf_counter() - getattr(context, _START_KEY)
+        compiled = context.compiled
+        labels = self.labels.get(compiled) if compiled is not None else None
+        if labels is None:
+            labels = _Labels(statement_fingerprint(statement), _entity(context.invoked_statement))
+            if compiled is not None:
+                self.labels[compiled] = labels
+        entity = context.execution_options.get("metrics_label") or labels.entity
+        self.registry.observe_statement(labels.fingerprint, entity, seconds, cursor.rowcount)
+
+
+def instrument(engine: AsyncEngine | Engine, registry: MetricsRegistry = REGISTRY) -> MetricsRegistry:
+    """Record `engine`'s statements (and checkout waits, with `TimedAsyncQueuePool`) into `registry`."""
+
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    instrumentation = _Instrumentation(registry)
+    event.listen(sync_engine, "before_cursor_execute", instrumentation.before)
+    event.listen(sync_engine, "after_cursor_execute", instrumentation.after)
+    if isinstance(sync_engine.pool, TimedAsyncQueuePool):
+        sync_engine.pool.metrics = registry
+        sync_engine.pool.metrics_name = sync_engine.url.database or "default"
+    return registry
@@ -0,0 +1,30 @@
+"""Every package's `MapperRegistry`, in one place for schema creation and fingerprinting.
+
+Modules that add tables to a package's metadata, or DDL through `after_create`
+listeners (views, triggers), are imported here too, so `create_all` on
+`METADATA` is the complete schema whatever else has been imported.
+"""
+
+from sqlalchemy import MetaData
+from sqlalchemy.orm import registry
+
+import app.many_to_many_association.talk_listing  # speaker_talk_listing view
+import app.one_to_one.composite  # location table
+import app.one_to_one.spatial  # noqa: F401 - spatial_location table
+from app.adjececy_list_relationship.entities import MapperRegistry as AdjacencyListRegistry
+from app.many_to_many.entities import MapperRegistry as ManyToManyRegistry
+from app.many_to_many_association.entities import MapperRegistry as ManyToManyAssociationRegistry
+from app.objects_to_jsonb_examples.entities import MapperRegistry as ObjectsToJsonbRegistry
+from app.one_to_many.entities import MapperRegistry as OneToManyRegistry
+from app.one_to_one.entities import MapperRegistry as OneToOneRegistry
+
+REGISTRIES: tuple[registry, ...] = (
+    AdjacencyListRegistry,
+    ManyToManyRegistry,
+    ManyToManyAssociationRegistry,
+    ObjectsToJsonbRegistry,
+    OneToManyRegistry,
+    OneToOneRegistry,
+)
+
+METADATA: tuple[MetaData, ...] = tuple(mapper_registry.metadata for mapper_registry in REGISTRIES)
@@ -0,0 +1,79 @@
+"""Schema creation that is skipped when the database already has this schema.
+
+``ensure_schema`` hashes the DDL ``create_all`` would emit for ``METADATA``
+(tables, indexes, and the triggers and views added by ``after_create``
+listeners) and compares it with the fingerprint stored in the
+``schema_fingerprint`` table. If they match, startup costs one indexed read
+instead of a ``drop_all``/``create_all``. Otherwise the tables are recreated
+and the new fingerprint stored.
+
+Recreating drops data: this is for databases without migrations (tests,
+examples, benchmarks, scratch services).
+"""
+
+import hashlib
+from collections.abc import Iterable
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, create_mock_engine, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.registries import METADATA
+
+# lives outside METADATA so drop_all/create_all of the app's tables leaves it alone
+SchemaFingerprintTable = Table(
+    "schema_fingerprint",
+    MetaData(),
+    Column("fingerprint", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# pg_advisory_xact_lock key: services starting together apply the schema once
+_LOCK_KEY = 4_504_045
+
+
+def metadata_fingerprint(metadata: Iterable[MetaData] = METADATA) -> str:
+    """Hash of the DDL `create_all` emits for `metadata` on PostgreSQL."""
+
+    statements: list[str] = []
+    engine = create_mock_engine(
+        "postgresql+asyncpg://",  # type: ignore[arg-type]
+        lambda sql, *multiparams, **params: statements.append(str(sql.compile(dialect=engine.dialect))),
+    )
+    for meta in metadata:
+        meta.create_all(engine, checkfirst=False)  # type: ignore[arg-type]
+    # create_all emits a table's indexes in set order
+    return hashlib.sha256("\n".join(sorted(statements)).encode()).hexdigest()[:16]
+
+
+async def stored_fingerprint(connection: AsyncConnection) -> str | None:
+    await connection.run_sync(SchemaFingerprintTable.create, checkfirst=True)
+    return await connection.scalar(select(SchemaFingerprintTable.c.fingerprint))
+
+
+async def ensure_schema(bind: AsyncEngine | AsyncConnection, metadata: Iterable[MetaData] = METADATA) -> bool:
+    """Create the tables of `metadata` unless the stored fingerprint says they exist.
+
+    With a connection, runs in its current transaction (DDL is transactional in
+    PostgreSQL); with an engine, in a transaction of its own.
+
+    Returns:
+        Whether the schema was (re)created
+    """
+
+    if isinstance(bind, AsyncEngine):
+        async with bind.begin() as connection:
+            return await ensure_schema(connection, metadata)
+
+    metadata = list(metadata)
+    fingerprint = metadata_fingerprint(metadata)
+    await bind.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+    if await stored_fingerprint(bind) == fingerprint:
+        return False
+
+    for meta in reversed(metadata):
+        await bind.run_sync(meta.drop_all)
+    for meta in metadata:
+        await bind.run_sync(meta.create_all)
+    await bind.execute(delete(SchemaFingerprintTable))
+    await bind.execute(insert(SchemaFingerprintTable).values(fingerprint=fingerprint))
+    return True
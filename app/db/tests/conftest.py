@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.db.engine import create_engine
+from tests.databases import prepare_worker_database, worker_database_url
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def reset_database():
+    await prepare_worker_database()
+
+
+@pytest_asyncio.fixture()
+async def async_engine():
+    engine = create_engine(url=worker_database_url(), pool_size=1, max_overflow=0)
+    yield engine
+    await engine.dispose()
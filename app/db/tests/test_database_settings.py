@@ -0,0 +1,26 @@
+import pytest
+
+from app.db.settings import DEFAULT_DATABASE_URL, DatabaseSettings
+
+
+def test_settings_from_environment():
+    settings = DatabaseSettings.from_env(
+        {
+            "DATABASE_URL": "postgresql+asyncpg://app@db/app",
+            "DATABASE_POOL_SIZE": "5",
+            "DATABASE_POOL_TIMEOUT": "2.5",
+            "DATABASE_POOL_PRE_PING": "true",
+        },
+        max_overflow=0,
+    )
+
+    assert settings == DatabaseSettings(
+        url="postgresql+asyncpg://app@db/app",
+        pool_size=5,
+        max_overflow=0,
+        pool_timeout=2.5,
+        pool_pre_ping=True,
+    )
+    assert DatabaseSettings.from_env({}).url == DEFAULT_DATABASE_URL
+    with pytest.raises(ValueError, match="boolean"):
+        DatabaseSettings.from_env({"DATABASE_ECHO": "maybe"})
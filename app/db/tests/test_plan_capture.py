@@ -0,0 +1,131 @@
+import json
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adjececy_list_relationship.entities import NodeEntity, NodeTable
+from app.db.engine import create_engine
+from app.db.explain import CapturedPlan, PlanRegressionError, PlanStore, assert_plans_unchanged, capture_plans
+from tests.databases import worker_database_url
+
+
+@pytest.mark.asyncio
+async def test_slow_selects_are_explained_once_per_fingerprint(tmp_path: Path):
+    store = PlanStore()
+    engine = create_engine(url=worker_database_url(), pool_size=1, max_overflow=0)
+    # every statement is "slow" at a zero threshold
+    capture_plans(engine, 0.0, store, analyze=True)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            root_id = uuid.uuid4()
+            await connection.execute(insert(NodeTable).values(id=root_id, data="root"))
+            session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+            for _ in range(2):
+                hierarchy = await NodeEntity.get_hierarchy(session, root_id)
+            await session.close()
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    # the EXPLAIN ANALYZE re-run didn't disturb the caller's results
+    assert len(hierarchy) == 1
+    (fingerprint,) = [fingerprint for fingerprint in store.plans if fingerprint.startswith("WITH RECURSIVE")]
+    captured = store.plans[fingerprint]
+    assert captured.plan["Plan"]["Actual Rows"] == 1
+    assert "Execution Time" in captured.plan
+    # inserts aren't explained
+    assert not any(fingerprint.startswith("INSERT") for fingerprint in store.plans)
+
+    store.dump(tmp_path / "plans.json")
+    (document,) = [
+        item for item in json.loads((tmp_path / "plans.json").read_text()) if item["fingerprint"] == fingerprint
+    ]
+    assert {scan["relation"] for scan in document["scans"]} >= {"node"}
+
+
+@pytest.mark.asyncio
+async def test_autocommit_connections_are_not_explained():
+    store = PlanStore()
+    engine = create_engine(url=worker_database_url(), isolation_level="AUTOCOMMIT")
+    capture_plans(engine, 0.0, store)
+    try:
+        async with engine.connect() as connection:
+            assert (await connection.execute(select(literal(1)))).scalar_one() == 1
+    finally:
+        await engine.dispose()
+
+    # no transaction to hold the savepoint the re-run would be undone in
+    assert not store.plans
+
+
+@pytest.mark.asyncio
+async def test_plans_are_estimates_unless_analyze_is_asked_for():
+    store = PlanStore()
+    engine = create_engine(url=worker_database_url())
+    capture_plans(engine, 0.0, store)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            await connection.execute(select(NodeTable.c.id))
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    (captured,) = store.plans.values()
+    assert captured.plan["Plan"]["Relation Name"] == "node"
+    assert "Actual Rows" not in captured.plan["Plan"]
+    assert "Execution Time" not in captured.plan
+
+
+@pytest.mark.asyncio
+async def test_analyze_never_runs_a_statement_that_changes_state():
+    store = PlanStore()
+    engine = create_engine(url=worker_database_url())
+    capture_plans(engine, 0.0, store, analyze=True)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            await connection.execute(text("CREATE SEQUENCE explain_capture_test"))
+            first = await connection.scalar(text("SELECT nextval('explain_capture_test')"))
+            second = await connection.scalar(text("SELECT nextval('explain_capture_test')"))
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    # the read-only re-run was refused, so the sequence only moved for the caller
+    assert (first, second) == (1, 2)
+    assert not any("nextval" in fingerprint for fingerprint in store.plans)
+
+
+def _captured(fingerprint: str, node_type: str, index: str | None = None, cost: float = 1.0) -> CapturedPlan:
+    node = {"Node Type": node_type, "Relation Name": "node", "Total Cost": cost}
+    if index:
+        node["Index Name"] = index
+    return CapturedPlan(fingerprint, fingerprint, 0.1, {"Plan": node})
+
+
+def test_changed_plans_are_reported_against_a_previous_run(tmp_path: Path):
+    by_parent = "SELECT node.id FROM node WHERE node.parent_id = ?"
+    by_data = "SELECT node.id FROM node WHERE node.data = ?"
+    baseline = PlanStore()
+    baseline.add(_captured(by_parent, "Index Scan", "ix_node_parent_id"))
+    baseline.add(_captured(by_data, "Seq Scan"))
+    baseline.dump(tmp_path / "baseline.json")
+
+    current = PlanStore()
+    current.add(_captured(by_parent, "Seq Scan"))  # lost its index
+    current.add(_captured(by_data, "Seq Scan", cost=9.0))  # only the estimate moved
+    current.add(_captured("SELECT 1", "Result"))  # new, nothing to compare with
+
+    (change,) = current.changes(PlanStore.load(tmp_path / "baseline.json"))
+    assert change.fingerprint == by_parent
+    assert [scan.index for scan in change.before] == ["ix_node_parent_id"]
+    assert [scan.node_type for scan in change.after] == ["Seq Scan"]
+
+    with pytest.raises(PlanRegressionError, match="was: Index Scan on ix_node_parent_id"):
+        assert_plans_unchanged(current, tmp_path / "baseline.json")
+    assert_plans_unchanged(baseline, tmp_path / "baseline.json")
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import DDL, Column, Integer, MetaData, Table, event, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.registries import METADATA
+from app.db.schema import ensure_schema, metadata_fingerprint, stored_fingerprint
+
+
+@pytest.mark.asyncio
+async def test_schema_is_created_only_when_the_fingerprint_changes(async_engine: AsyncEngine):
+    extra = MetaData()
+    Table("scratch", extra, Column("id", Integer, primary_key=True))
+    changed = (*METADATA, extra)
+
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            # the worker database is a clone of a template built by ensure_schema
+            assert await stored_fingerprint(connection) == metadata_fingerprint()
+            assert not await ensure_schema(connection)
+
+            assert await ensure_schema(connection, changed)
+            assert await stored_fingerprint(connection) == metadata_fingerprint(changed)
+            assert await connection.run_sync(lambda conn: inspect(conn).has_table("scratch"))
+            assert not await ensure_schema(connection, changed)
+        finally:
+            await transaction.rollback()
+
+
+def test_fingerprint_covers_listener_ddl():
+    def scratch(with_trigger: bool) -> MetaData:
+        metadata = MetaData()
+        table = Table("scratch", metadata, Column("id", Integer, primary_key=True))
+        if with_trigger:
+            # like the counter cache triggers and the talk listing view, emitted by a listener
+            event.listen(table, "after_create", DDL("CREATE INDEX ix_scratch_id ON scratch (id)"))
+        return metadata
+
+    # same tables, only the listener's DDL differs
+    assert metadata_fingerprint([scratch(True)]) != metadata_fingerprint([scratch(False)])
+    assert metadata_fingerprint([scratch(True)]) == metadata_fingerprint([scratch(True)])
@@ -0,0 +1,30 @@
+from app.db.instrumentation import QueryLog, QueryRecord, statement_fingerprint
+
+
+def test_fingerprint_ignores_parameters_and_literals():
+    asyncpg = (
+        "SELECT book.id \nFROM book \nWHERE book.publisher_id = $1::UUID AND book.name IN ($2::VARCHAR, $3::VARCHAR)"
+    )
+    psycopg = "SELECT book.id FROM book WHERE book.publisher_id = %(publisher_id_1)s AND book.name IN (%s, %s, %s)"
+    literal = "SELECT book.id FROM book WHERE book.publisher_id = 'abc' AND book.name IN ('a', 'b') LIMIT 10"
+
+    assert statement_fingerprint(asyncpg) == statement_fingerprint(psycopg)
+    assert statement_fingerprint(psycopg) == (
+        "SELECT book.id FROM book WHERE book.publisher_id = ? AND book.name IN (?...)"
+    )
+    assert statement_fingerprint(literal).endswith("IN (?...) LIMIT ?")
+    # identifiers with digits stay, a parameter's cast collapses with it
+    assert statement_fingerprint("SELECT anon_1.x FROM t1 AS anon_1 WHERE anon_1.y = $1::INTEGER") == (
+        "SELECT anon_1.x FROM t1 AS anon_1 WHERE anon_1.y = ?"
+    )
+
+
+def test_repeated_fingerprints():
+    log = QueryLog()
+    for statement in ("SELECT 1", "SELECT a FROM t WHERE id = $1", "SELECT a FROM t WHERE id = $1"):
+        log.records.append(QueryRecord(statement, (), statement_fingerprint(statement)))
+
+    assert log.count == 3
+    ((repeated),) = log.repeated(max_repeats=1)
+    assert (repeated.fingerprint, repeated.count) == ("SELECT a FROM t WHERE id = ?", 2)
+    assert log.repeated(max_repeats=2) == []
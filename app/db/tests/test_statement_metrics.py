@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adjececy_list_relationship.entities import NodeEntity
+from app.db.engine import create_engine
+from app.db.metrics import Histogram, MetricsRegistry, TimedAsyncQueuePool, instrument
+from tests.databases import worker_database_url
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert list(histogram.cumulative()) == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.sum == pytest.approx(3.65)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+
+@pytest.mark.asyncio
+async def test_statements_are_recorded_per_fingerprint_and_entity():
+    registry = MetricsRegistry()
+    engine = create_engine(url=worker_database_url(), poolclass=TimedAsyncQueuePool, pool_size=1, max_overflow=0)
+    instrument(engine, registry)
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+            root = NodeEntity(data="root")
+            root.children.append(NodeEntity(data="child"))
+            session.add(root)
+            await session.flush()
+            root_id = root.id
+
+            for _ in range(3):
+                await session.execute(select(NodeEntity).where(NodeEntity.id == root_id))
+            hierarchy = await NodeEntity.get_hierarchy(session, root_id)
+            await connection.execute(text("select generate_series(1, 5)"))
+            await session.close()
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    assert len(hierarchy) == 2
+    (by_id,) = [m for m in registry.by_entity("NodeEntity") if m.fingerprint.startswith("SELECT")]
+    assert by_id.executions == 3
+    assert by_id.rows == 3
+    # the labelled statement and the selectinload of children it triggers
+    assert sum(m.executions for m in registry.by_entity("NodeEntity.get_hierarchy")) >= 1
+    assert [m.rows for m in registry.by_entity("") if "generate_series" in m.fingerprint] == [5]
+    assert registry.pool_waits[engine.url.database].count >= 1
+
+    exposition = registry.render()
+    assert "# TYPE db_statement_duration_seconds histogram" in exposition
+    assert 'db_statement_duration_seconds_count{entity="NodeEntity",statement="SELECT node.id' in exposition
+    assert 'le="+Inf"' in exposition
+    assert 'db_pool_wait_seconds_count{pool="' in exposition
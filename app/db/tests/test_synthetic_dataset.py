@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.adjececy_list_relationship.entities import NodeEntity
+from app.db.registries import REGISTRIES
+from app.lib.bulk import bulk_insert
+from app.lib.factories import EntityFactory, dataset, dataset_id
+from app.one_to_many.entities import PublisherEntity
+
+
+def _factories(factory: type[EntityFactory]) -> list[type[EntityFactory]]:
+    return [*factory.__subclasses__(), *itertools.chain.from_iterable(map(_factories, factory.__subclasses__()))]
+
+
+def test_every_mapped_entity_has_a_factory():
+    models = {factory.__model__ for factory in _factories(EntityFactory)}
+    mapped = {mapper.class_ for registry in REGISTRIES for mapper in registry.mappers}
+
+    assert mapped <= models
+
+
+def test_same_seed_same_rows():
+    def first_rows(seed: int) -> list[list[dict]]:
+        return [list(itertools.islice(rows, 3)) for _, rows in dataset(0.01, seed, groups=["nodes"])]
+
+    assert first_rows(4) == first_rows(4)
+    assert first_rows(4) != first_rows(5)
+
+
+@pytest.mark.asyncio
+async def test_dataset_streams_into_copy(async_engine: AsyncEngine):
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            reports = [
+                await bulk_insert(session, target, rows, batch_size=500, method="copy")
+                for target, rows in dataset(0.02, 1, groups=["publishers", "nodes"], tree_shape="deep")
+            ]
+            assert [report.table for report in reports] == ["publisher", "book", "node"]
+
+            # the counter cache triggers saw the COPY; the first ranks own most books
+            counts = (
+                await session.scalars(select(PublisherEntity.book_count).order_by(PublisherEntity.book_count.desc()))
+            ).all()
+            assert sum(counts) == reports[1].rows
+            assert counts[0] > 3 * counts[len(counts) // 2]
+
+            # deep trees are chains: the first tree's hierarchy has one node per level
+            hierarchy = await NodeEntity.get_hierarchy(session, dataset_id(1, "node", 0))
+            assert [level for _, level in hierarchy] == list(range(1, 101))
+            assert await session.scalar(select(func.count()).select_from(NodeEntity)) == reports[2].rows
+        finally:
+            await session.close()
+            await transaction.rollback()
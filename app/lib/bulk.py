@@ -0,0 +1,371 @@
+"""Bulk writes for imperatively mapped tables.
+
+Adding entities one by one with ``session.add`` runs every row through the
+unit of work. The helpers here skip it: rows (entities or dicts) are turned
+into column values once and written either as multi-row ``INSERT ... VALUES``
+batches or with asyncpg's binary ``COPY``. Everything runs on the session's
+connection and inside its transaction, so the caller still commits.
+
+``bulk_upsert`` writes the same batches as ``INSERT ... ON CONFLICT DO UPDATE``
+(or ``DO NOTHING`` for pure association tables such as ``enrollment``), so
+re-importing rows updates them instead of failing on the key.
+"""
+
+import itertools
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from sqlalchemy import Boolean, Column, Table, insert, inspect, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import sort_tables
+
+# asyncpg caps a statement at 32767 bind parameters
+MAX_BIND_PARAMETERS = 32_767
+
+BulkTarget = type | Table
+BulkMethod = Literal["insert", "copy"]
+
+
+@dataclass(frozen=True, slots=True)
+class BulkInsertReport:
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+@dataclass(frozen=True, slots=True)
+class BulkUpsertReport:
+    table: str
+    inserted: int
+    updated: int
+    unchanged: int  # conflicting rows whose values were already up to date
+    duplicates: int  # rows superseded by a later row with the same key in their batch
+    seconds: float
+    parents_created: Mapping[str, int]
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated + self.unchanged + self.duplicates
+
+
+def target_table(target: BulkTarget) -> Table:
+    if isinstance(target, Table):
+        return target
+    return inspect(target).local_table  # type: ignore[no-any-return]
+
+
+def _server_generated(table: Table, column: Column[Any]) -> bool:
+    return column is table.autoincrement_column or column.server_default is not None
+
+
+def _python_default(column: Column[Any]) -> Any:
+    default = column.default
+    if default is None:
+        return None
+    if default.is_callable:
+        return default.arg(None)  # type: ignore[attr-defined, operator]
+    if default.is_scalar:
+        return default.arg  # type: ignore[attr-defined]
+    return None
+
+
+def column_values(target: BulkTarget) -> Callable[[Any], dict[str, Any]]:
+    """Return a function turning one input row into a ``{column key: value}`` dict.
+
+    For a mapped class, rows may be instances or dicts keyed by attribute
+    name (``borrower_info``, not ``info``). For a ``Table``, rows are dicts keyed
+    by column. ``None`` values of server-generated columns (serial ids) are left
+    out so the database fills them in.
+    """
+
+    table = target_table(target)
+    if isinstance(target, Table):
+        return dict
+
+    mapper = inspect(target)
+    attributes = [
+        (prop.key, prop.columns[0]) for prop in mapper.column_attrs if table.c.contains_column(prop.columns[0])
+    ]
+
+    def convert(row: Any) -> dict[str, Any]:
+        values = {}
+        for key, column in attributes:
+            if isinstance(row, Mapping):
+                if key not in row:
+                    continue
+                value = row[key]
+            else:
+                value = getattr(row, key)
+            if value is None and _server_generated(table, column):
+                continue
+            values[column.key] = value
+        return values
+
+    return convert
+
+
+class _Batches:
+    """Converts rows to column values and splits them into runs sharing one column list.
+
+    Each row gets the columns it has values for, plus those with a Python-side
+    default; columns a row leaves out are left out of the statement, so server
+    defaults apply. Rows with different keys (dicts are free to differ) go into
+    separate statements rather than having missing values made up.
+    """
+
+    def __init__(self, table: Table, convert: Callable[[Any], dict[str, Any]]):
+        self.table = table
+        self.convert = convert
+        self._columns: dict[frozenset[str], list[Column[Any]]] = {}
+
+    def complete(self, chunk: Iterable[Any]) -> list[dict[str, Any]]:
+        """Column values of each row, keyed in table column order."""
+
+        return [self._complete(self.convert(row)) for row in chunk]
+
+    def runs(self, rows: Iterable[dict[str, Any]]) -> Iterator[tuple[list[Column[Any]], list[dict[str, Any]]]]:
+        """Consecutive completed rows with the same columns, in input order."""
+
+        for keys, run in itertools.groupby(rows, key=tuple):
+            yield [self.table.c[key] for key in keys], list(run)
+
+    def _complete(self, values: dict[str, Any]) -> dict[str, Any]:
+        present = frozenset(values)
+        columns = self._columns.get(present)
+        if columns is None:
+            columns = self._columns[present] = [
+                column
+                for column in self.table.columns
+                if column.key in present or (column.default is not None and not _server_generated(self.table, column))
+            ]
+        return {
+            column.key: values[column.key] if column.key in values else _python_default(column) for column in columns
+        }
+
+
+async def _copy(session: AsyncSession, table: Table, columns: list[Column[Any]], batch: list[dict[str, Any]]) -> None:
+    connection = await session.connection()
+    dialect = connection.dialect
+    raw = await connection.get_raw_connection()
+    driver = raw.driver_connection
+    assert driver is not None
+    if not driver.is_in_transaction():
+        # the asyncpg adapter opens its transaction lazily on the first statement,
+        # without one the COPY would commit on its own
+        await connection.exec_driver_sql("SELECT 1")
+
+    processors = [column.type.dialect_impl(dialect).bind_processor(dialect) for column in columns]
+    records = [
+        tuple(
+            proc(values[column.key]) if proc else values[column.key]
+            for column, proc in zip(columns, processors, strict=True)
+        )
+        for values in batch
+    ]
+    await driver.copy_records_to_table(
+        table.name,
+        records=records,
+        columns=[column.name for column in columns],
+        schema_name=table.schema,
+    )
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    target: BulkTarget,
+    rows: Iterable[Any],
+    *,
+    batch_size: int = 5_000,
+    method: BulkMethod = "insert",
+) -> BulkInsertReport:
+    """Insert ``rows`` into the table behind ``target`` in batches.
+
+    Args:
+        session (AsyncSession): The session whose connection/transaction is used
+        target (type | Table): A mapped class or a ``Table``
+        rows (Iterable): Entities or dicts, consumed lazily
+        batch_size (int): Rows per statement or COPY call
+        method (str): ``"insert"`` for multi-row ``INSERT ... VALUES``, ``"copy"`` for binary ``COPY``
+
+    Returns:
+        BulkInsertReport: rows written and elapsed time
+    """
+
+    table = target_table(target)
+    batches = _Batches(table, column_values(target))
+    written = 0
+    started = time.perf_counter()
+
+    for chunk in itertools.batched(rows, batch_size):
+        for columns, run in batches.runs(batches.complete(chunk)):
+            if method == "copy":
+                await _copy(session, table, columns, run)
+            else:
+                per_statement = max(1, MAX_BIND_PARAMETERS // max(1, len(columns)))
+                for part in itertools.batched(run, per_statement):
+                    await session.execute(insert(table).values(list(part)))
+        written += len(chunk)
+
+    return BulkInsertReport(table=table.name, rows=written, seconds=time.perf_counter() - started)
+
+
+async def bulk_insert_many(
+    session: AsyncSession,
+    rows_by_target: Mapping[BulkTarget, Iterable[Any]],
+    *,
+    batch_size: int = 5_000,
+    method: BulkMethod = "insert",
+) -> list[BulkInsertReport]:
+    """Bulk insert into several tables, parents before children.
+
+    Tables are written in foreign-key dependency order (e.g. ``publisher`` before
+    ``book``) whatever order ``rows_by_target`` is given in.
+    """
+
+    by_table = {target_table(target): target for target in rows_by_target}
+    reports = []
+    for table in sort_tables(by_table):
+        target = by_table[table]
+        reports.append(await bulk_insert(session, target, rows_by_target[target], batch_size=batch_size, method=method))
+    return reports
+
+
+# `xmax` is 0 for a row version created by this INSERT, and set when ON CONFLICT updated it
+_INSERTED = literal_column("xmax = 0", Boolean).label("inserted")
+
+
+def _dedupe(rows: Iterable[dict[str, Any]], key: list[str]) -> list[dict[str, Any]]:
+    # one statement may not touch the same row twice: the last value wins
+    required = frozenset(key)
+    deduped: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for values in rows:
+        if not required <= values.keys():
+            missing = ", ".join(k for k in key if k not in values)
+            raise ValueError(f"row has no value for conflict column {missing}: {values!r}")
+        deduped[tuple(values[k] for k in key)] = values
+    return list(deduped.values())
+
+
+async def _create_parents(session: AsyncSession, batches: _Batches, parents: list[Any]) -> int:
+    key = [column.key for column in batches.table.primary_key]
+    created = 0
+    for columns, run in batches.runs(_dedupe(batches.complete(parents), key)):
+        per_statement = max(1, MAX_BIND_PARAMETERS // max(1, len(columns)))
+        for part in itertools.batched(run, per_statement):
+            stmt = pg_insert(batches.table).values(list(part)).on_conflict_do_nothing(index_elements=key)
+            created += (await session.execute(stmt)).rowcount  # type: ignore[attr-defined]
+    return created
+
+
+async def bulk_upsert(
+    session: AsyncSession,
+    target: BulkTarget,
+    rows: Iterable[Any],
+    *,
+    conflict: Iterable[str] | None = None,
+    update: Iterable[str] | None = None,
+    skip_unchanged: bool = True,
+    parents: Mapping[BulkTarget, Callable[[Any], Any]] | None = None,
+    batch_size: int = 5_000,
+) -> BulkUpsertReport:
+    """Insert ``rows``, updating the rows that already exist, in batches.
+
+    Args:
+        session (AsyncSession): The session whose connection/transaction is used
+        target (type | Table): A mapped class or a ``Table``
+        rows (Iterable): Entities or dicts, consumed lazily
+        conflict (Iterable[str] | None): Columns of the unique key; the primary key by default
+        update (Iterable[str] | None): Columns overwritten on conflict; all others by default.
+            Only columns a row has values for are overwritten. With none (e.g. ``enrollment``)
+            existing rows are left alone
+        skip_unchanged (bool): Don't rewrite rows whose values are already current
+        parents (Mapping | None): Parent targets and a function building the parent row
+            (entity, dict, or None) from each input row; missing parents are inserted
+            first, in foreign-key order, batch by batch
+        batch_size (int): Rows per batch
+
+    Returns:
+        BulkUpsertReport: inserted/updated/unchanged/duplicate counts and parents created per table
+
+    Raises:
+        ValueError: A conflict column isn't a column of the table, or a row has no value for it
+
+    Example:
+        await bulk_upsert(
+            session,
+            TalkAssociationEntity,
+            schedule,  # dicts with speaker_id, speaker_name, conference_id, ...
+            parents={SpeakerEntity: lambda r: {"id": r["speaker_id"], "name": r["speaker_name"]}},
+        )
+    """
+
+    table = target_table(target)
+    conflict_keys = list(conflict) if conflict is not None else [column.key for column in table.primary_key]
+    unknown = [key for key in conflict_keys if key not in table.c]
+    if unknown:
+        raise ValueError(f"{table.name} has no column {', '.join(unknown)}")
+    batches = _Batches(table, column_values(target))
+    extracts = dict(parents or {})
+    parent_targets = {target_table(parent): parent for parent in extracts}
+    parent_steps: list[tuple[Table, _Batches, Callable[[Any], Any]]] = []
+    for parent_table in sort_tables(parent_targets):
+        parent = parent_targets[parent_table]
+        parent_steps.append((parent_table, _Batches(parent_table, column_values(parent)), extracts[parent]))
+    parents_created = {parent_table.name: 0 for parent_table, _, _ in parent_steps}
+    inserted = updated = unchanged = duplicates = 0
+    started = time.perf_counter()
+
+    for chunk in itertools.batched(rows, batch_size):
+        for parent_table, parent_batches, extract in parent_steps:
+            parent_rows = [parent for parent in map(extract, chunk) if parent is not None]
+            if parent_rows:
+                parents_created[parent_table.name] += await _create_parents(session, parent_batches, parent_rows)
+
+        batch = _dedupe(batches.complete(chunk), conflict_keys)
+        duplicates += len(chunk) - len(batch)
+        for columns, run in batches.runs(batch):
+            # only what these rows carry: an absent column must not be overwritten with its default
+            keys = [column.key for column in columns]
+            update_keys = (
+                [key for key in update if key in keys]
+                if update is not None
+                else [key for key in keys if key not in conflict_keys]
+            )
+            per_statement = max(1, MAX_BIND_PARAMETERS // max(1, len(columns)))
+            for part in itertools.batched(run, per_statement):
+                stmt = pg_insert(table).values(list(part))
+                if update_keys:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=conflict_keys,
+                        set_={key: stmt.excluded[key] for key in update_keys},
+                        where=(
+                            or_(*(table.c[key].is_distinct_from(stmt.excluded[key]) for key in update_keys))
+                            if skip_unchanged
+                            else None
+                        ),
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=conflict_keys)
+                # rows skipped by DO NOTHING or the WHERE clause aren't returned
+                flags = (await session.execute(stmt.returning(_INSERTED))).scalars().all()
+                part_inserted = sum(flags)
+                inserted += part_inserted
+                updated += len(flags) - part_inserted
+                unchanged += len(part) - len(flags)
+
+    return BulkUpsertReport(
+        table=table.name,
+        inserted=inserted,
+        updated=updated,
+        unchanged=unchanged,
+        duplicates=duplicates,
+        seconds=time.perf_counter() - started,
+        parents_created=parents_created,
+    )
@@ -0,0 +1,175 @@
+"""Counter caches: relationship cardinalities kept in a column on the parent.
+
+``counter_cache(PublisherEntity.books, PublisherTable.c.book_count)`` makes
+``publisher.book_count`` track the number of ``book`` rows pointing at each
+publisher, so reading it is a plain column read instead of a ``COUNT(*)`` or a
+``selectinload`` of the whole collection.
+
+The counter is maintained by generated Postgres triggers rather than ORM flush
+events, so Core statements, ``COPY`` (see ``app.lib.bulk``), ``ON DELETE
+CASCADE`` and batched purges keep it right too. The triggers are
+statement-level and read transition tables: a 100k-row ``COPY`` costs one
+``UPDATE`` per parent, not one per row.
+
+The ORM only reads the counter: map it with ``counter_property`` so a flush
+never writes it (and a stale in-memory value can't overwrite the triggers').
+
+Triggers don't fire on ``TRUNCATE``; run ``reconcile_counter_caches`` after
+anything that bypasses them.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import DDL, Column, Table, event, func, inspect, select, type_coerce, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ColumnProperty, QueryableAttribute, RelationshipProperty, column_property
+
+_quote = postgresql.dialect().identifier_preparer.quote
+
+_FUNCTION = """\
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE {parent} AS p SET {counter} = p.{counter} + d.n
+        FROM (SELECT {key} AS key, count(*) AS n FROM new_rows WHERE {key} IS NOT NULL GROUP BY {key}) AS d
+        WHERE p.{parent_key} = d.key;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE {parent} AS p SET {counter} = p.{counter} - d.n
+        FROM (SELECT {key} AS key, count(*) AS n FROM old_rows WHERE {key} IS NOT NULL GROUP BY {key}) AS d
+        WHERE p.{parent_key} = d.key;
+    ELSE
+        UPDATE {parent} AS p SET {counter} = p.{counter} + d.n
+        FROM (
+            SELECT key, sum(n) AS n
+            FROM (
+                SELECT {key} AS key, 1 AS n FROM new_rows
+                UNION ALL
+                SELECT {key}, -1 FROM old_rows
+            ) AS s
+            WHERE key IS NOT NULL
+            GROUP BY key
+            HAVING sum(n) <> 0
+        ) AS d
+        WHERE p.{parent_key} = d.key;
+    END IF;
+    RETURN NULL;
+END
+$$"""
+
+_TRIGGERS = {
+    "insert": "AFTER INSERT ON {child} REFERENCING NEW TABLE AS new_rows",
+    "delete": "AFTER DELETE ON {child} REFERENCING OLD TABLE AS old_rows",
+    "update": "AFTER UPDATE ON {child} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+}
+
+COUNTER_CACHES: list["CounterCache"] = []
+
+
+@dataclass(frozen=True)
+class CounterCache:
+    """A counter column on a parent table and the child column it counts.
+
+    Attributes:
+        key (Column): Column of the child (or secondary) table referencing the parent
+        counter (Column): Integer column on the parent holding the count
+    """
+
+    key: Column[Any]
+    counter: Column[Any]
+
+    @property
+    def child(self) -> Table:
+        return self.key.table  # type: ignore[return-value]
+
+    @property
+    def parent(self) -> Table:
+        return self.counter.table  # type: ignore[return-value]
+
+    @property
+    def parent_key(self) -> Column[Any]:
+        (foreign_key,) = (fk for fk in self.key.foreign_keys if fk.column.table is self.parent)
+        return foreign_key.column
+
+    @property
+    def name(self) -> str:
+        return f"{self.child.name}_{self.key.name}_{self.counter.name}"
+
+    def ddl(self) -> list[DDL]:
+        function = _quote(f"{self.name}_counter")
+        statements = [
+            _FUNCTION.format(
+                function=function,
+                parent=_quote(self.parent.name),
+                parent_key=_quote(self.parent_key.name),
+                counter=_quote(self.counter.name),
+                key=_quote(self.key.name),
+            )
+        ]
+        for operation, timing in _TRIGGERS.items():
+            trigger = _quote(f"{self.name}_{operation}")
+            statements.append(
+                f"CREATE TRIGGER {trigger} {timing.format(child=_quote(self.child.name))} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+            )
+        return [DDL(statement).execute_if(dialect="postgresql") for statement in statements]
+
+    async def reconcile(self, session: AsyncSession) -> int:
+        """Recount from the child table and fix parents whose counter drifted.
+
+        Returns:
+            int: Number of parent rows that were corrected
+        """
+
+        counted = select(func.count()).select_from(self.child).where(self.key == self.parent_key).scalar_subquery()
+        result = await session.execute(
+            update(self.parent).where(self.counter != counted).values({self.counter: counted})
+        )
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
+
+def counter_cache(relationship: QueryableAttribute[Any], counter: Column[Any]) -> CounterCache:
+    """Keep ``counter`` equal to the size of ``relationship`` for every parent row.
+
+    Works for one-to-many relationships (counting child rows) and many-to-many
+    ones (counting rows of the ``secondary`` table). Call it after the mappings,
+    before the tables are created; the triggers are created with the child table.
+    """
+
+    mapper = inspect(relationship.class_)
+    prop = mapper.attrs[relationship.key]
+    if not isinstance(prop, RelationshipProperty) or not prop.uselist:
+        raise ValueError(f"{relationship} is not a collection relationship")
+    # (parent column, child or secondary column) of the join condition
+    ((_, key),) = prop.synchronize_pairs
+
+    cache = CounterCache(key=key, counter=counter)
+    for ddl in cache.ddl():
+        event.listen(cache.child, "after_create", ddl)
+    COUNTER_CACHES.append(cache)
+    return cache
+
+
+def counter_property(counter: Column[Any]) -> ColumnProperty[Any]:
+    """Map ``counter`` read-only: loaded with the row, left out of every INSERT and UPDATE.
+
+    Map the table with ``exclude_properties=[counter]`` so the plain column
+    isn't mapped next to it.
+
+    Example:
+        properties={"book_count": counter_property(PublisherTable.c.book_count)}
+    """
+
+    # an expression over the column rather than the column itself, which the ORM never persists
+    return column_property(type_coerce(counter, counter.type))
+
+
+async def reconcile_counter_caches(session: AsyncSession, *caches: CounterCache) -> dict[str, int]:
+    """Reconcile the given counter caches, or every registered one.
+
+    Returns:
+        dict[str, int]: Corrected parent rows per counter cache name
+    """
+
+    return {cache.name: await cache.reconcile(session) for cache in caches or COUNTER_CACHES}
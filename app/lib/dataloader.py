@@ -0,0 +1,129 @@
+"""Coalescing batch loader for relationships.
+
+Resolvers that each ``await loader.load(CourseEntity.students, course)`` for
+many courses concurrently (``asyncio.gather``, GraphQL field resolution) share
+one query: loads requested during the same event-loop tick are collected and
+dispatched together, as one ``IN (...)`` query per relationship. Results are
+set on the parents with ``set_committed_value``, so the attribute is loaded
+afterwards and doesn't raise ``MissingGreenlet``.
+
+A loader caches per (relationship, parent key), so use one per request.
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.lib.relationships import RelationshipInfo, relationship_info
+
+# parent keys per IN (...) query, well below the driver's bind parameter limit
+MAX_BATCH_SIZE = 10_000
+
+_LOCK_KEY = "relationship_loader_lock"
+
+
+def _session_lock(session: AsyncSession) -> asyncio.Lock:
+    # an AsyncSession runs one statement at a time; loaders sharing it take turns
+    return session.info.setdefault(_LOCK_KEY, asyncio.Lock())  # type: ignore[no-any-return]
+
+
+def _failed(future: asyncio.Future[Any]) -> bool:
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class RelationshipLoader:
+    """Batches relationship loads issued in the same event-loop tick.
+
+    Example:
+        loader = RelationshipLoader(session)
+        students = await asyncio.gather(
+            *(loader.load(CourseEntity.students, course) for course in courses)
+        )  # one query
+    """
+
+    def __init__(self, session: AsyncSession, *, max_batch_size: int = MAX_BATCH_SIZE):
+        self.session = session
+        self.max_batch_size = max_batch_size
+        self.queries = 0
+        self._results: dict[tuple[RelationshipInfo, Any], asyncio.Future[Any]] = {}
+        self._pending: dict[RelationshipInfo, dict[Any, asyncio.Future[Any]]] = defaultdict(dict)
+        self._dispatch: asyncio.Task[None] | None = None
+
+    async def load(self, relationship: QueryableAttribute[Any], parent: Any) -> Any:
+        """Load `relationship` of `parent`, batched with the other loads of this tick.
+
+        Returns:
+            Any: The loaded collection, or the related object (or None) for scalar relationships
+        """
+
+        info = relationship_info(relationship)
+        key = info.parent_key(parent)
+        if key is None:
+            value: Any = [] if info.uselist else None
+        else:
+            value = await self._future(info, key)
+        set_committed_value(parent, info.key, value)
+        return getattr(parent, info.key)
+
+    async def load_many(self, relationship: QueryableAttribute[Any], parents: Iterable[Any]) -> list[Any]:
+        return list(await asyncio.gather(*(self.load(relationship, parent) for parent in parents)))
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def _future(self, info: RelationshipInfo, key: Any) -> asyncio.Future[Any]:
+        future = self._results.get((info, key))
+        if future is None or _failed(future):
+            # failures aren't cached, a later load tries again
+            future = self._results[info, key] = asyncio.get_running_loop().create_future()
+            self._pending[info][key] = future
+            if self._dispatch is None:
+                # runs after every task already scheduled in this tick has queued its loads
+                self._dispatch = asyncio.ensure_future(self._dispatch_pending())
+        return future
+
+    async def _dispatch_pending(self) -> None:
+        try:
+            async with _session_lock(self.session):
+                while self._pending:
+                    # loads queued while a batch runs are picked up by the next round
+                    pending, self._pending = self._pending, defaultdict(dict)
+                    for info, futures in pending.items():
+                        batch = list(futures.items())
+                        for start in range(0, len(batch), self.max_batch_size):
+                            await self._load_batch(info, dict(batch[start : start + self.max_batch_size]))
+        except BaseException as e:
+            # whatever was queued or in flight fails with it instead of waiting forever
+            self._pending = defaultdict(dict)
+            for future in self._results.values():
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._dispatch = None
+
+    async def _load_batch(self, info: RelationshipInfo, futures: dict[Any, asyncio.Future[Any]]) -> None:
+        try:
+            self.queries += 1
+            result = await self.session.execute(info.select_by_parent_keys, {"parent_keys": list(futures)})
+            rows = result.all()
+        except Exception as e:  # noqa: BLE001
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        grouped: dict[Any, list[Any]] = defaultdict(list)
+        for target, parent_key in rows:
+            grouped[parent_key].append(target)
+        for key, future in futures.items():
+            if future.done():
+                continue
+            targets = grouped.get(key, [])
+            future.set_result(targets if info.uselist else next(iter(targets), None))
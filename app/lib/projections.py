@@ -0,0 +1,122 @@
+"""Compact, read-only row snapshots of imperatively mapped entities.
+
+Mapped classes can't be declared with ``slots=True``: the ORM keeps each
+instance's state in ``__dict__`` and holds a weak reference to it. Read paths
+that load a lot of rows and never write them back can use a projection
+instead - a frozen, slotted dataclass with one field per mapped column (and
+one per composite, e.g. ``Location.p1``), filled straight from Core rows
+without identity-map bookkeeping.
+
+Example:
+    LocationRow = projection(Location)
+
+    async for row in stream_projection(session, LocationRow):
+        print(row.p1.x, row.p2.y)
+"""
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, make_dataclass
+from typing import Any
+
+from sqlalchemy import Column, ColumnElement, Select, inspect, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectionSpec:
+    """How to build a projection row from a Core row.
+
+    Attributes:
+        entity (type): The mapped class the projection was built from
+        columns (tuple[Column, ...]): The selected columns, plain columns first
+        fields (tuple[str, ...]): Names of the plain column fields
+        composites (tuple[tuple[str, type, int], ...]): ``(name, class, width)`` per composite
+    """
+
+    entity: type
+    columns: tuple[Column[Any], ...]
+    fields: tuple[str, ...]
+    composites: tuple[tuple[str, type, int], ...]
+
+    def build(self, row_cls: type, row: Row[Any]) -> Any:
+        values = dict(zip(self.fields, row, strict=False))
+        offset = len(self.fields)
+        for name, composite_cls, width in self.composites:
+            values[name] = composite_cls(*row[offset : offset + width])
+            offset += width
+        return row_cls(**values)
+
+
+def projection(entity: type, *, name: str | None = None) -> type:
+    """Build a frozen, slotted dataclass mirroring the columns of a mapped entity.
+
+    Relationships are not part of the projection; load the related rows with
+    their own projection when they are needed.
+    """
+
+    mapper = inspect(entity)
+    composite_columns = {column for comp in mapper.composites for column in comp.columns}
+
+    fields: list[str] = []
+    columns: list[Column[Any]] = []
+    for prop in mapper.column_attrs:
+        column = prop.columns[0]
+        if column in composite_columns:
+            continue
+        fields.append(prop.key)
+        columns.append(column)
+
+    composites: list[tuple[str, type, int]] = []
+    for comp in mapper.composites:
+        composites.append((comp.key, comp.composite_class, len(comp.columns)))
+        columns.extend(comp.columns)
+
+    row_cls = make_dataclass(
+        name or entity.__name__.removesuffix("Entity") + "Row",
+        [(field_name, Any) for field_name in [*fields, *(c[0] for c in composites)]],
+        frozen=True,
+        slots=True,
+        kw_only=True,
+    )
+    row_cls.__projection__ = ProjectionSpec(  # type: ignore[attr-defined]
+        entity=entity,
+        columns=tuple(columns),
+        fields=tuple(fields),
+        composites=tuple(composites),
+    )
+    return row_cls
+
+
+def select_projection(row_cls: type) -> Select[Any]:
+    spec: ProjectionSpec = row_cls.__projection__  # type: ignore[attr-defined]
+    return select(*spec.columns)
+
+
+async def stream_projection(
+    session: AsyncSession,
+    row_cls: type,
+    *criteria: ColumnElement[bool],
+    chunk_size: int = 10_000,
+) -> AsyncIterator[Any]:
+    """Stream projection rows matching ``criteria`` using a server-side cursor."""
+
+    spec: ProjectionSpec = row_cls.__projection__  # type: ignore[attr-defined]
+    stmt = select_projection(row_cls).where(*criteria).execution_options(yield_per=chunk_size)
+    result = await session.stream(stmt)
+    try:
+        async for partition in result.partitions():
+            for row in partition:
+                yield spec.build(row_cls, row)
+    finally:
+        await result.close()
+
+
+async def load_projection(
+    session: AsyncSession,
+    row_cls: type,
+    *criteria: ColumnElement[bool],
+) -> list[Any]:
+    spec: ProjectionSpec = row_cls.__projection__  # type: ignore[attr-defined]
+    result = await session.execute(select_projection(row_cls).where(*criteria))
+    return [spec.build(row_cls, row) for row in result]
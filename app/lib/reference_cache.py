@@ -0,0 +1,188 @@
+"""Whole-table in-memory replicas of small, rarely written reference tables.
+
+``conference``-like tables are read on nearly every request; fetching the same
+rows again (or ``selectinload``-ing them for each page of talks) is wasted
+round trips. A ``ReferenceCache`` loads the entire table once into an immutable
+snapshot indexed by primary key and swaps in a new snapshot on ``refresh``: a
+reader holding the old snapshot keeps a consistent view.
+
+Snapshot instances are detached and shared, so they are never handed out
+directly. ``get`` and ``populate`` merge a copy into the caller's session with
+``merge(load=False)``, which emits no SQL, and ``populate`` sets many-to-one
+relationships such as ``TalkAssociationEntity.conference`` with
+``set_committed_value`` instead of a selectin query.
+
+``attach`` does this without the caller's help, one row at a time: when a
+plain (lazy) many-to-one load by primary key or a ``session.get`` misses the
+session's identity map, the row is merged from the snapshot instead of
+queried. Nothing is merged for queries that never look a row up, and refreshing
+an expired instance still goes to the database. ``selectinload``/``joinedload``
+options always query, so leave them off relationships to a cached table.
+
+A commit of a session that flushed changes to the entity invalidates the
+snapshot: ``get`` and ``populate`` raise and lookups query again until the
+next ``refresh``. Writes the ORM does not see (Core ``insert``/``update``,
+other processes) still need an explicit ``refresh``.
+"""
+
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import IteratorResult, Result
+from sqlalchemy.engine.result import SimpleResultMetaData
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import (
+    Mapper,
+    ORMExecuteState,
+    QueryableAttribute,
+    Session,
+    SessionTransaction,
+    UOWTransaction,
+    sessionmaker,
+)
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.lib.relationships import relationship_info
+
+
+@dataclass(frozen=True, slots=True)
+class ReferenceSnapshot[T]:
+    rows: Mapping[Any, T]  # primary key -> detached instance, read-only
+    version: int
+    loaded_at: float
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class ReferenceCache[T]:
+    """Immutable, id-indexed snapshot of a whole mapped table.
+
+    Example:
+        conferences = ReferenceCache(ConferenceEntity, session_factory)
+        await conferences.refresh()  # at startup, and after writes to `conference`
+        ...
+        talks = (await session.scalars(select(TalkAssociationEntity))).all()
+        conferences.populate(session, TalkAssociationEntity.conference, talks)
+
+        # or once, for every session of the factory: `talk.conference` is then served from the cache
+        conferences.attach(session_factory)
+    """
+
+    def __init__(self, entity: type[T], session_factory: async_sessionmaker[AsyncSession]):
+        self.entity = entity
+        self.session_factory = session_factory
+        self.mapper: Mapper[T] = inspect(entity)
+        if len(self.mapper.primary_key) != 1:
+            raise ValueError(f"{entity.__name__} has a composite primary key")
+        self._snapshot: ReferenceSnapshot[T] | None = None
+        self._attached: list[Any] = []
+        # the WHERE clause and bound parameter of the mapper's own primary key lookups
+        get_clause, get_params = self.mapper._get_clause
+        self._get_clause, self._get_param = get_clause, get_params[self.mapper.primary_key[0]].key
+        # session.info key set when a flush wrote the entity, checked on commit
+        self._info_key = f"reference_cache_{id(self)}"
+
+    @property
+    def snapshot(self) -> ReferenceSnapshot[T]:
+        if self._snapshot is None:
+            raise RuntimeError(f"{self.entity.__name__} cache is not loaded or was written to, await refresh() first")
+        return self._snapshot
+
+    async def refresh(self) -> ReferenceSnapshot[T]:
+        """Reload the table and swap the new snapshot in."""
+
+        (key,) = self.mapper.primary_key
+        async with self.session_factory() as session:
+            instances = (await session.scalars(select(self.entity))).all()
+            session.expunge_all()
+        identity = self.mapper.get_property_by_column(key).key
+        rows = MappingProxyType({getattr(instance, identity): instance for instance in instances})
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        # a single assignment: readers see either the old snapshot or the new one
+        self._snapshot = ReferenceSnapshot(rows=rows, version=version, loaded_at=time.time())
+        return self._snapshot
+
+    def get(self, session: AsyncSession, key: Any) -> T | None:
+        """The row with primary key `key`, as an instance of `session` (no SQL)."""
+
+        instance = self.snapshot.rows.get(key)
+        if instance is None:
+            return None
+        return session.sync_session.merge(instance, load=False)
+
+    def populate(self, session: AsyncSession, relationship: QueryableAttribute[Any], parents: Iterable[Any]) -> None:
+        """Set a many-to-one relationship to the cached entity on every parent, without SQL.
+
+        Example:
+            conferences.populate(session, TalkAssociationEntity.conference, talks)
+        """
+
+        info = relationship_info(relationship)
+        if info.uselist or info.target is not self.mapper:
+            raise ValueError(f"{relationship} is not a many-to-one relationship to {self.entity.__name__}")
+        merged: dict[Any, T | None] = {}
+        for parent in parents:
+            key = info.parent_key(parent)
+            if key not in merged:
+                merged[key] = self.get(session, key) if key is not None else None
+            set_committed_value(parent, info.key, merged[key])
+
+    def attach(self, target: AsyncSession | Session | sessionmaker[Any] | type[Session]) -> None:
+        """Serve lazy many-to-one loads of the entity in sessions of `target` from the snapshot."""
+
+        if isinstance(target, AsyncSession):
+            target = target.sync_session
+        for name, listener in self._listeners():
+            event.listen(target, name, listener)
+        self._attached.append(target)
+
+    def detach(self) -> None:
+        for target in self._attached:
+            for name, listener in self._listeners():
+                event.remove(target, name, listener)
+        self._attached.clear()
+
+    def _listeners(self) -> list[tuple[str, Any]]:
+        return [
+            ("do_orm_execute", self._serve),
+            ("after_flush", self._after_flush),
+            ("after_commit", self._after_commit),
+            ("after_transaction_end", self._after_transaction_end),
+        ]
+
+    def _serve(self, orm_execute_state: ORMExecuteState) -> Result[Any] | None:
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or not orm_execute_state.is_select
+            or orm_execute_state.bind_mapper is not self.mapper
+            # session.refresh() and expired attributes are reloaded from the database
+            or orm_execute_state.load_options._refresh_state is not None
+        ):
+            return None
+        where = orm_execute_state.statement.whereclause
+        if where is None or not where.compare(self._get_clause):
+            return None
+        instance = snapshot.rows.get(orm_execute_state.parameters.get(self._get_param))
+        if instance is None:
+            return None
+        merged = orm_execute_state.session.merge(instance, load=False)
+        return IteratorResult(SimpleResultMetaData([self.entity.__name__]), iter([(merged,)]))
+
+    def _after_flush(self, session: Session, flush_context: UOWTransaction) -> None:
+        if any(isinstance(instance, self.entity) for instance in (*session.new, *session.dirty, *session.deleted)):
+            session.info[self._info_key] = True
+
+    def _after_commit(self, session: Session) -> None:
+        if session.info.pop(self._info_key, False):
+            self._snapshot = None
+
+    def _after_transaction_end(self, session: Session, transaction: SessionTransaction) -> None:
+        # a write rolled back leaves the snapshot valid
+        if transaction.parent is None:
+            session.info.pop(self._info_key, None)
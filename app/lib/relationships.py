@@ -0,0 +1,229 @@
+"""Relationship introspection for code that queries relationships by key.
+
+``relationship_info(CourseEntity.students)`` describes the columns behind a
+relationship: the parent column identifying the parent row, and the column
+its value is matched against (on the target table, or on the ``secondary``
+table for many-to-many). Loaders and existence/count queries build plain
+indexed SQL on those columns instead of going through a loaded collection.
+
+``exists``/``count`` (and their ``_many`` versions) answer "is student X in
+course Y" or "how many books has publisher P" with an indexed ``EXISTS`` or
+``COUNT`` on the foreign key (or ``secondary``) table, without loading the
+collection.
+
+Only relationships joined on a single column pair are supported, which covers
+every relationship in these examples.
+"""
+
+import functools
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Column, Select, Table, bindparam, func, inspect, select
+from sqlalchemy import exists as exists_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, QueryableAttribute, RelationshipProperty
+
+
+@dataclass(frozen=True, eq=False)
+class RelationshipInfo:
+    """Columns of a single-column relationship.
+
+    Attributes:
+        prop (RelationshipProperty): The relationship
+        parent_column (Column): Column of the parent table whose value identifies the parent
+        key_column (Column): Column matched against `parent_column`; on the target table,
+            or on the secondary table for many-to-many
+        target_column (Column | None): Target column the secondary table references (many-to-many only)
+        secondary_target_column (Column | None): Secondary column referencing `target_column`
+    """
+
+    prop: RelationshipProperty[Any]
+    parent_column: Column[Any]
+    key_column: Column[Any]
+    target_column: Column[Any] | None = None
+    secondary_target_column: Column[Any] | None = None
+
+    @property
+    def key(self) -> str:
+        return self.prop.key
+
+    @property
+    def parent(self) -> Mapper[Any]:
+        return self.prop.parent
+
+    @property
+    def target(self) -> Mapper[Any]:
+        return self.prop.mapper
+
+    @property
+    def secondary(self) -> Table | None:
+        return self.prop.secondary  # type: ignore[return-value]
+
+    @property
+    def uselist(self) -> bool:
+        return bool(self.prop.uselist)
+
+    @functools.cached_property
+    def parent_attr(self) -> str:
+        return self.parent.get_property_by_column(self.parent_column).key
+
+    def parent_key(self, instance: Any) -> Any:
+        """Value identifying `instance` on the relationship (its id, or its foreign key)."""
+
+        return getattr(instance, self.parent_attr)
+
+    @property
+    def key_table(self) -> Table:
+        """Table holding `key_column`: the target's, or the secondary one."""
+
+        return self.key_column.table  # type: ignore[return-value]
+
+    @functools.cached_property
+    def target_key_column(self) -> Column[Any]:
+        """Column of `key_table` identifying the target row."""
+
+        if self.secondary_target_column is not None:
+            return self.secondary_target_column
+        if len(self.target.primary_key) != 1:
+            raise ValueError(f"{self.target} has a composite primary key")
+        (column,) = self.target.primary_key
+        return column  # type: ignore[return-value]
+
+    def _filter(self, parent_key: Any, with_target: bool) -> list[Any]:
+        criteria = [self.key_column == parent_key]
+        if with_target:
+            criteria.append(self.target_key_column == bindparam("target_key"))
+        return criteria
+
+    @functools.cache  # noqa: B019 - instances live as long as their mapping
+    def select_exists(self, *, with_target: bool) -> Select[Any]:
+        """`EXISTS` on `key_table` for the `parent_key` (and `target_key`) parameters."""
+
+        return select(exists_().where(*self._filter(bindparam("parent_key"), with_target)))
+
+    @functools.cache  # noqa: B019
+    def select_exists_many(self, *, with_target: bool) -> Select[Any]:
+        """The `parent_keys` that have a related row, one semi-join probe per key."""
+
+        keys = (
+            func.unnest(bindparam("parent_keys", type_=ARRAY(self.key_column.type)))
+            .table_valued("key")
+            .render_derived()
+        )
+        return select(keys.c.key).where(exists_().where(*self._filter(keys.c.key, with_target)))
+
+    @functools.cached_property
+    def select_count(self) -> Select[Any]:
+        return select(func.count()).select_from(self.key_table).where(self.key_column == bindparam("parent_key"))
+
+    @functools.cached_property
+    def select_count_many(self) -> Select[Any]:
+        return (
+            select(self.key_column, func.count())
+            .where(self.key_column.in_(bindparam("parent_keys", expanding=True)))
+            .group_by(self.key_column)
+        )
+
+    @functools.cached_property
+    def select_by_parent_keys(self) -> Select[Any]:
+        """Targets of many parents in one query, each row tagged with its parent key.
+
+        The statement takes an expanding `parent_keys` parameter and returns
+        `(target, parent_key)` rows.
+        """
+
+        stmt = select(self.target, self.key_column.label("parent_key"))
+        if self.secondary is not None:
+            stmt = stmt.join(self.secondary, self.secondary_target_column == self.target_column)
+        stmt = stmt.where(self.key_column.in_(bindparam("parent_keys", expanding=True)))
+        if self.prop.order_by:
+            stmt = stmt.order_by(*self.prop.order_by)
+        return stmt
+
+
+def relationship_info(relationship: QueryableAttribute[Any]) -> RelationshipInfo:
+    prop = inspect(relationship.class_).attrs[relationship.key]
+    if not isinstance(prop, RelationshipProperty):
+        raise ValueError(f"{relationship} is not a relationship")
+    return _relationship_info(prop)
+
+
+@functools.cache
+def _relationship_info(prop: RelationshipProperty[Any]) -> RelationshipInfo:
+    if prop.secondary is not None:
+        pairs, secondary_pairs = prop.synchronize_pairs, prop.secondary_synchronize_pairs or []
+        if len(pairs) != 1 or len(secondary_pairs) != 1:
+            raise ValueError(f"{prop} is not joined on a single column")
+        ((parent_column, key_column),) = pairs
+        ((target_column, secondary_target_column),) = secondary_pairs
+        return RelationshipInfo(
+            prop=prop,
+            parent_column=parent_column,
+            key_column=key_column,
+            target_column=target_column,
+            secondary_target_column=secondary_target_column,
+        )
+
+    if len(prop.local_remote_pairs or []) != 1:
+        raise ValueError(f"{prop} is not joined on a single column")
+    # (column on the parent table, column on the target table), whichever side holds the foreign key
+    ((parent_column, key_column),) = prop.local_remote_pairs  # type: ignore[misc]
+    return RelationshipInfo(prop=prop, parent_column=parent_column, key_column=key_column)
+
+
+async def exists(
+    session: AsyncSession,
+    relationship: QueryableAttribute[Any],
+    parent_key: Any,
+    target_key: Any = None,
+) -> bool:
+    """Whether the parent has any related row, or the one identified by `target_key`.
+
+    Example:
+        await exists(session, StudentEntity.courses, student_id, course_id)
+    """
+
+    info = relationship_info(relationship)
+    params = {"parent_key": parent_key, "target_key": target_key}
+    result = await session.execute(info.select_exists(with_target=target_key is not None), params)
+    return bool(result.scalar_one())
+
+
+async def exists_many(
+    session: AsyncSession,
+    relationship: QueryableAttribute[Any],
+    parent_keys: Iterable[Any],
+    target_key: Any = None,
+) -> dict[Any, bool]:
+    info = relationship_info(relationship)
+    parent_keys = list(dict.fromkeys(parent_keys))
+    params = {"parent_keys": parent_keys, "target_key": target_key}
+    found = set((await session.scalars(info.select_exists_many(with_target=target_key is not None), params)).all())
+    return {key: key in found for key in parent_keys}
+
+
+async def count(session: AsyncSession, relationship: QueryableAttribute[Any], parent_key: Any) -> int:
+    """Size of the parent's collection, counted on the foreign key (or secondary) table.
+
+    Example:
+        await count(session, PublisherEntity.books, publisher_id)
+    """
+
+    info = relationship_info(relationship)
+    return (await session.execute(info.select_count, {"parent_key": parent_key})).scalar_one()  # type: ignore[no-any-return]
+
+
+async def count_many(
+    session: AsyncSession,
+    relationship: QueryableAttribute[Any],
+    parent_keys: Iterable[Any],
+) -> dict[Any, int]:
+    info = relationship_info(relationship)
+    counts = dict.fromkeys(parent_keys, 0)
+    if counts:
+        result = await session.execute(info.select_count_many, {"parent_keys": list(counts)})
+        counts.update(result.tuples().all())
+    return counts
@@ -0,0 +1,152 @@
+"""Repositories with statements built once, at import time.
+
+Building ``select(...).options(selectinload(...)).where(...)`` on every call
+costs Python construction time plus a fresh cache key before SQLAlchemy can
+even look up the compiled form. A ``Prepared`` statement is built once with
+``bindparam`` placeholders; its cache key is memoised on the statement, so
+each call goes straight to the compiled cache.
+
+``Repository.warm`` executes every prepared statement once at startup so the
+first real request doesn't pay for compilation, and ``CompileCacheStats``
+reports how often statements were served from the compiled cache. Eager loads
+such as ``selectinload`` compile their own statements, and only run when the
+main statement returns a row: warm parameters may therefore be a ``SELECT``
+picking an existing key, which is run first.
+"""
+
+import uuid
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import Result
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.sql import Executable, Select
+
+# a key no row has, for warming statements without touching data
+NIL_UUID = uuid.UUID(int=0)
+
+
+@dataclass(frozen=True, slots=True)
+class Prepared:
+    """A statement built once, plus parameters to warm it up with.
+
+    A `Select` parameter value is executed and its scalar result bound instead,
+    e.g. ``select(PublisherTable.c.id).limit(1)`` to load a real row.
+    """
+
+    statement: Executable
+    warm_params: Mapping[str, Any] = field(default_factory=dict)
+
+
+class Repository:
+    """Base class; `Prepared` class attributes are collected into `prepared`.
+
+    Example:
+        class PublisherRepository(Repository):
+            by_id = Prepared(
+                select(PublisherEntity).where(PublisherTable.c.id == bindparam("publisher_id")),
+                {"publisher_id": select(PublisherTable.c.id).limit(1)},
+            )
+
+            async def get(self, publisher_id):
+                return (await self.execute(self.by_id, publisher_id=publisher_id)).scalar_one_or_none()
+    """
+
+    prepared: ClassVar[dict[str, Prepared]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.prepared = {
+            name: value
+            for klass in reversed(cls.__mro__)
+            for name, value in vars(klass).items()
+            if isinstance(value, Prepared)
+        }
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def execute(self, prepared: Prepared, **params: Any) -> Result[Any]:
+        return await self.session.execute(prepared.statement, params)
+
+    @classmethod
+    async def warm(cls, bind: AsyncEngine | AsyncConnection) -> int:
+        """Compile every prepared statement by running it once; nothing is kept.
+
+        Runs on a session of its own, in a transaction (or, on a connection
+        already in one, a savepoint) that is rolled back.
+
+        Args:
+            bind: Engine or connection the statements are compiled for
+
+        Returns:
+            int: Number of statements warmed
+        """
+
+        async with AsyncSession(bind=bind, join_transaction_mode="create_savepoint") as session:
+            try:
+                for prepared in cls.prepared.values():
+                    params = {
+                        name: await session.scalar(value) if isinstance(value, Select) else value
+                        for name, value in prepared.warm_params.items()
+                    }
+                    await session.execute(prepared.statement, params)
+            finally:
+                await session.rollback()
+        return len(cls.prepared)
+
+
+async def warm_repositories(bind: AsyncEngine | AsyncConnection, *repositories: type[Repository]) -> int:
+    return sum([await repository.warm(bind) for repository in repositories])
+
+
+@dataclass
+class CompileCacheStats:
+    """Counts compiled-cache hits and misses of the statements run on an engine."""
+
+    hits: int = 0
+    misses: int = 0
+    uncached: int = 0  # text()/driver SQL and statements with caching disabled
+    _engine: Engine | None = field(default=None, repr=False)
+
+    @property
+    def hit_rate(self) -> float:
+        cacheable = self.hits + self.misses
+        return self.hits / cacheable if cacheable else 0.0
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.uncached = 0
+
+    def attach(self, engine: AsyncEngine | AsyncConnection | Engine) -> "CompileCacheStats":
+        self._engine = engine if isinstance(engine, Engine) else engine.sync_engine
+        event.listen(self._engine, "before_cursor_execute", self._record)
+        return self
+
+    def detach(self) -> None:
+        if self._engine is not None:
+            event.remove(self._engine, "before_cursor_execute", self._record)
+            self._engine = None
+
+    def _record(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is CacheStats.CACHE_HIT:
+            self.hits += 1
+        elif cache_hit is CacheStats.CACHE_MISS:
+            self.misses += 1
+        else:
+            self.uncached += 1
+
+
+def track_compile_cache(engine: AsyncEngine | AsyncConnection | Engine) -> CompileCacheStats:
+    return CompileCacheStats().attach(engine)
@@ -0,0 +1,398 @@
+"""In-memory bitmap index over `enrollment`.
+
+"Students in biology and math but not physics" is a three-way self-join on
+`enrollment` in SQL. `EnrollmentBitmapIndex` gives every student a dense
+ordinal and keeps, per course, a bitmap of the ordinals enrolled in it (and per
+student a bitmap of course ordinals). The question becomes
+
+    index.course(biology) & index.course(math) - index.course(physics)
+
+i.e. a few word-parallel AND/ANDNOT passes over Python ints.
+
+The bitmaps are plain Python ints: uncompressed, so a course's bitmap costs
+(highest student ordinal) / 8 bytes however few students it has, but the set
+operations run in C over whole machine words without a dependency.
+
+The index is built once from the tables and then kept current from the ORM:
+changes seen in `after_flush` (enrollment entities, `courses`/`students`
+collection changes, new and deleted students/courses) are applied when the
+transaction commits and dropped when it rolls back; those flushed in a
+savepoint are dropped with it, or wait for the enclosing transaction once it
+is released. Core statements bypass the ORM (e.g.
+`StudentRepository.sync_enrollments`, bulk inserts); commit them and `rebuild`,
+which reads in a REPEATABLE READ transaction of its own.
+"""
+
+import sys
+import uuid
+import weakref
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain
+from typing import Any, Self
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
+
+from app.many_to_many.entities import (
+    CourseEntity,
+    CourseTable,
+    EnrollmentEntity,
+    EnrollmentTable,
+    StudentEntity,
+    StudentTable,
+)
+
+_Change = Callable[[], None]
+
+# snapshots at least this strict keep the separate reads of a build consistent
+_SNAPSHOT_ISOLATION = ("repeatable read", "serializable")
+
+
+@dataclass(frozen=True, slots=True)
+class StudentSet:
+    """A set of students as a bitmap over the index's student ordinals."""
+
+    bits: int
+    index: "EnrollmentBitmapIndex" = field(repr=False, compare=False)
+
+    def __and__(self, other: "StudentSet") -> "StudentSet":
+        return StudentSet(self.bits & other.bits, self.index)
+
+    def __or__(self, other: "StudentSet") -> "StudentSet":
+        return StudentSet(self.bits | other.bits, self.index)
+
+    def __sub__(self, other: "StudentSet") -> "StudentSet":
+        return StudentSet(self.bits & ~other.bits, self.index)
+
+    def __invert__(self) -> "StudentSet":
+        # relative to every student the index knows, enrolled or not
+        return StudentSet(self.index.all_students.bits & ~self.bits, self.index)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __contains__(self, student_id: uuid.UUID) -> bool:
+        ordinal = self.index.student_ordinal(student_id)
+        return ordinal is not None and bool(self.bits >> ordinal & 1)
+
+    def __iter__(self) -> Iterator[uuid.UUID]:
+        students = self.index.students
+        for ordinal in _ordinals(self.bits):
+            yield students[ordinal]
+
+    def ids(self) -> list[uuid.UUID]:
+        """`StudentEntity` ids in the set, in ordinal order."""
+
+        return list(self)
+
+
+def _ordinals(bits: int) -> Iterator[int]:
+    # one pass over the binary digits rather than shifting a big int per bit
+    digits = bin(bits)[:1:-1]
+    ordinal = digits.find("1")
+    while ordinal != -1:
+        yield ordinal
+        ordinal = digits.find("1", ordinal + 1)
+
+
+def _set_bit(buffer: bytearray, ordinal: int) -> None:
+    byte = ordinal >> 3
+    if byte >= len(buffer):
+        buffer.extend(bytes(byte + 1 - len(buffer)))
+    buffer[byte] |= 1 << (ordinal & 7)
+
+
+def _bitmap(ordinals: Iterable[int]) -> int:
+    buffer = bytearray()
+    for ordinal in ordinals:
+        _set_bit(buffer, ordinal)
+    return int.from_bytes(buffer, "little")
+
+
+class _Ordinals:
+    """Dense ordinals for ids; freed slots are never reused so bitmaps stay valid."""
+
+    def __init__(self) -> None:
+        self.ids: list[uuid.UUID] = []
+        self.ordinals: dict[uuid.UUID, int] = {}
+        self.removed = 0  # bitmap of freed ordinals
+
+    @property
+    def live(self) -> int:
+        return ((1 << len(self.ids)) - 1) & ~self.removed
+
+    def add(self, id_: uuid.UUID) -> int:
+        ordinal = self.ordinals.get(id_)
+        if ordinal is None:
+            ordinal = self.ordinals[id_] = len(self.ids)
+            self.ids.append(id_)
+        return ordinal
+
+    def remove(self, id_: uuid.UUID) -> int | None:
+        ordinal = self.ordinals.pop(id_, None)
+        if ordinal is not None:
+            self.removed |= 1 << ordinal
+        return ordinal
+
+
+class EnrollmentBitmapIndex:
+    """Course -> bitmap of student ordinals, and student -> bitmap of course ordinals.
+
+    Example:
+        index = await EnrollmentBitmapIndex.build(session)
+        index.attach(session)
+        ids = (index.course(bio.id) & index.course(math.id) - index.course(physics.id)).ids()
+    """
+
+    def __init__(self) -> None:
+        self._students = _Ordinals()
+        self._courses = _Ordinals()
+        self._by_course: dict[int, int] = defaultdict(int)
+        self._by_student: dict[int, int] = defaultdict(int)
+        # changes per session, with the (root or nested) transaction they were flushed in
+        self._pending: weakref.WeakKeyDictionary[Session, list[tuple[SessionTransaction, _Change]]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._committed: set[SessionTransaction] = set()
+        self._attached: list[Any] = []
+
+    # ------ building ------
+
+    @classmethod
+    async def build(cls, session: AsyncSession, *, chunk_size: int = 100_000) -> Self:
+        """Load the index from the tables.
+
+        The reads must share one snapshot, so the ordinals computed in SQL match
+        the ids. A session with no transaction in progress starts a REPEATABLE
+        READ one; a transaction already in progress must be at least that strict.
+
+        Raises:
+            RuntimeError: The session's transaction is READ COMMITTED (or weaker)
+        """
+
+        index = cls()
+        # a session joined to an outer connection-level transaction reads in that one
+        joined = isinstance(session.bind, AsyncConnection) and session.bind.in_transaction()
+        if not session.in_transaction() and not joined:
+            await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        else:
+            isolation = await session.scalar(select(func.current_setting("transaction_isolation")))
+            if isolation not in _SNAPSHOT_ISOLATION:
+                raise RuntimeError(
+                    f"building the index in a {isolation.upper()} transaction could mix snapshots,"
+                    " use a session with no transaction in progress or a REPEATABLE READ one"
+                )
+        await index._load(session, chunk_size)
+        return index
+
+    async def rebuild(self, session: AsyncSession, *, chunk_size: int = 100_000) -> None:
+        """Reload the index from the tables, e.g. after Core writes the ORM didn't see.
+
+        The tables are read in a REPEATABLE READ transaction of its own, on a new
+        connection of the session's engine, whatever transaction `session` is
+        in. Only committed rows are seen: commit the writes first.
+        """
+
+        bind = session.bind
+        engine = bind.engine if isinstance(bind, AsyncConnection) else bind
+        async with AsyncSession(engine) as reader:
+            fresh = await self.build(reader, chunk_size=chunk_size)
+        self._students, self._courses = fresh._students, fresh._courses
+        self._by_course, self._by_student = fresh._by_course, fresh._by_student
+
+    async def _load(self, session: AsyncSession, chunk_size: int) -> None:
+        # ordinals are positions in id order, so enrollments can be read as ordinal
+        # pairs: plain ints instead of converting and hashing two UUIDs per row
+        for table, ordinals in ((StudentTable, self._students), (CourseTable, self._courses)):
+            result = await session.stream(
+                select(table.c.id).order_by(table.c.id).execution_options(yield_per=chunk_size)
+            )
+            try:
+                async for ids in result.scalars().partitions():
+                    for id_ in ids:
+                        ordinals.add(id_)
+            finally:
+                await result.close()
+
+        students, courses = (
+            select(table.c.id, (func.row_number().over(order_by=table.c.id) - 1).label("ordinal")).cte(name)
+            for table, name in ((StudentTable, "student_ordinal"), (CourseTable, "course_ordinal"))
+        )
+        pairs = (
+            select(students.c.ordinal, courses.c.ordinal)
+            .select_from(EnrollmentTable)
+            .join(students, students.c.id == EnrollmentTable.c.student_id)
+            .join(courses, courses.c.id == EnrollmentTable.c.course_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await session.stream(pairs)
+        # `|=` on a big int copies it, so no bitmap is touched per row: course bitmaps
+        # are assembled as bytes, a student's few course ordinals collected in a list
+        course_bytes: dict[int, bytearray] = defaultdict(bytearray)
+        student_courses: dict[int, list[int]] = defaultdict(list)
+        try:
+            async for rows in result.partitions():
+                for student, course in rows:
+                    _set_bit(course_bytes[course], student)
+                    student_courses[student].append(course)
+        finally:
+            await result.close()
+        for course, buffer in course_bytes.items():
+            self._by_course[course] = int.from_bytes(buffer, "little")
+        for student, courses in student_courses.items():
+            self._by_student[student] = _bitmap(courses)
+
+    # ------ queries ------
+
+    @property
+    def students(self) -> list[uuid.UUID]:
+        return self._students.ids
+
+    @property
+    def all_students(self) -> StudentSet:
+        return StudentSet(self._students.live, self)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the course bitmaps."""
+
+        return sum(sys.getsizeof(bits) for bits in self._by_course.values())
+
+    def student_ordinal(self, student_id: uuid.UUID) -> int | None:
+        return self._students.ordinals.get(student_id)
+
+    def course(self, course_id: uuid.UUID) -> StudentSet:
+        """Students enrolled in the course (empty for unknown courses)."""
+
+        ordinal = self._courses.ordinals.get(course_id)
+        return StudentSet(self._by_course.get(ordinal, 0) if ordinal is not None else 0, self)
+
+    def all_of(self, course_ids: Iterable[uuid.UUID]) -> StudentSet:
+        result = self.all_students
+        for course_id in course_ids:
+            result &= self.course(course_id)
+        return result
+
+    def any_of(self, course_ids: Iterable[uuid.UUID]) -> StudentSet:
+        result = StudentSet(0, self)
+        for course_id in course_ids:
+            result |= self.course(course_id)
+        return result
+
+    def courses_of(self, student_id: uuid.UUID) -> list[uuid.UUID]:
+        ordinal = self._students.ordinals.get(student_id)
+        if ordinal is None:
+            return []
+        courses = self._courses.ids
+        return [courses[course] for course in _ordinals(self._by_student.get(ordinal, 0))]
+
+    # ------ maintenance ------
+
+    def add(self, student_id: uuid.UUID, course_id: uuid.UUID) -> None:
+        student, course = self._students.add(student_id), self._courses.add(course_id)
+        self._by_course[course] |= 1 << student
+        self._by_student[student] |= 1 << course
+
+    def discard(self, student_id: uuid.UUID, course_id: uuid.UUID) -> None:
+        student, course = self._students.ordinals.get(student_id), self._courses.ordinals.get(course_id)
+        if student is None or course is None:
+            return
+        self._by_course[course] &= ~(1 << student)
+        self._by_student[student] &= ~(1 << course)
+
+    def add_student(self, student_id: uuid.UUID) -> None:
+        self._students.add(student_id)
+
+    def remove_student(self, student_id: uuid.UUID) -> None:
+        student = self._students.remove(student_id)
+        if student is None:
+            return
+        for course in _ordinals(self._by_student.pop(student, 0)):
+            self._by_course[course] &= ~(1 << student)
+
+    def remove_course(self, course_id: uuid.UUID) -> None:
+        course = self._courses.remove(course_id)
+        if course is None:
+            return
+        for student in _ordinals(self._by_course.pop(course, 0)):
+            self._by_student[student] &= ~(1 << course)
+
+    def attach(self, target: AsyncSession | Session | sessionmaker[Any] | type[Session]) -> None:
+        """Follow committed ORM changes made through `target`.
+
+        Args:
+            target: A session, a sync session factory, or a `Session` subclass (e.g. the
+                `sync_session_class` of an `async_sessionmaker`)
+        """
+
+        if isinstance(target, AsyncSession):
+            target = target.sync_session
+        for name, listener in self._listeners():
+            event.listen(target, name, listener)
+        self._attached.append(target)
+
+    def detach(self) -> None:
+        for target in self._attached:
+            for name, listener in self._listeners():
+                event.remove(target, name, listener)
+        self._attached.clear()
+
+    def _listeners(self) -> list[tuple[str, Any]]:
+        return [
+            ("after_flush", self._after_flush),
+            ("after_commit", self._after_commit),
+            ("after_transaction_end", self._after_transaction_end),
+        ]
+
+    def _after_flush(self, session: Session, flush_context: Any) -> None:
+        # the session still shows its pre-flush state (new/dirty/deleted, attribute history) here
+        changes: list[_Change] = []
+        for obj in chain(session.new, session.dirty):
+            if isinstance(obj, EnrollmentEntity) and obj in session.new:
+                changes.append(partial(self.add, obj.student_id, obj.course_id))
+            elif isinstance(obj, StudentEntity):
+                changes.append(partial(self.add_student, obj.id))
+                history = inspect(obj).attrs.courses.history
+                changes.extend(partial(self.add, obj.id, course.id) for course in history.added or ())
+                changes.extend(partial(self.discard, obj.id, course.id) for course in history.deleted or ())
+            elif isinstance(obj, CourseEntity):
+                history = inspect(obj).attrs.students.history
+                changes.extend(partial(self.add, student.id, obj.id) for student in history.added or ())
+                changes.extend(partial(self.discard, student.id, obj.id) for student in history.deleted or ())
+        for obj in session.deleted:
+            if isinstance(obj, EnrollmentEntity):
+                changes.append(partial(self.discard, obj.student_id, obj.course_id))
+            elif isinstance(obj, StudentEntity):
+                changes.append(partial(self.remove_student, obj.id))
+            elif isinstance(obj, CourseEntity):
+                changes.append(partial(self.remove_course, obj.id))
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        self._pending.setdefault(session, []).extend((transaction, change) for change in changes)
+
+    def _after_commit(self, session: Session) -> None:
+        # also fired when a savepoint is released, while it is still the innermost transaction
+        self._committed.add(session.get_nested_transaction() or session.get_transaction())  # type: ignore[arg-type]
+
+    def _after_transaction_end(self, session: Session, transaction: SessionTransaction) -> None:
+        if not (transaction.nested or transaction.parent is None):
+            return  # a flush's subtransaction
+        committed = transaction in self._committed
+        self._committed.discard(transaction)
+        pending = self._pending.get(session, [])
+        if committed and transaction.nested:
+            # released: the changes now stand or fall with the enclosing transaction
+            parent = transaction.parent
+            self._pending[session] = [(parent if owner is transaction else owner, change) for owner, change in pending]
+            return
+        self._pending[session] = [(owner, change) for owner, change in pending if owner is not transaction]
+        if committed:
+            for owner, change in pending:
+                if owner is transaction:
+                    change()
@@ -1,9 +1,11 @@
 import uuid
 from dataclasses import dataclass, field
 
-from sqlalchemy import Column, ForeignKey, String, Table, Uuid
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table, Uuid, text
 from sqlalchemy.orm import registry, relationship
 
+from app.lib.counter_cache import counter_cache, counter_property
+
 # Register the SQLAlchemy
 MapperRegistry = registry()
 
@@ -21,24 +23,36 @@ This example doesn't show the association table examples
 """
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, eq=False)
 class StudentEntity:
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     name: str
-    courses: list["CourseEntity"] = field(default_factory=list, repr=False)
+    courses: set["CourseEntity"] = field(default_factory=set, repr=False)
 
+    # identity semantics: the collections are sets, so membership is a hash lookup
     def __eq__(self, other):
-        return self.id == other.id and self.name == other.name
+        if isinstance(other, type(self)):
+            return self.id == other.id
+        return False
 
+    def __hash__(self):
+        return hash(self.id)
 
-@dataclass(kw_only=True)
+
+@dataclass(kw_only=True, eq=False)
 class CourseEntity:
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     name: str
-    students: list["StudentEntity"] = field(default_factory=list, repr=False)
+    students: set["StudentEntity"] = field(default_factory=set, repr=False)
+    student_count: int = field(init=False)  # maintained by the database
 
     def __eq__(self, other):
-        return self.id == other.id and self.name == other.name
+        if isinstance(other, type(self)):
+            return self.id == other.id
+        return False
+
+    def __hash__(self):
+        return hash(self.id)
 
 
 @dataclass(kw_only=True)
@@ -46,6 +60,10 @@ class EnrollmentEntity:
     course_id: uuid.UUID
     student_id: uuid.UUID
 
+    # mapped so a flush orders enrollments after the students and courses they reference
+    student: StudentEntity | None = field(init=False, default=None, repr=False)
+    course: CourseEntity | None = field(init=False, default=None, repr=False)
+
 
 # ------------- Daabase Tables -------
 
@@ -61,6 +79,7 @@ CourseTable = Table(
     MapperRegistry.metadata,
     Column("id", Uuid(as_uuid=True), primary_key=True, nullable=False),
     Column("name", String(100), nullable=False),
+    Column("student_count", Integer, nullable=False, server_default=text("0")),
 )
 
 EnrollmentTable = Table(
@@ -80,6 +99,8 @@ EnrollmentTable = Table(
         primary_key=True,
         nullable=False,
     ),
+    # the primary key covers lookups by course; this one covers lookups by student
+    Index("ix_enrollment_student_id", "student_id"),
 )
 
 
@@ -95,6 +116,7 @@ MapperRegistry.map_imperatively(
             CourseEntity,
             secondary=EnrollmentTable,
             back_populates="students",
+            collection_class=set,
         ),
     },
 )
@@ -105,12 +127,15 @@ MapperRegistry.map_imperatively(
     properties={
         "id": CourseTable.c.id,
         "name": CourseTable.c.name,
+        "student_count": counter_property(CourseTable.c.student_count),
         "students": relationship(
             StudentEntity,
             secondary=EnrollmentTable,
             back_populates="courses",
+            collection_class=set,
         ),
     },
+    exclude_properties=[CourseTable.c.student_count],
 )
 
 MapperRegistry.map_imperatively(
@@ -119,5 +144,14 @@ MapperRegistry.map_imperatively(
     properties={
         "course_id": EnrollmentTable.c.course_id,
         "student_id": EnrollmentTable.c.student_id,
+        # the same rows are also written through `courses`/`students` (secondary)
+        "student": relationship(StudentEntity, overlaps="courses,students"),
+        "course": relationship(CourseEntity, overlaps="courses,students"),
     },
 )
+
+# Counter caches: `course.student_count` follows the `enrollment` rows of each course.
+CourseStudentCount = counter_cache(
+    CourseEntity.students,  # pyright: ignore[reportArgumentType]
+    CourseTable.c.student_count,
+)
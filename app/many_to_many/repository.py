@@ -0,0 +1,102 @@
+"""Queries of the many-to-many example, built once with bound parameters.
+
+`StudentRepository.sync_enrollments` replaces a student's course set with two
+statements whatever its size: the courses to add are the array minus what is
+already enrolled (`ON CONFLICT DO NOTHING`), the ones to drop are the rows not
+in the array (`<> ALL(...)`). `StudentEntity.courses` is never loaded.
+"""
+
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import Uuid, all_, bindparam, delete, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
+
+from app.lib.repository import NIL_UUID, Prepared, Repository
+from app.many_to_many.entities import (
+    CourseEntity,
+    CourseTable,
+    EnrollmentTable,
+    StudentEntity,
+    StudentTable,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EnrollmentSync:
+    added: int
+    removed: int
+
+
+def _course_ids():
+    return bindparam("course_ids", type_=ARRAY(Uuid(as_uuid=True)))
+
+
+class StudentRepository(Repository):
+    with_courses = Prepared(
+        select(StudentEntity)
+        .options(selectinload(StudentEntity.courses))  # pyright: ignore[reportArgumentType]
+        .where(StudentTable.c.id == bindparam("student_id")),
+        {"student_id": select(EnrollmentTable.c.student_id).limit(1)},
+    )
+    add_enrollments = Prepared(
+        insert(EnrollmentTable)
+        .from_select(
+            ["course_id", "student_id"],
+            select(
+                func.unnest(_course_ids()),
+                bindparam("student_id", type_=Uuid(as_uuid=True)),
+            ),
+        )
+        .on_conflict_do_nothing(),
+        {"student_id": NIL_UUID, "course_ids": []},
+    )
+    remove_enrollments = Prepared(
+        delete(EnrollmentTable).where(
+            EnrollmentTable.c.student_id == bindparam("student_id"),
+            EnrollmentTable.c.course_id != all_(_course_ids()),
+        ),
+        {"student_id": NIL_UUID, "course_ids": []},
+    )
+
+    async def get_with_courses(self, student_id: uuid.UUID) -> StudentEntity | None:
+        return (await self.execute(self.with_courses, student_id=student_id)).scalar_one_or_none()
+
+    async def sync_enrollments(self, student_id: uuid.UUID, course_ids: Iterable[uuid.UUID]) -> EnrollmentSync:
+        """Make the student enrolled in exactly `course_ids`; the caller commits.
+
+        Returns:
+            EnrollmentSync: Number of enrollments inserted and deleted
+        """
+
+        course_ids = list(dict.fromkeys(course_ids))
+        removed = await self.execute(self.remove_enrollments, student_id=student_id, course_ids=course_ids)
+        added = await self.execute(self.add_enrollments, student_id=student_id, course_ids=course_ids)
+
+        # a collection loaded earlier in this session no longer matches the rows
+        student = self.session.identity_map.get(identity_key(StudentEntity, student_id))
+        if student is not None:
+            self.session.expire(student, ["courses"])
+
+        return EnrollmentSync(
+            added=added.rowcount,  # type: ignore[attr-defined]
+            removed=removed.rowcount,  # type: ignore[attr-defined]
+        )
+
+
+class CourseRepository(Repository):
+    with_students = Prepared(
+        select(CourseEntity)
+        .options(selectinload(CourseEntity.students))  # pyright: ignore[reportArgumentType]
+        .where(CourseTable.c.id == bindparam("course_id")),
+        {"course_id": select(EnrollmentTable.c.course_id).limit(1)},
+    )
+
+    async def get_with_students(self, course_id: uuid.UUID) -> CourseEntity | None:
+        return (await self.execute(self.with_students, course_id=course_id)).scalar_one_or_none()
+
+
+REPOSITORIES: list[type[Repository]] = [StudentRepository, CourseRepository]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.instrumentation import query_budget
+from app.lib.dataloader import RelationshipLoader
+from app.many_to_many.entities import CourseEntity, StudentEntity
+
+
+@pytest.fixture
+async def courses(db_session: AsyncSession) -> list[CourseEntity]:
+    abel, bella = StudentEntity(name="abel"), StudentEntity(name="bella")
+    math = CourseEntity(name="math", students={abel, bella})
+    bio = CourseEntity(name="biology", students={abel})
+    physics = CourseEntity(name="physics")
+    db_session.add_all([math, bio, physics])
+    await db_session.commit()
+    await db_session.reset()
+    return list((await db_session.scalars(select(CourseEntity).order_by(CourseEntity.name))).all())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_query(db_session: AsyncSession, courses: list[CourseEntity]):
+    with query_budget(1):
+        loader = RelationshipLoader(db_session)
+        biology, math, physics = courses
+        students = await asyncio.gather(
+            loader.load(CourseEntity.students, math),
+            loader.load(CourseEntity.students, biology),
+            loader.load(CourseEntity.students, physics),
+            loader.load(CourseEntity.students, math),  # deduplicated
+        )
+
+    assert loader.queries == 1
+    assert [sorted(s.name for s in group) for group in students] == [
+        ["abel", "bella"],
+        ["abel"],
+        [],
+        ["abel", "bella"],
+    ]
+    # loaded onto the parents, no lazy load (and MissingGreenlet) afterwards
+    assert {s.name for s in math.students} == {"abel", "bella"}
+    assert physics.students == set()
+
+
+@pytest.mark.asyncio
+async def test_loads_of_different_relationships_in_one_tick(db_session: AsyncSession, courses: list[CourseEntity]):
+    loader = RelationshipLoader(db_session)
+    students = await loader.load_many(CourseEntity.students, courses)
+    all_students = {student for group in students for student in group}
+
+    courses_of = await loader.load_many(StudentEntity.courses, all_students)
+
+    assert loader.queries == 2
+    assert sorted(len(group) for group in courses_of) == [1, 2]
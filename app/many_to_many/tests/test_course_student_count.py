@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.many_to_many.entities import CourseEntity, StudentEntity
+
+
+@pytest.mark.asyncio
+async def test_student_count_follows_enrollments(db_session: AsyncSession):
+    biology = CourseEntity(name="biology")
+    abel = StudentEntity(name="abel", courses={biology})
+    bella = StudentEntity(name="bella", courses={biology})
+    db_session.add_all([abel, bella])
+    await db_session.commit()
+
+    await db_session.refresh(biology, ["student_count"])
+    assert biology.student_count == 2
+
+    abel.courses.remove(biology)
+    await db_session.commit()
+
+    await db_session.refresh(biology, ["student_count"])
+    assert biology.student_count == 1
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.many_to_many.bitmap_index import EnrollmentBitmapIndex
+from app.many_to_many.entities import CourseEntity, EnrollmentEntity, StudentEntity
+from app.many_to_many.repository import StudentRepository
+
+
+@pytest.fixture
+async def school(db_session: AsyncSession) -> dict[str, StudentEntity | CourseEntity]:
+    bio, math, physics = CourseEntity(name="biology"), CourseEntity(name="math"), CourseEntity(name="physics")
+    abel = StudentEntity(name="abel", courses={bio, math})
+    bella = StudentEntity(name="bella", courses={bio, math, physics})
+    carl = StudentEntity(name="carl", courses={bio})
+    dana = StudentEntity(name="dana")
+    db_session.add_all([abel, bella, carl, dana])
+    await db_session.commit()
+    return {entity.name: entity for entity in (bio, math, physics, abel, bella, carl, dana)}
+
+
+@pytest.mark.asyncio
+@pytest.mark.db_truncate  # builds in a REPEATABLE READ transaction of its own
+async def test_set_algebra_across_courses(db_session: AsyncSession, school):
+    index = await EnrollmentBitmapIndex.build(db_session, chunk_size=2)
+    await db_session.commit()
+    bio, math, physics = (index.course(school[name].id) for name in ("biology", "math", "physics"))
+
+    assert set((bio & math - physics).ids()) == {school["abel"].id}
+    assert set((math | physics).ids()) == {school["abel"].id, school["bella"].id}
+    assert set((~bio).ids()) == {school["dana"].id}  # never enrolled, but a student
+    assert len(index.all_of([school["biology"].id, school["math"].id])) == 2
+    assert len(index.any_of([])) == 0
+    assert school["carl"].id in bio
+    assert school["carl"].id not in math
+    assert set(index.courses_of(school["bella"].id)) == {school["biology"].id, school["math"].id, school["physics"].id}
+
+
+@pytest.mark.asyncio
+@pytest.mark.db_truncate
+async def test_index_follows_committed_orm_changes(db_session: AsyncSession, school):
+    index = await EnrollmentBitmapIndex.build(db_session)
+    await db_session.commit()
+    index.attach(db_session)
+    ids = {name: entity.id for name, entity in school.items()}
+    try:
+        abel, dana = school["abel"], school["dana"]
+        abel.courses.discard(school["math"])  # collection change
+        db_session.add(EnrollmentEntity(student_id=dana.id, course_id=ids["physics"]))  # standalone row
+        await db_session.commit()
+
+        assert set(index.course(ids["math"]).ids()) == {ids["bella"]}
+        assert ids["dana"] in index.course(ids["physics"])
+
+        school["carl"].courses.add(school["math"])
+        await db_session.flush()
+        await db_session.rollback()  # flushed but never committed, expires everything
+        assert ids["carl"] not in index.course(ids["math"])
+
+        carl, dana, math = school["carl"], school["dana"], school["math"]
+        await db_session.refresh(math, ["students"])
+        for student in (carl, dana):
+            await db_session.refresh(student, ["courses"])
+        async with db_session.begin_nested():
+            dana.courses.add(math)
+        assert ids["dana"] not in index.course(ids["math"])  # released, but not committed yet
+        savepoint = await db_session.begin_nested()
+        carl.courses.add(math)
+        await db_session.flush()
+        await savepoint.rollback()  # only this savepoint's changes are dropped
+        await db_session.commit()
+        assert ids["carl"] not in index.course(ids["math"])
+        assert ids["dana"] in index.course(ids["math"])
+
+        eve = StudentEntity(name="eve")
+        db_session.add(eve)
+        await db_session.delete(await db_session.get(StudentEntity, ids["bella"]))
+        await db_session.commit()
+        assert eve.id in ~index.course(ids["biology"])
+        assert ids["bella"] not in index.all_students
+        assert set(index.course(ids["physics"]).ids()) == {ids["dana"]}
+    finally:
+        index.detach()
+
+
+@pytest.mark.asyncio
+async def test_build_refuses_a_read_committed_transaction(db_session: AsyncSession, school):
+    await db_session.connection()  # READ COMMITTED, the server default
+
+    with pytest.raises(RuntimeError, match="READ COMMITTED"):
+        await EnrollmentBitmapIndex.build(db_session)
+
+
+@pytest.mark.asyncio
+@pytest.mark.db_truncate  # the rebuild reads committed rows on a connection of its own
+async def test_rebuild_picks_up_core_writes(db_session: AsyncSession, school):
+    index = await EnrollmentBitmapIndex.build(db_session)
+    await db_session.commit()
+    ids = {name: entity.id for name, entity in school.items()}
+
+    await StudentRepository(db_session).sync_enrollments(ids["dana"], [ids["math"], ids["physics"]])
+    await db_session.commit()
+    assert ids["dana"] not in index.course(ids["math"])
+
+    await db_session.connection()  # READ COMMITTED, which build() refuses
+    await index.rebuild(db_session)
+
+    assert set(index.course(ids["math"]).ids()) == {ids["abel"], ids["bella"], ids["dana"]}
+    assert set(index.courses_of(ids["dana"])) == {ids["math"], ids["physics"]}
+    assert set(index.courses_of(ids["bella"])) == {ids["biology"], ids["math"], ids["physics"]}
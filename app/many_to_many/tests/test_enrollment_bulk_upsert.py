@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.bulk import bulk_upsert
+from app.many_to_many.entities import CourseEntity, EnrollmentTable, StudentEntity
+
+
+@pytest.mark.asyncio
+async def test_upsert_into_pure_association_table_skips_existing_rows(db_session: AsyncSession):
+    abel, math, bio = StudentEntity(name="abel"), CourseEntity(name="math"), CourseEntity(name="biology")
+    db_session.add_all([abel, math, bio])
+    await db_session.commit()
+
+    rows = [{"student_id": abel.id, "course_id": math.id}]
+    assert (await bulk_upsert(db_session, EnrollmentTable, rows)).inserted == 1
+
+    rows.append({"student_id": abel.id, "course_id": bio.id})
+    report = await bulk_upsert(db_session, EnrollmentTable, rows)
+    await db_session.commit()
+
+    assert (report.inserted, report.updated, report.unchanged) == (1, 0, 1)
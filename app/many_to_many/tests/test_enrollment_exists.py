@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.relationships import count, count_many, exists, exists_many
+from app.many_to_many.entities import CourseEntity, StudentEntity
+
+
+@pytest.mark.asyncio
+async def test_enrollment_checks_without_loading_collections(db_session: AsyncSession):
+    math, bio, physics = CourseEntity(name="math"), CourseEntity(name="biology"), CourseEntity(name="physics")
+    abel = StudentEntity(name="abel", courses={math, bio})
+    bella = StudentEntity(name="bella", courses={math})
+    carl = StudentEntity(name="carl")
+    db_session.add_all([abel, bella, carl, physics])
+    await db_session.commit()
+    await db_session.reset()
+
+    assert await exists(db_session, StudentEntity.courses, abel.id, math.id)
+    assert not await exists(db_session, StudentEntity.courses, abel.id, physics.id)
+    assert await exists(db_session, CourseEntity.students, bio.id)
+    assert not await exists(db_session, CourseEntity.students, physics.id)
+
+    assert await count(db_session, StudentEntity.courses, abel.id) == 2
+    assert await count(db_session, CourseEntity.students, physics.id) == 0
+
+    assert await exists_many(db_session, StudentEntity.courses, [abel.id, bella.id, carl.id], bio.id) == {
+        abel.id: True,
+        bella.id: False,
+        carl.id: False,
+    }
+    assert await count_many(db_session, CourseEntity.students, [math.id, bio.id, physics.id]) == {
+        math.id: 2,
+        bio.id: 1,
+        physics.id: 0,
+    }
+    assert await count_many(db_session, CourseEntity.students, []) == {}
@@ -15,8 +15,8 @@ from app.many_to_many.entities import (
 """
 for many to many relation ship
 I would prefer appending it to the list would be much more better 
-IE: student.courses.append(course)
-or course.students.append(student)
+IE: student.courses.add(course)
+or course.students.add(student)
 
 even if i am creating a new one.
 
@@ -54,7 +54,7 @@ async def test_student_table_orm_maaping_works(db_session: AsyncSession):
 async def test_orm_mapping_works_by_just_appending(db_session: AsyncSession):
     student = StudentEntity(name="abel")
     course = CourseEntity(name="biology")
-    student.courses.append(course)
+    student.courses.add(course)
     db_session.add(student)
     await db_session.commit()
     await db_session.reset()
@@ -83,7 +83,7 @@ async def test_orm_mapping_works_by_just_appending(db_session: AsyncSession):
     assert db_student
     assert db_student
     assert db_student.courses
-    assert db_student.courses[0].name == "biology"
+    assert next(iter(db_student.courses)).name == "biology"
 
     await db_session.reset()
 
@@ -99,7 +99,7 @@ async def test_orm_mapping_works_by_just_appending(db_session: AsyncSession):
     assert db_course
     assert db_course.name == "biology"
     assert db_course.students
-    assert db_course.students[0].name == "abel"
+    assert next(iter(db_course.students)).name == "abel"
 
 
 @pytest.mark.asyncio
@@ -118,7 +118,6 @@ async def test_orm_mapping_works_by_just_using_the_relation(db_session: AsyncSes
     ]
     db_session.add(student)  # add the student
     db_session.add_all([bio, math, physics])  # add the courses
-    await db_session.flush()
     db_session.add_all(enrollments)  # add the student's relationship
 
     await db_session.commit()
@@ -150,7 +149,7 @@ async def test_orm_mapping_works_by_just_using_the_relation(db_session: AsyncSes
     assert db_course
     assert db_course.name == "math"
     assert db_course.students
-    assert db_course.students[0].name == "abel"
+    assert next(iter(db_course.students)).name == "abel"
 
     # fetch student abels registered courses
 
@@ -187,7 +186,6 @@ async def test_orm_mapping_works_by_deleting_rows(db_session: AsyncSession):
     ]
     db_session.add(student)  # add the student
     db_session.add_all([bio, math, physics])  # add the courses
-    await db_session.flush()
     db_session.add_all(enrollments)  # add the student's relationship
 
     await db_session.commit()
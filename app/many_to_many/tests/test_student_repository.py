@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.repository import track_compile_cache, warm_repositories
+from app.many_to_many.entities import CourseEntity, CourseTable, EnrollmentEntity, StudentEntity
+from app.many_to_many.repository import REPOSITORIES, CourseRepository, StudentRepository
+
+
+@pytest.mark.asyncio
+async def test_repositories_load_both_sides_of_the_enrollment(db_session: AsyncSession):
+    student = StudentEntity(name="abel")
+    course = CourseEntity(name="biology")
+    db_session.add_all([student, course])
+    db_session.add(EnrollmentEntity(student_id=student.id, course_id=course.id))
+    await db_session.commit()
+    await db_session.reset()
+
+    db_student = await StudentRepository(db_session).get_with_courses(student.id)
+    assert db_student
+    assert [c.name for c in db_student.courses] == ["biology"]
+
+    await db_session.reset()
+    db_course = await CourseRepository(db_session).get_with_students(course.id)
+    assert db_course
+    assert [s.name for s in db_course.students] == ["abel"]
+
+    assert await StudentRepository(db_session).get_with_courses(course.id) is None
+
+
+@pytest.mark.asyncio
+async def test_sync_enrollments_applies_only_the_difference(db_session: AsyncSession):
+    student = StudentEntity(name="abel")
+    math, bio, chem = (CourseEntity(name=name) for name in ("math", "biology", "chemistry"))
+    db_session.add_all([student, math, bio, chem])
+    db_session.add_all([EnrollmentEntity(student_id=student.id, course_id=course.id) for course in (math, bio)])
+    await db_session.commit()
+
+    repository = StudentRepository(db_session)
+    sync = await repository.sync_enrollments(student.id, [bio.id, chem.id, chem.id])
+    await db_session.commit()
+
+    assert (sync.added, sync.removed) == (1, 1)
+    db_student = await repository.get_with_courses(student.id)
+    assert db_student
+    assert sorted(c.name for c in db_student.courses) == ["biology", "chemistry"]
+    counts = await db_session.execute(select(CourseTable.c.name, CourseTable.c.student_count))
+    assert dict(counts.tuples().all()) == {"math": 0, "biology": 1, "chemistry": 1}
+
+    sync = await repository.sync_enrollments(student.id, [bio.id, chem.id])
+    assert (sync.added, sync.removed) == (0, 0)
+
+    sync = await repository.sync_enrollments(student.id, [])
+    await db_session.commit()
+    assert (sync.added, sync.removed) == (0, 2)
+    db_student = await repository.get_with_courses(student.id)
+    assert db_student
+    assert db_student.courses == set()
+
+
+@pytest.mark.asyncio
+async def test_warmed_statements_include_the_selectin_queries(db_session: AsyncSession):
+    student, course = StudentEntity(name="abel"), CourseEntity(name="biology")
+    db_session.add_all([student, course])
+    db_session.add(EnrollmentEntity(student_id=student.id, course_id=course.id))
+    await db_session.commit()
+    await db_session.reset()
+
+    stats = track_compile_cache(db_session.bind)
+    try:
+        await warm_repositories(db_session.bind, *REPOSITORIES)
+        stats.reset()
+
+        assert await StudentRepository(db_session).get_with_courses(student.id)
+        assert await CourseRepository(db_session).get_with_students(course.id)
+
+        assert (stats.hits, stats.misses) == (4, 0)  # each entity and its selectin query
+    finally:
+        stats.detach()
@@ -1,9 +1,11 @@
 import uuid
 from dataclasses import dataclass, field
 
-from sqlalchemy import Column, ForeignKey, String, Table, Uuid
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table, Uuid, text
 from sqlalchemy.orm import registry, relationship
 
+from app.lib.counter_cache import counter_cache, counter_property
+
 # Register the SQLAlchemy
 MapperRegistry = registry()
 
@@ -29,6 +31,7 @@ class SpeakerEntity:
     id: uuid.UUID = field(default_factory=uuid.uuid4)
     name: str
     talks: list["TalkAssociationEntity"] = field(default_factory=list)
+    talk_count: int = field(init=False)  # maintained by the database
 
 
 @dataclass(kw_only=True)
@@ -54,6 +57,7 @@ SpeakerTable = Table(
     MapperRegistry.metadata,
     Column("id", Uuid(as_uuid=True), primary_key=True, nullable=False),
     Column("name", String(100), nullable=False),
+    Column("talk_count", Integer, nullable=False, server_default=text("0")),
 )
 
 ConferenceTable = Table(
@@ -81,6 +85,8 @@ TalkAssociationTable = Table(
         nullable=False,
     ),
     Column("topic", String(100), nullable=False),
+    # the primary key covers lookups by speaker; this one covers lookups by conference
+    Index("ix_talk_association_conference_id", "conference_id"),
 )
 
 # ------------ Orm Mapping ------------
@@ -91,8 +97,10 @@ MapperRegistry.map_imperatively(
     properties={
         "id": SpeakerTable.c.id,
         "name": SpeakerTable.c.name,
+        "talk_count": counter_property(SpeakerTable.c.talk_count),
         "talks": relationship("TalkAssociationEntity", back_populates="speaker"),
     },
+    exclude_properties=[SpeakerTable.c.talk_count],
 )
 
 MapperRegistry.map_imperatively(
@@ -116,3 +124,11 @@ MapperRegistry.map_imperatively(
         "conference": relationship("ConferenceEntity"),
     },
 )
+
+# ------------ Counter Caches ------------
+
+# `speaker.talk_count` follows the `talk_association` rows of each speaker
+SpeakerTalkCount = counter_cache(
+    SpeakerEntity.talks,  # pyright: ignore[reportArgumentType]
+    SpeakerTable.c.talk_count,
+)
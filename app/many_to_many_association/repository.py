@@ -0,0 +1,34 @@
+"""Queries of the association-object example, built once with bound parameters."""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import selectinload
+
+from app.lib.repository import Prepared, Repository
+from app.many_to_many_association.entities import (
+    SpeakerEntity,
+    SpeakerTable,
+    TalkAssociationEntity,
+    TalkAssociationTable,
+)
+
+
+class SpeakerRepository(Repository):
+    with_talks = Prepared(
+        select(SpeakerEntity)
+        .options(
+            selectinload(SpeakerEntity.talks).selectinload(  # pyright: ignore[reportArgumentType]
+                TalkAssociationEntity.conference  # pyright: ignore[reportArgumentType]
+            )
+        )
+        .where(SpeakerTable.c.id == bindparam("speaker_id")),
+        # a speaker with a talk, so the conference follow-up runs too
+        {"speaker_id": select(TalkAssociationTable.c.speaker_id).limit(1)},
+    )
+
+    async def get_with_talks(self, speaker_id: uuid.UUID) -> SpeakerEntity | None:
+        return (await self.execute(self.with_talks, speaker_id=speaker_id)).scalar_one_or_none()
+
+
+REPOSITORIES: list[type[Repository]] = [SpeakerRepository]
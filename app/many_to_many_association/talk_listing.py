@@ -0,0 +1,274 @@
+"""Denormalised read model for a speaker's talks.
+
+Listing a speaker's talks through the ORM joins `talk_association`, then
+`selectinload`s talks and their conferences: three statements. The
+`speaker_talk_listing` materialized view holds one row per talk with the
+speaker name, conference name and topic; a listing page is one range scan of
+its unique index, which also lets it be refreshed `CONCURRENTLY` (readers are
+never blocked).
+
+The view is optional: importing this module adds it to the `create_all` /
+`drop_all` of `MapperRegistry.metadata`. It is refreshed explicitly, on a
+schedule, or after commits that touched speakers, conferences or talks
+(`TalkListingRefresher`); in between, reads may be stale.
+
+Writes to the source tables are seen two ways. `attach` follows ORM flushes of
+a session. `listen` also catches Core statements (`bulk_upsert`, `COPY`,
+`sync_enrollments`-style `INSERT ... SELECT`) and other processes: statement-level
+triggers on the three tables `NOTIFY` the `speaker_talk_listing` channel, which
+Postgres delivers once per committed transaction.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import DDL, Column, MetaData, String, Table, Uuid, bindparam, event, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.many_to_many_association.entities import (
+    ConferenceEntity,
+    MapperRegistry,
+    SpeakerEntity,
+    TalkAssociationEntity,
+)
+
+VIEW_NAME = "speaker_talk_listing"
+
+# longest wait between retries of a failing refresh, in seconds
+MAX_BACKOFF = 300.0
+
+logger = logging.getLogger(__name__)
+
+_CREATE_VIEW = f"""\
+CREATE MATERIALIZED VIEW {VIEW_NAME} AS
+SELECT t.speaker_id, s.name AS speaker_name, t.conference_id, c.name AS conference_name, t.topic
+FROM talk_association AS t
+JOIN speaker AS s ON s.id = t.speaker_id
+JOIN conference AS c ON c.id = t.conference_id"""  # noqa: S608
+
+# unique (required by REFRESH ... CONCURRENTLY) and in listing order
+_CREATE_INDEX = f"CREATE UNIQUE INDEX ux_{VIEW_NAME} ON {VIEW_NAME} (speaker_id, conference_name, conference_id)"
+
+_NOTIFY_FUNCTION = f"{VIEW_NAME}_notify"
+
+_CREATE_NOTIFY_FUNCTION = f"""\
+CREATE OR REPLACE FUNCTION {_NOTIFY_FUNCTION}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('{VIEW_NAME}', '');
+    RETURN NULL;
+END
+$$"""
+
+_SOURCE_TABLES = ("speaker", "conference", "talk_association")
+
+_CREATE_NOTIFY_TRIGGERS = [
+    f"CREATE TRIGGER {table}_{_NOTIFY_FUNCTION} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+    f"FOR EACH STATEMENT EXECUTE FUNCTION {_NOTIFY_FUNCTION}()"
+    for table in _SOURCE_TABLES
+]
+
+for ddl in (_CREATE_VIEW, _CREATE_INDEX, _CREATE_NOTIFY_FUNCTION, *_CREATE_NOTIFY_TRIGGERS):
+    event.listen(MapperRegistry.metadata, "after_create", DDL(ddl).execute_if(dialect="postgresql"))
+event.listen(
+    MapperRegistry.metadata,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {VIEW_NAME}").execute_if(dialect="postgresql"),
+)
+# the triggers go with their tables
+event.listen(
+    MapperRegistry.metadata,
+    "after_drop",
+    DDL(f"DROP FUNCTION IF EXISTS {_NOTIFY_FUNCTION}()").execute_if(dialect="postgresql"),
+)
+
+# The view's columns, for queries only; kept out of MapperRegistry.metadata so
+# create_all doesn't create it as a table.
+SpeakerTalkListingView = Table(
+    VIEW_NAME,
+    MetaData(),
+    Column("speaker_id", Uuid(as_uuid=True), primary_key=True),
+    Column("speaker_name", String(100), nullable=False),
+    Column("conference_id", Uuid(as_uuid=True), primary_key=True),
+    Column("conference_name", String(100), nullable=False),
+    Column("topic", String(100), nullable=False),
+)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class SpeakerTalkListing:
+    speaker_id: uuid.UUID
+    speaker_name: str
+    conference_id: uuid.UUID
+    conference_name: str
+    topic: str
+
+
+_LISTING = (
+    select(SpeakerTalkListingView)
+    .where(SpeakerTalkListingView.c.speaker_id == bindparam("speaker_id"))
+    .order_by(SpeakerTalkListingView.c.conference_name, SpeakerTalkListingView.c.conference_id)
+)
+
+
+async def speaker_talks(session: AsyncSession, speaker_id: uuid.UUID) -> list[SpeakerTalkListing]:
+    """A speaker's talks ordered by conference name, as of the last refresh."""
+
+    result = await session.execute(_LISTING, {"speaker_id": speaker_id})
+    return [SpeakerTalkListing(**row) for row in result.mappings()]
+
+
+async def refresh_speaker_talk_listing(
+    connection: AsyncSession | AsyncConnection,
+    *,
+    concurrently: bool = True,
+) -> None:
+    """Recompute the view; `concurrently` keeps it readable meanwhile but costs a diff."""
+
+    mode = "CONCURRENTLY " if concurrently else ""
+    await connection.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{VIEW_NAME}"))
+
+
+_SOURCES = (SpeakerEntity, ConferenceEntity, TalkAssociationEntity)
+_DIRTY_KEY = "speaker_talk_listing_dirty"
+
+
+class TalkListingRefresher:
+    """Background task refreshing the view every `interval` seconds and after relevant writes.
+
+    Writes are coalesced: after a request the task waits `debounce` seconds, so a
+    burst of commits costs one refresh. A failed refresh is logged and retried
+    after `backoff` seconds, doubling per consecutive failure up to `MAX_BACKOFF`.
+
+    Example:
+        refresher = TalkListingRefresher(session_factory, interval=300)
+        refresher.start()
+        await refresher.listen()  # refresh after commits touching talks, Core and other processes included
+        ...
+        await refresher.stop()
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        interval: float | None = 60.0,
+        debounce: float = 1.0,
+        backoff: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.debounce = debounce
+        self.backoff = backoff
+        self.refreshes = 0
+        self.failures = 0  # consecutive
+        self._requested = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._attached: list[Any] = []
+        self._listening: tuple[AsyncConnection, Any] | None = None  # connection, asyncpg connection
+
+    def request(self) -> None:
+        self._requested.set()
+
+    def start(self) -> asyncio.Task[None]:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="speaker-talk-listing-refresher")
+        return self._task
+
+    async def listen(self) -> None:
+        """Request a refresh after every commit that changed listing sources, whoever made it.
+
+        Holds a connection of the session factory's engine for `LISTEN` until `stop`.
+        """
+
+        if self._listening is not None:
+            return
+        bind = self.session_factory.kw["bind"]
+        engine = bind.engine if isinstance(bind, AsyncConnection) else bind
+        connection = await engine.connect()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        assert driver is not None
+        # asyncpg runs the callback on the event loop, between reads of the socket
+        await driver.add_listener(VIEW_NAME, self._notified)
+        self._listening = (connection, driver)
+
+    def _notified(self, *notification: Any) -> None:
+        self.request()
+
+    async def stop(self) -> None:
+        if self._listening is not None:
+            connection, driver = self._listening
+            self._listening = None
+            # UNLISTEN before the connection goes back to the pool
+            await driver.remove_listener(VIEW_NAME, self._notified)
+            await connection.close()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def refresh(self) -> None:
+        async with self.session_factory() as session:
+            await refresh_speaker_talk_listing(session)
+            await session.commit()
+        self.refreshes += 1
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._requested.wait(), self.interval)
+            if self._requested.is_set() and self.debounce:
+                await asyncio.sleep(self.debounce)
+            self._requested.clear()
+            try:
+                await self.refresh()
+            except Exception:
+                self.failures += 1
+                delay = min(self.backoff * 2 ** (self.failures - 1), MAX_BACKOFF)
+                logger.exception("refreshing %s failed, retrying in %.1fs", VIEW_NAME, delay)
+                await asyncio.sleep(delay)
+                self._requested.set()
+            else:
+                self.failures = 0
+
+    def attach(self, target: AsyncSession | Session | sessionmaker[Any] | type[Session]) -> None:
+        """Request a refresh after commits made through `target` that changed listing sources."""
+
+        if isinstance(target, AsyncSession):
+            target = target.sync_session
+        for name, listener in self._listeners():
+            event.listen(target, name, listener)
+        self._attached.append(target)
+
+    def detach(self) -> None:
+        for target in self._attached:
+            for name, listener in self._listeners():
+                event.remove(target, name, listener)
+        self._attached.clear()
+
+    def _listeners(self) -> list[tuple[str, Any]]:
+        return [
+            ("after_flush", self._after_flush),
+            ("after_commit", self._after_commit),
+            ("after_soft_rollback", self._after_soft_rollback),
+        ]
+
+    def _after_flush(self, session: Session, flush_context: Any) -> None:
+        changed = (*session.new, *session.dirty, *session.deleted)
+        if any(isinstance(obj, _SOURCES) for obj in changed):
+            session.info[_DIRTY_KEY] = True
+
+    def _after_commit(self, session: Session) -> None:
+        if session.info.pop(_DIRTY_KEY, False):
+            # after_commit runs inside the session's greenlet; only flag the loop
+            self.request()
+
+    def _after_soft_rollback(self, session: Session, previous_transaction: Any) -> None:
+        if previous_transaction.parent is None:
+            session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.instrumentation import query_budget
+from app.lib.reference_cache import ReferenceCache
+from app.many_to_many_association.entities import ConferenceEntity, SpeakerEntity, TalkAssociationEntity
+
+
+@pytest.fixture
+async def conferences(db_session: AsyncSession) -> ReferenceCache[ConferenceEntity]:
+    speaker = SpeakerEntity(name="abel")
+    pycon, europython = ConferenceEntity(name="PyCon"), ConferenceEntity(name="EuroPython")
+    db_session.add_all([speaker, pycon, europython])
+    await db_session.flush()
+    db_session.add_all(
+        [
+            TalkAssociationEntity(speaker_id=speaker.id, conference_id=pycon.id, topic="Python"),
+            TalkAssociationEntity(speaker_id=speaker.id, conference_id=europython.id, topic="asyncio"),
+        ]
+    )
+    await db_session.commit()
+    await db_session.reset()
+
+    cache = ReferenceCache(ConferenceEntity, async_sessionmaker(db_session.bind, expire_on_commit=False))
+    await cache.refresh()
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_relationship_is_served_from_the_snapshot(
+    db_session: AsyncSession,
+    conferences: ReferenceCache[ConferenceEntity],
+):
+    talks = (await db_session.scalars(select(TalkAssociationEntity))).all()
+
+    with query_budget(0):
+        conferences.populate(db_session, TalkAssociationEntity.conference, talks)
+
+    assert {talk.topic: talk.conference.name for talk in talks} == {"Python": "PyCon", "asyncio": "EuroPython"}
+    # session-local copies, the snapshot instances stay detached
+    assert all(talk.conference in db_session for talk in talks)
+    cached = {id(conference) for conference in conferences.snapshot.rows.values()}
+    assert all(id(talk.conference) not in cached for talk in talks)
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_in_a_new_snapshot(
+    db_session: AsyncSession,
+    conferences: ReferenceCache[ConferenceEntity],
+):
+    before = conferences.snapshot
+    with pytest.raises(TypeError):
+        before.rows["new"] = ConferenceEntity(name="nope")  # type: ignore[index]
+
+    db_session.add(ConferenceEntity(name="DjangoCon"))
+    await db_session.commit()
+    after = await conferences.refresh()
+
+    assert (len(before), before.version) == (2, 1)
+    assert (len(after), after.version) == (3, 2)
+    assert conferences.snapshot is after
+
+    conference_id = next(iter(after.rows))
+    conference = conferences.get(db_session, conference_id)
+    assert conference
+    assert conference.id == conference_id
+    assert conferences.get(db_session, None) is None
+
+    with pytest.raises(ValueError, match="many-to-one"):
+        conferences.populate(db_session, TalkAssociationEntity.speaker, [])
+
+
+@pytest.mark.asyncio
+async def test_attached_cache_serves_lazy_loads(
+    db_session: AsyncSession,
+    conferences: ReferenceCache[ConferenceEntity],
+):
+    conferences.attach(db_session)
+    try:
+        talks = (await db_session.scalars(select(TalkAssociationEntity))).all()
+
+        with query_budget(0):
+            names = {talk.topic: talk.conference.name for talk in talks}
+
+        assert names == {"Python": "PyCon", "asyncio": "EuroPython"}
+
+        # expired like expire_on_commit=True would; the next transaction merges fresh copies
+        db_session.expire_all()
+        await db_session.commit()
+        talks = (await db_session.scalars(select(TalkAssociationEntity))).all()
+        with query_budget(0):
+            assert {talk.conference.name for talk in talks} == {"PyCon", "EuroPython"}
+    finally:
+        conferences.detach()
+
+
+@pytest.mark.asyncio
+async def test_attached_cache_merges_only_the_rows_looked_up(
+    db_session: AsyncSession,
+    conferences: ReferenceCache[ConferenceEntity],
+):
+    conferences.attach(db_session)
+    try:
+        (speaker,) = (await db_session.scalars(select(SpeakerEntity))).all()
+        assert not any(isinstance(instance, ConferenceEntity) for instance in db_session)
+
+        conference_id = next(iter(conferences.snapshot.rows))
+        with query_budget(0):
+            conference = await db_session.get(ConferenceEntity, conference_id)
+        assert conference
+        assert [instance for instance in db_session if isinstance(instance, ConferenceEntity)] == [conference]
+        assert speaker.name == "abel"
+    finally:
+        conferences.detach()
+
+
+@pytest.mark.asyncio
+async def test_committed_write_invalidates_the_snapshot(
+    db_session: AsyncSession,
+    conferences: ReferenceCache[ConferenceEntity],
+):
+    conferences.attach(db_session)
+    try:
+        talk = await db_session.scalar(select(TalkAssociationEntity).where(TalkAssociationEntity.topic == "Python"))
+        assert talk
+        talk.conference.name = "PyCon US"
+        await db_session.rollback()
+        assert conferences.snapshot.version == 1  # nothing was written
+
+        talk = await db_session.scalar(select(TalkAssociationEntity).where(TalkAssociationEntity.topic == "Python"))
+        assert talk
+        talk.conference.name = "PyCon US"
+        conference_id = talk.conference_id
+        await db_session.commit()
+        with pytest.raises(RuntimeError, match="await refresh"):
+            conferences.snapshot  # noqa: B018
+
+        db_session.expunge_all()
+        with query_budget(1):
+            conference = await db_session.get(ConferenceEntity, conference_id)
+        assert conference
+        assert conference.name == "PyCon US"
+
+        await conferences.refresh()
+        assert conferences.snapshot.rows[conference_id].name == "PyCon US"
+    finally:
+        conferences.detach()
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.lib.bulk import bulk_upsert
+from app.many_to_many_association.entities import (
+    ConferenceEntity,
+    SpeakerEntity,
+    TalkAssociationEntity,
+    TalkAssociationTable,
+)
+from app.many_to_many_association.talk_listing import (
+    SpeakerTalkListing,
+    TalkListingRefresher,
+    refresh_speaker_talk_listing,
+    speaker_talks,
+)
+
+
+@pytest.fixture
+async def speaker(db_session: AsyncSession) -> SpeakerEntity:
+    speaker = SpeakerEntity(name="abel")
+    pycon, europython = ConferenceEntity(name="PyCon"), ConferenceEntity(name="EuroPython")
+    db_session.add_all([speaker, pycon, europython])
+    await db_session.flush()
+    db_session.add_all(
+        [
+            TalkAssociationEntity(speaker_id=speaker.id, conference_id=pycon.id, topic="Python"),
+            TalkAssociationEntity(speaker_id=speaker.id, conference_id=europython.id, topic="asyncio"),
+        ]
+    )
+    await db_session.commit()
+    return speaker
+
+
+@pytest.mark.asyncio
+async def test_listing_is_one_query_over_the_view(db_session: AsyncSession, speaker: SpeakerEntity):
+    await refresh_speaker_talk_listing(db_session, concurrently=False)
+    await db_session.commit()
+
+    listing = await speaker_talks(db_session, speaker.id)
+
+    assert [(row.conference_name, row.topic) for row in listing] == [("EuroPython", "asyncio"), ("PyCon", "Python")]
+    assert all(isinstance(row, SpeakerTalkListing) and row.speaker_name == "abel" for row in listing)
+    with pytest.raises(AttributeError):
+        listing[0].topic = "changed"  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+@pytest.mark.db_truncate  # the refresh runs on its own connection, after a real commit
+async def test_refresher_follows_writes(db_session: AsyncSession, speaker: SpeakerEntity):
+    refresher = TalkListingRefresher(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        interval=None,
+        debounce=0,
+    )
+    refresher.attach(db_session)
+    refresher.start()
+    try:
+        conference = ConferenceEntity(name="DjangoCon")
+        db_session.add(conference)
+        await db_session.flush()
+        db_session.add(TalkAssociationEntity(speaker_id=speaker.id, conference_id=conference.id, topic="ORMs"))
+        await db_session.commit()
+
+        for _ in range(100):
+            if refresher.refreshes:
+                break
+            await asyncio.sleep(0.01)
+
+        listing = await speaker_talks(db_session, speaker.id)
+        assert "ORMs" in {row.topic for row in listing}
+        await db_session.commit()
+    finally:
+        refresher.detach()
+        await refresher.stop()
+
+
+@pytest.mark.asyncio
+async def test_refresher_survives_failing_refreshes(db_session: AsyncSession, caplog: pytest.LogCaptureFixture):
+    refresher = TalkListingRefresher(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        interval=None,
+        debounce=0,
+        backoff=0.01,
+    )
+    caplog.set_level(logging.ERROR, logger="app.many_to_many_association.talk_listing")
+    attempts = 0
+
+    async def flaky_refresh() -> None:
+        nonlocal attempts
+        attempts += 1
+        if attempts <= 2:
+            raise RuntimeError("database went away")
+        refresher.refreshes += 1
+
+    refresher.refresh = flaky_refresh  # type: ignore[method-assign]
+    refresher.request()
+    task = refresher.start()
+    try:
+        for _ in range(100):
+            if refresher.refreshes:
+                break
+            await asyncio.sleep(0.01)
+
+        assert not task.done()
+        assert (attempts, refresher.refreshes, refresher.failures) == (3, 1, 0)
+        errors = [record for record in caplog.records if record.levelname == "ERROR"]
+        assert [record.getMessage() for record in errors] == [
+            "refreshing speaker_talk_listing failed, retrying in 0.0s",
+            "refreshing speaker_talk_listing failed, retrying in 0.0s",
+        ]
+    finally:
+        await refresher.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.db_truncate  # notifications are only delivered on a real commit
+async def test_refresher_listens_for_core_writes(db_session: AsyncSession, speaker: SpeakerEntity):
+    refresher = TalkListingRefresher(
+        async_sessionmaker(db_session.bind, expire_on_commit=False),
+        interval=None,
+        debounce=0,
+    )
+    refresher.start()
+    await refresher.listen()
+    try:
+        conference = ConferenceEntity(name="DjangoCon")
+        db_session.add(conference)
+        await db_session.commit()
+        for _ in range(100):
+            if refresher.refreshes:
+                break
+            await asyncio.sleep(0.01)
+        assert refresher.refreshes == 1  # an ORM write, but no session is attached
+
+        # a Core upsert the ORM never sees
+        talk = {"speaker_id": speaker.id, "conference_id": conference.id, "topic": "ORMs"}
+        await bulk_upsert(db_session, TalkAssociationTable, [talk])
+        await db_session.commit()
+        for _ in range(100):
+            if refresher.refreshes == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        listing = await speaker_talks(db_session, speaker.id)
+        assert "ORMs" in {row.topic for row in listing}
+        await db_session.commit()
+    finally:
+        await refresher.stop()
@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.bulk import bulk_upsert
+from app.many_to_many_association.entities import (
+    ConferenceEntity,
+    SpeakerEntity,
+    SpeakerTable,
+    TalkAssociationEntity,
+    TalkAssociationTable,
+)
+
+
+def schedule_row(speaker_id, conference_id, topic, speaker="abel", conference="PyCon"):
+    return {
+        "speaker_id": speaker_id,
+        "speaker_name": speaker,
+        "conference_id": conference_id,
+        "conference_name": conference,
+        "topic": topic,
+    }
+
+
+@pytest.mark.asyncio
+async def test_upsert_creates_parents_then_updates_topics(db_session: AsyncSession):
+    abel, bella, pycon = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    parents = {
+        ConferenceEntity: lambda row: {"id": row["conference_id"], "name": row["conference_name"]},
+        SpeakerEntity: lambda row: {"id": row["speaker_id"], "name": row["speaker_name"]},
+    }
+    schedule = [
+        schedule_row(abel, pycon, "Python"),
+        schedule_row(abel, pycon, "asyncio"),  # same key in the same batch: the last one wins
+        schedule_row(bella, pycon, "ORMs", speaker="bella"),
+    ]
+
+    report = await bulk_upsert(db_session, TalkAssociationEntity, schedule, parents=parents, batch_size=2)
+    await db_session.commit()
+
+    assert (report.inserted, report.updated, report.unchanged, report.duplicates) == (2, 0, 0, 1)
+    assert report.parents_created == {"speaker": 2, "conference": 1}
+    topics = await db_session.execute(select(TalkAssociationTable.c.speaker_id, TalkAssociationTable.c.topic))
+    assert dict(topics.tuples().all()) == {abel: "asyncio", bella: "ORMs"}
+
+    report = await bulk_upsert(
+        db_session,
+        TalkAssociationEntity,
+        [schedule_row(abel, pycon, "asyncio"), schedule_row(bella, pycon, "SQL", speaker="bella")],
+        parents=parents,
+    )
+    await db_session.commit()
+
+    assert (report.inserted, report.updated, report.unchanged) == (0, 1, 1)
+    assert report.parents_created == {"speaker": 0, "conference": 0}
+    # counter cache triggers see inserts only, not the conflict updates
+    talk_counts = await db_session.execute(select(SpeakerTable.c.id, SpeakerTable.c.talk_count))
+    assert dict(talk_counts.tuples().all()) == {abel: 1, bella: 1}
@@ -5,7 +5,7 @@ from typing import Any
 
 from pydantic import Field, TypeAdapter
 from pydantic.dataclasses import dataclass
-from sqlalchemy import UUID, Column, Table
+from sqlalchemy import UUID, Column, Index, Table
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import registry
 from sqlalchemy.types import TypeDecorator
@@ -83,6 +83,12 @@ BorrowerTable = Table(
     Column("info", PydanticSerializer(BorrowerInfo), nullable=False),
 )
 
+# filters must compare `info ->> 'name'` (this expression) for the planner to pick the index;
+# `info["name"] == value` compares jsonb and can't use it
+borrower_name = BorrowerTable.c.info["name"].astext
+
+Index("ix_borrower_info_name", borrower_name)
+
 MapperRegistry.map_imperatively(
     BorrowerEntity,
     BorrowerTable,
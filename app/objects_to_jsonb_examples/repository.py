@@ -0,0 +1,32 @@
+"""Queries of the JSONB example, built once with bound parameters.
+
+`by_name` filters on `borrower_name` (`info ->> 'name'`), the expression
+`ix_borrower_info_name` is built on.
+"""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+
+from app.lib.repository import Prepared, Repository
+from app.objects_to_jsonb_examples.entities import BorrowerEntity, BorrowerTable, borrower_name
+
+
+class BorrowerRepository(Repository):
+    by_id = Prepared(
+        select(BorrowerEntity).where(BorrowerTable.c.id == bindparam("borrower_id")),
+        {"borrower_id": select(BorrowerTable.c.id).limit(1)},
+    )
+    by_name = Prepared(
+        select(BorrowerEntity).where(borrower_name == bindparam("name")),
+        {"name": ""},
+    )
+
+    async def get(self, borrower_id: uuid.UUID) -> BorrowerEntity | None:
+        return (await self.execute(self.by_id, borrower_id=borrower_id)).scalar_one_or_none()
+
+    async def find_by_name(self, name: str) -> list[BorrowerEntity]:
+        return list((await self.execute(self.by_name, name=name)).scalars().all())
+
+
+REPOSITORIES: list[type[Repository]] = [BorrowerRepository]
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.repository import track_compile_cache, warm_repositories
+from app.objects_to_jsonb_examples.entities import BorrowerEntity, BorrowerInfo
+from app.objects_to_jsonb_examples.repository import REPOSITORIES, BorrowerRepository
+
+
+@pytest.mark.asyncio
+async def test_repository_finds_borrowers_by_id_and_name(db_session: AsyncSession):
+    abel, bella = (
+        BorrowerEntity(borrower_info=BorrowerInfo(id=i, name=name)) for i, name in enumerate(["abel", "bella"])
+    )
+    db_session.add_all([abel, bella])
+    await db_session.commit()
+    await db_session.reset()
+
+    stats = track_compile_cache(db_session.bind)
+    try:
+        await warm_repositories(db_session.bind, *REPOSITORIES)
+        stats.reset()
+
+        repository = BorrowerRepository(db_session)
+        borrower = await repository.get(abel.id)
+        assert borrower
+        assert borrower.borrower_info.name == "abel"
+        assert [b.id for b in await repository.find_by_name("bella")] == [bella.id]
+
+        assert (stats.hits, stats.misses) == (2, 0)
+    finally:
+        stats.detach()
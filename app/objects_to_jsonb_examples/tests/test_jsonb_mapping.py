@@ -4,7 +4,14 @@ import pytest
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.objects_to_jsonb_examples.entities import BorrowerAdress, BorrowerEntity, BorrowerInfo, BorrowerTable
+from app.db.explain import PlanRegressionError, assert_uses_index
+from app.objects_to_jsonb_examples.entities import (
+    BorrowerAdress,
+    BorrowerEntity,
+    BorrowerInfo,
+    BorrowerTable,
+    borrower_name,
+)
 
 
 @pytest.mark.asyncio
@@ -74,3 +81,14 @@ async def test_update_by_name(db_session: AsyncSession):
     result = query.scalars().first()
     assert result is not None
     assert result.borrower_info.name == new_name
+
+
+@pytest.mark.asyncio
+async def test_name_lookup_uses_the_expression_index(db_session: AsyncSession):
+    await assert_uses_index(db_session, select(BorrowerEntity).where(borrower_name == "bella"), "ix_borrower_info_name")
+
+    # jsonb equality on info -> 'name' doesn't match the indexed expression
+    with pytest.raises(PlanRegressionError, match="ix_borrower_info_name"):
+        await assert_uses_index(
+            db_session, select(BorrowerEntity).where(BorrowerTable.c.info["name"] == "bella"), "ix_borrower_info_name"
+        )
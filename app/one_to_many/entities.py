@@ -1,9 +1,12 @@
 import uuid
 from dataclasses import dataclass, field
 
-from sqlalchemy import UUID, Column, ForeignKey, String, Table
+from sqlalchemy import UUID, Column, ForeignKey, Index, Integer, String, Table, text
 from sqlalchemy.orm import Relationship, registry, relationship
 
+from app.lib.counter_cache import counter_cache, counter_property
+from app.lib.projections import projection
+
 # Register the SQLAlchemy ORM
 MapperRegistry = registry()
 
@@ -28,6 +31,7 @@ class PublisherEntity:
     books: "list[BookEntity]" = field(
         init=False,
     )  # make it an empty list if it's not fetched
+    book_count: int = field(init=False)  # maintained by the database, see the counter caches below
 
 
 @dataclass(kw_only=True)
@@ -57,6 +61,7 @@ PublisherTable = Table(
         index=True,
     ),
     Column("name", String, nullable=False),
+    Column("book_count", Integer, nullable=False, server_default=text("0")),
 )
 
 # Define the `profile` table
@@ -80,6 +85,14 @@ BookTable = Table(
     ),  # publisher is a must in this case
 )
 
+# keyset pagination of a publisher's books walks this index in (name, id) order
+Index(
+    "ix_book_publisher_id_name_id",
+    BookTable.c.publisher_id,
+    BookTable.c.name,
+    BookTable.c.id,
+)
+
 # ------------ Mappings ------------
 
 # Map the PublisherEntity class to the user table
@@ -89,6 +102,7 @@ MapperRegistry.map_imperatively(
     properties={
         "id": PublisherTable.c.id,
         "name": PublisherTable.c.name,
+        "book_count": counter_property(PublisherTable.c.book_count),
         "books": Relationship(
             BookEntity,
             back_populates="publisher",
@@ -96,6 +110,7 @@ MapperRegistry.map_imperatively(
             passive_deletes=True,
         ),
     },
+    exclude_properties=[PublisherTable.c.book_count],
 )
 
 # Map the BookEntitiy class to the profile table
@@ -112,3 +127,17 @@ MapperRegistry.map_imperatively(
         ),
     },
 )
+
+# ------------ Counter Caches ------------
+
+# `publisher.book_count` follows inserts/deletes/moves of books, bulk ones included
+PublisherBookCount = counter_cache(
+    PublisherEntity.books,  # pyright: ignore[reportArgumentType]
+    PublisherTable.c.book_count,
+)
+
+# ------------ Read Models ------------
+
+# Slotted, read-only snapshots for bulk reads; mapped classes can't use `slots=True`.
+PublisherRow = projection(PublisherEntity)
+BookRow = projection(BookEntity)
@@ -0,0 +1,90 @@
+"""Keyset pagination over `PublisherEntity.books`.
+
+`selectinload(PublisherEntity.books)` pulls a publisher's whole catalogue,
+which is hundreds of thousands of rows for the big ones. `PublisherBooks`
+walks the collection page by page in (name, id) order using
+`ix_book_publisher_id_name_id`, so each page costs one index range scan
+however deep into the collection it is.
+"""
+
+import base64
+import json
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.one_to_many.entities import BookEntity, BookTable, PublisherTable
+
+
+@dataclass(frozen=True, slots=True)
+class BookCursor:
+    """Position after the last book of a page."""
+
+    name: str
+    id: uuid.UUID
+
+    def encode(self) -> str:
+        payload = json.dumps([self.name, str(self.id)]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "BookCursor":
+        name, id_ = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return cls(name=name, id=uuid.UUID(id_))
+
+
+@dataclass(kw_only=True)
+class BookPage:
+    books: list[BookEntity]
+    next_cursor: BookCursor | None  # None on the last page
+
+
+class PublisherBooks:
+    """Paginated view of one publisher's books.
+
+    Example:
+        books = PublisherBooks(session, publisher.id, page_size=500)
+        total = await books.count()
+        async for book in books:
+            ...
+    """
+
+    def __init__(self, session: AsyncSession, publisher_id: uuid.UUID, *, page_size: int = 100):
+        self.session = session
+        self.publisher_id = publisher_id
+        self.page_size = page_size
+
+    async def count(self) -> int:
+        # the `book_count` counter cache, no COUNT(*) over the books
+        stmt = select(PublisherTable.c.book_count).where(PublisherTable.c.id == self.publisher_id)
+        return (await self.session.execute(stmt)).scalar_one_or_none() or 0
+
+    async def page(self, after: BookCursor | None = None) -> BookPage:
+        stmt = select(BookEntity).where(BookTable.c.publisher_id == self.publisher_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(BookTable.c.name, BookTable.c.id) > tuple_(after.name, after.id))
+        # one extra row tells us whether there is a next page
+        stmt = stmt.order_by(BookTable.c.name, BookTable.c.id).limit(self.page_size + 1)
+
+        books = list((await self.session.scalars(stmt)).all())
+        if len(books) <= self.page_size:
+            return BookPage(books=books, next_cursor=None)
+        books = books[: self.page_size]
+        last = books[-1]
+        return BookPage(books=books, next_cursor=BookCursor(name=last.name, id=last.id))
+
+    async def pages(self, after: BookCursor | None = None) -> AsyncIterator[BookPage]:
+        while True:
+            page = await self.page(after)
+            yield page
+            if page.next_cursor is None:
+                return
+            after = page.next_cursor
+
+    async def __aiter__(self) -> AsyncIterator[BookEntity]:
+        async for page in self.pages():
+            for book in page.books:
+                yield book
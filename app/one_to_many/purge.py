@@ -0,0 +1,104 @@
+"""Batched purge of a publisher and its books.
+
+Deleting a big publisher relies on `ON DELETE CASCADE` to remove every book in
+one statement, i.e. one long transaction holding row locks and one burst of WAL.
+`PublisherPurge` deletes the books in bounded batches, each in its own short
+transaction, optionally pausing between them, and removes the publisher last.
+
+All state lives in the database, so a purge that was interrupted (or stopped
+with `max_batches`) is resumed by simply running it again.
+"""
+
+import asyncio
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.one_to_many.entities import BookTable, PublisherTable
+
+
+@dataclass(kw_only=True)
+class PurgeProgress:
+    publisher_id: uuid.UUID
+    books_deleted: int = 0
+    batches: int = 0
+    publisher_deleted: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.publisher_deleted
+
+
+class PublisherPurge:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher_id: uuid.UUID,
+        *,
+        batch_size: int = 1_000,
+        pause: float = 0.0,
+        on_progress: Callable[[PurgeProgress], None] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.publisher_id = publisher_id
+        self.batch_size = batch_size
+        self.pause = pause
+        self.on_progress = on_progress
+
+    async def run(
+        self,
+        progress: PurgeProgress | None = None,
+        *,
+        max_batches: int | None = None,
+    ) -> PurgeProgress:
+        """Delete books batch by batch, then the publisher.
+
+        Args:
+            progress (PurgeProgress | None): Progress of an earlier run to keep counting from
+            max_batches (int | None): Stop after this many book batches, leaving the publisher in place
+
+        Returns:
+            PurgeProgress: Where the purge got to; `done` once the publisher is gone
+        """
+
+        progress = progress or PurgeProgress(publisher_id=self.publisher_id)
+        batches_this_run = 0
+
+        while max_batches is None or batches_this_run < max_batches:
+            deleted = await self._delete_book_batch()
+            if deleted == 0:
+                break
+            progress.books_deleted += deleted
+            progress.batches += 1
+            batches_this_run += 1
+            self._report(progress)
+            if self.pause:
+                await asyncio.sleep(self.pause)
+        else:
+            return progress
+
+        async with self.session_factory() as session:
+            await session.execute(delete(PublisherTable).where(PublisherTable.c.id == self.publisher_id))
+            await session.commit()
+        progress.publisher_deleted = True
+        self._report(progress)
+        return progress
+
+    async def _delete_book_batch(self) -> int:
+        batch = (
+            select(BookTable.c.id)
+            .where(BookTable.c.publisher_id == self.publisher_id)
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as session:
+            result = await session.execute(delete(BookTable).where(BookTable.c.id.in_(batch)))
+            await session.commit()
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
+    def _report(self, progress: PurgeProgress) -> None:
+        if self.on_progress is not None:
+            self.on_progress(progress)
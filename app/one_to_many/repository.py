@@ -0,0 +1,43 @@
+"""Queries of the one-to-many example, built once with bound parameters."""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import selectinload
+
+from app.lib.repository import Prepared, Repository
+from app.one_to_many.entities import BookEntity, BookTable, PublisherEntity, PublisherTable
+
+
+class PublisherRepository(Repository):
+    with_books = Prepared(
+        select(PublisherEntity)
+        .options(selectinload(PublisherEntity.books))  # pyright: ignore[reportArgumentType]
+        .where(PublisherTable.c.id == bindparam("publisher_id")),
+        {"publisher_id": select(PublisherTable.c.id).limit(1)},
+    )
+    by_name = Prepared(
+        select(PublisherEntity).where(PublisherTable.c.name == bindparam("name")),
+        {"name": ""},
+    )
+
+    async def get_with_books(self, publisher_id: uuid.UUID) -> PublisherEntity | None:
+        return (await self.execute(self.with_books, publisher_id=publisher_id)).scalar_one_or_none()
+
+    async def find_by_name(self, name: str) -> list[PublisherEntity]:
+        return list((await self.execute(self.by_name, name=name)).scalars().all())
+
+
+class BookRepository(Repository):
+    with_publisher = Prepared(
+        select(BookEntity)
+        .options(selectinload(BookEntity.publisher))  # pyright: ignore[reportArgumentType]
+        .where(BookTable.c.id == bindparam("book_id")),
+        {"book_id": select(BookTable.c.id).where(BookTable.c.publisher_id.is_not(None)).limit(1)},
+    )
+
+    async def get_with_publisher(self, book_id: uuid.UUID) -> BookEntity | None:
+        return (await self.execute(self.with_publisher, book_id=book_id)).scalar_one_or_none()
+
+
+REPOSITORIES: list[type[Repository]] = [PublisherRepository, BookRepository]
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.dataloader import RelationshipLoader
+from app.one_to_many.entities import BookEntity, PublisherEntity
+
+
+@pytest.mark.asyncio
+async def test_loader_batches_many_to_one_and_one_to_many(db_session: AsyncSession):
+    abel, bella = PublisherEntity(name="abel"), PublisherEntity(name="bella")
+    db_session.add_all([abel, bella])
+    await db_session.flush()
+    db_session.add_all([BookEntity(name=f"book-{i}", publisher_id=(abel if i % 2 else bella).id) for i in range(6)])
+    await db_session.commit()
+    await db_session.reset()
+
+    books = list((await db_session.scalars(select(BookEntity))).all())
+    loader = RelationshipLoader(db_session, max_batch_size=1)
+
+    publishers = await loader.load_many(BookEntity.publisher, books)
+
+    assert loader.queries == 2  # two distinct publishers, one per batch
+    assert {p.name for p in publishers} == {"abel", "bella"}
+    assert all(book.publisher is publisher for book, publisher in zip(books, publishers, strict=True))
+
+    catalogues = await loader.load_many(PublisherEntity.books, {p.id: p for p in publishers}.values())
+    assert sorted(len(books) for books in catalogues) == [3, 3]
+
+
+@pytest.mark.asyncio
+async def test_loader_recovers_from_a_failed_dispatch(db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch):
+    publisher = PublisherEntity(name="abel")
+    db_session.add(publisher)
+    await db_session.flush()
+    db_session.add(BookEntity(name="book", publisher_id=publisher.id))
+    await db_session.commit()
+    await db_session.reset()
+
+    book = await db_session.scalar(select(BookEntity))
+    loader = RelationshipLoader(db_session)
+
+    async def broken(*args):
+        raise RuntimeError("boom")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(loader, "_load_batch", broken)
+        with pytest.raises(RuntimeError, match="boom"):
+            await asyncio.wait_for(loader.load(BookEntity.publisher, book), timeout=5)
+
+    # the failure isn't cached and the loader dispatches again
+    loaded = await asyncio.wait_for(loader.load(BookEntity.publisher, book), timeout=5)
+    assert loaded.name == "abel"
+    assert loader.queries == 1
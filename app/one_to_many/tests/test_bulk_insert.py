@@ -0,0 +1,53 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.bulk import bulk_insert, bulk_insert_many, bulk_upsert
+from app.one_to_many.entities import BookEntity, BookTable, PublisherEntity, PublisherTable
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["insert", "copy"])
+async def test_bulk_insert_many_writes_parents_first(db_session: AsyncSession, method):
+    publishers = [PublisherEntity(name=f"publisher-{i}") for i in range(3)]
+    books = (BookEntity(name=f"book-{i}", publisher_id=publishers[i % 3].id) for i in range(25))
+
+    # children listed first on purpose, the FK order is worked out from the tables
+    reports = await bulk_insert_many(
+        db_session,
+        {BookEntity: books, PublisherEntity: publishers},
+        batch_size=10,
+        method=method,
+    )
+    await db_session.commit()
+
+    assert [(report.table, report.rows) for report in reports] == [("publisher", 3), ("book", 25)]
+    assert all(report.rows_per_second > 0 for report in reports)
+
+    book_count = (await db_session.execute(select(func.count()).select_from(BookTable))).scalar_one()
+    assert book_count == 25
+    # bulk writes bypass the unit of work, nothing lands in the identity map
+    assert not db_session.identity_map
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["insert", "copy"])
+async def test_bulk_insert_accepts_dicts_and_fills_defaults(db_session: AsyncSession, method):
+    report = await bulk_insert(db_session, PublisherTable, [{"name": "abel"}, {"name": "bella"}], method=method)
+    await db_session.commit()
+
+    assert report.rows == 2
+    rows = (await db_session.execute(select(PublisherTable.c.id, PublisherTable.c.name))).all()
+    assert sorted(name for _, name in rows) == ["abel", "bella"]
+    assert all(isinstance(id_, uuid.UUID) for id_, _ in rows)
+
+
+@pytest.mark.asyncio
+async def test_copy_runs_inside_the_session_transaction(db_session: AsyncSession):
+    await bulk_insert(db_session, PublisherEntity, [PublisherEntity(name="abel")], method="copy")
+    await db_session.rollback()
+
+    count = (await db_session.execute(select(func.count()).select_from(PublisherTable))).scalar_one()
+    assert count == 0
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.bulk import bulk_insert
+from app.lib.counter_cache import reconcile_counter_caches
+from app.one_to_many.entities import (
+    BookEntity,
+    BookTable,
+    PublisherBookCount,
+    PublisherEntity,
+    PublisherTable,
+)
+
+
+async def book_counts(session: AsyncSession) -> dict[str, int]:
+    rows = await session.execute(select(PublisherTable.c.name, PublisherTable.c.book_count))
+    return dict(rows.tuples().all())
+
+
+@pytest.mark.asyncio
+async def test_book_count_follows_writes(db_session: AsyncSession):
+    abel = PublisherEntity(name="abel")
+    bella = PublisherEntity(name="bella")
+    db_session.add_all([abel, bella])
+    await db_session.flush()
+    books = [BookEntity(name=f"book-{i}", publisher_id=abel.id) for i in range(3)]
+    db_session.add_all(books)
+    await db_session.commit()
+    assert await book_counts(db_session) == {"abel": 3, "bella": 0}
+
+    # bulk COPY bypasses the unit of work but not the triggers
+    await bulk_insert(
+        db_session,
+        BookEntity,
+        [BookEntity(name=f"bulk-{i}", publisher_id=bella.id) for i in range(4)],
+        method="copy",
+    )
+    # moving a book between publishers
+    await db_session.execute(update(BookTable).where(BookTable.c.id == books[0].id).values(publisher_id=bella.id))
+    await db_session.execute(delete(BookTable).where(BookTable.c.id == books[1].id))
+    await db_session.commit()
+
+    assert await book_counts(db_session) == {"abel": 1, "bella": 5}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_drift(db_session: AsyncSession):
+    publisher = PublisherEntity(name="abel")
+    db_session.add(publisher)
+    await db_session.flush()
+    db_session.add_all([BookEntity(name=f"book-{i}", publisher_id=publisher.id) for i in range(2)])
+    await db_session.commit()
+
+    await db_session.execute(update(PublisherTable).values(book_count=42))
+    fixed = await reconcile_counter_caches(db_session, PublisherBookCount)
+    await db_session.commit()
+
+    assert fixed == {PublisherBookCount.name: 1}
+    assert await book_counts(db_session) == {"abel": 2}
+    assert await PublisherBookCount.reconcile(db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_book_count_is_never_written_by_a_flush(db_session: AsyncSession):
+    publisher = PublisherEntity(name="abel")
+    db_session.add(publisher)
+    await db_session.flush()
+    db_session.add(BookEntity(name="book", publisher_id=publisher.id))
+    await db_session.flush()
+
+    # the triggers counted the book; the ORM neither inserted a default nor writes the stale value back
+    publisher.name = "abel sr."
+    publisher.book_count = 42
+    await db_session.commit()
+
+    assert await book_counts(db_session) == {"abel sr.": 1}
+    await db_session.refresh(publisher)
+    assert publisher.book_count == 1
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.relationships import count, exists, exists_many
+from app.one_to_many.entities import BookEntity, PublisherEntity
+
+
+@pytest.mark.asyncio
+async def test_publisher_book_checks_without_loading_books(db_session: AsyncSession):
+    abel, bella = PublisherEntity(name="abel"), PublisherEntity(name="bella")
+    db_session.add_all([abel, bella])
+    await db_session.flush()
+    book = BookEntity(name="book", publisher_id=abel.id)
+    db_session.add_all([book, BookEntity(name="other", publisher_id=abel.id)])
+    await db_session.commit()
+    await db_session.reset()
+
+    assert await exists(db_session, PublisherEntity.books, abel.id)
+    assert await exists(db_session, PublisherEntity.books, abel.id, book.id)
+    assert not await exists(db_session, PublisherEntity.books, bella.id, book.id)
+    assert await exists_many(db_session, PublisherEntity.books, [abel.id, bella.id]) == {abel.id: True, bella.id: False}
+    assert await count(db_session, PublisherEntity.books, abel.id) == 2
+
+    # many-to-one: does the book's publisher row exist
+    assert await exists(db_session, BookEntity.publisher, abel.id)
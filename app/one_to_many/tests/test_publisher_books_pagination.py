@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.one_to_many.entities import BookEntity, PublisherEntity
+from app.one_to_many.pagination import BookCursor, PublisherBooks
+
+
+@pytest.fixture
+async def publisher_with_books(db_session: AsyncSession) -> PublisherEntity:
+    publisher = PublisherEntity(name="abel")
+    other = PublisherEntity(name="other")
+    db_session.add_all([publisher, other])
+    await db_session.flush()
+    db_session.add_all([BookEntity(name=f"book-{i:02}", publisher_id=publisher.id) for i in range(7)])
+    db_session.add(BookEntity(name="book-00", publisher_id=other.id))
+    await db_session.commit()
+    await db_session.reset()
+    return publisher
+
+
+@pytest.mark.asyncio
+async def test_count_doesnt_load_books(db_session: AsyncSession, publisher_with_books: PublisherEntity):
+    books = PublisherBooks(db_session, publisher_with_books.id)
+
+    assert await books.count() == 7
+    assert not any(isinstance(obj, BookEntity) for obj in db_session.identity_map.values())
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_name_id_keyset(db_session: AsyncSession, publisher_with_books: PublisherEntity):
+    books = PublisherBooks(db_session, publisher_with_books.id, page_size=3)
+
+    first = await books.page()
+    assert [book.name for book in first.books] == ["book-00", "book-01", "book-02"]
+    assert first.next_cursor
+
+    # cursors survive a round trip through an API token
+    cursor = BookCursor.decode(first.next_cursor.encode())
+    second = await books.page(after=cursor)
+    assert [book.name for book in second.books] == ["book-03", "book-04", "book-05"]
+
+    sizes = [len(page.books) async for page in books.pages()]
+    assert sizes == [3, 3, 1]
+
+    names = [book.name async for book in books]
+    assert names == [f"book-{i:02}" for i in range(7)]
@@ -0,0 +1,76 @@
+import dataclasses
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.one_to_many.entities import BookEntity, BookTable, PublisherEntity
+from app.one_to_many.purge import PublisherPurge, PurgeProgress
+
+# each batch commits on a connection of its own, which must really see the others' commits
+pytestmark = pytest.mark.db_truncate
+
+
+@pytest.fixture
+async def publisher(db_session: AsyncSession) -> PublisherEntity:
+    publisher = PublisherEntity(name="abel")
+    db_session.add(publisher)
+    await db_session.flush()
+    db_session.add_all([BookEntity(name=f"book-{i}", publisher_id=publisher.id) for i in range(5)])
+    await db_session.commit()
+    await db_session.reset()
+    return publisher
+
+
+@pytest.fixture
+def session_factory(db_session: AsyncSession) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+
+async def count_books(session: AsyncSession) -> int:
+    return (await session.execute(select(func.count()).select_from(BookTable))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_books_in_batches_then_publisher(
+    db_session: AsyncSession,
+    publisher: PublisherEntity,
+    session_factory: async_sessionmaker[AsyncSession],
+):
+    reports: list[PurgeProgress] = []
+    purge = PublisherPurge(
+        session_factory,
+        publisher.id,
+        batch_size=2,
+        on_progress=lambda progress: reports.append(dataclasses.replace(progress)),
+    )
+
+    progress = await purge.run()
+
+    assert progress.done
+    assert progress.books_deleted == 5
+    assert progress.batches == 3
+    assert [report.books_deleted for report in reports] == [2, 4, 5, 5]
+    assert reports[-1].publisher_deleted
+    assert await count_books(db_session) == 0
+    assert not await db_session.get(PublisherEntity, publisher.id)
+
+
+@pytest.mark.asyncio
+async def test_purge_can_be_resumed(
+    db_session: AsyncSession,
+    publisher: PublisherEntity,
+    session_factory: async_sessionmaker[AsyncSession],
+):
+    purge = PublisherPurge(session_factory, publisher.id, batch_size=2)
+
+    progress = await purge.run(max_batches=1)
+    assert not progress.done
+    async with session_factory() as other:  # committed, not just flushed
+        assert await count_books(other) == 3
+    assert await db_session.get(PublisherEntity, publisher.id)
+
+    progress = await purge.run(progress)
+    assert progress.done
+    assert progress.books_deleted == 5
+    assert await count_books(db_session) == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.db.instrumentation import QueryBudgetExceededError, count_queries, query_budget
+from app.one_to_many.entities import BookEntity, PublisherEntity
+
+
+@pytest.fixture
+async def publisher_ids(db_session: AsyncSession) -> list:
+    publishers = [PublisherEntity(name=f"publisher-{i}") for i in range(3)]
+    db_session.add_all(publishers)
+    await db_session.flush()
+    db_session.add_all(BookEntity(name=f"book-{i}", publisher_id=p.id) for p in publishers for i in range(2))
+    await db_session.commit()
+    ids = [publisher.id for publisher in publishers]
+    await db_session.reset()
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_budget_reports_n_plus_one(db_session: AsyncSession, publisher_ids: list):
+    with pytest.raises(QueryBudgetExceededError) as excinfo, query_budget(2, max_repeats=1):
+        for publisher_id in publisher_ids:
+            await db_session.scalars(select(BookEntity).where(BookEntity.publisher_id == publisher_id))
+
+    message = str(excinfo.value)
+    assert "expected at most 2 statements, 3 were issued" in message
+    assert "N+1: issued 3 times: SELECT book.id" in message
+    assert excinfo.value.log.count == 3
+
+
+@pytest.mark.asyncio
+async def test_selectinload_stays_within_budget(db_session: AsyncSession, publisher_ids: list):
+    with query_budget(2, max_repeats=1) as log:
+        stmt = select(PublisherEntity).options(selectinload(PublisherEntity.books))
+        publishers = (await db_session.scalars(stmt)).all()
+
+    assert sum(len(publisher.books) for publisher in publishers) == 6
+    assert log.count == 2
+
+
+@pytest.mark.asyncio
+async def test_scopes_nest_and_follow_tasks(db_session: AsyncSession, publisher_ids: list):
+    async def books(publisher_id):
+        with count_queries() as own:
+            await db_session.scalars(select(BookEntity).where(BookEntity.publisher_id == publisher_id))
+        return own.count
+
+    with count_queries() as outer:
+        await db_session.scalars(select(PublisherEntity))
+        # a task started inside the scope counts towards it
+        assert await asyncio.create_task(books(publisher_ids[0])) == 1
+
+    with count_queries() as unrelated:
+        pass
+    assert outer.count == 2
+    assert unrelated.count == 0
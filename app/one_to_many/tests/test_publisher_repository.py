@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.repository import track_compile_cache, warm_repositories
+from app.one_to_many.entities import BookEntity, PublisherEntity
+from app.one_to_many.repository import REPOSITORIES, BookRepository, PublisherRepository
+
+
+@pytest.fixture
+async def publisher(db_session: AsyncSession) -> PublisherEntity:
+    publisher = PublisherEntity(name="abel")
+    db_session.add(publisher)
+    await db_session.flush()
+    db_session.add_all([BookEntity(name=f"book-{i}", publisher_id=publisher.id) for i in range(3)])
+    await db_session.commit()
+    await db_session.reset()
+    return publisher
+
+
+@pytest.mark.asyncio
+async def test_repository_loads_publisher_with_books(db_session: AsyncSession, publisher: PublisherEntity):
+    repository = PublisherRepository(db_session)
+
+    res = await repository.get_with_books(publisher.id)
+
+    assert res
+    assert sorted(book.name for book in res.books) == ["book-0", "book-1", "book-2"]
+    assert [p.id for p in await repository.find_by_name("abel")] == [publisher.id]
+
+    book = await BookRepository(db_session).get_with_publisher(res.books[0].id)
+    assert book
+    assert book.publisher
+    assert book.publisher.id == publisher.id
+
+
+@pytest.mark.asyncio
+async def test_repository_statements_come_from_the_compiled_cache(
+    db_session: AsyncSession,
+    publisher: PublisherEntity,
+):
+    stats = track_compile_cache(db_session.bind)
+    try:
+        assert await warm_repositories(db_session.bind, *REPOSITORIES) == 3
+        repository = PublisherRepository(db_session)
+        stats.reset()
+
+        # warming loaded a publisher, so the selectin query is compiled too
+        for _ in range(3):
+            assert await repository.get_with_books(publisher.id)
+            db_session.expunge_all()
+
+        assert stats.misses == 0
+        assert stats.hits == 6  # the publisher and its books, three times
+        assert stats.hit_rate == 1.0
+    finally:
+        stats.detach()
+
+
+@pytest.mark.asyncio
+async def test_warming_leaves_the_callers_session_alone(db_session: AsyncSession, publisher: PublisherEntity):
+    pending = PublisherEntity(name="bella")
+    db_session.add(pending)
+    await db_session.flush()
+    db_session.add(BookEntity(name="unflushed", publisher_id=pending.id))
+
+    await warm_repositories(db_session.bind, *REPOSITORIES)
+    await db_session.commit()
+
+    # the flushed row and the pending one both survived the warm-up and were committed
+    repository = PublisherRepository(db_session)
+    assert [p.id for p in await repository.find_by_name("bella")] == [pending.id]
+    res = await repository.get_with_books(pending.id)
+    assert res
+    assert [book.name for book in res.books] == ["unflushed"]
@@ -4,6 +4,7 @@ from typing import Any
 from sqlalchemy import Column, Integer, Table
 from sqlalchemy.orm import composite
 
+from app.lib.projections import projection
 from app.one_to_one.entities import MapperRegistry
 
 
@@ -19,7 +20,7 @@ class Entity:
         return hash(self.id)
 
 
-@dataclass
+@dataclass(slots=True)
 class Point:
     x: int
     y: int
@@ -51,3 +52,6 @@ MapperRegistry.map_imperatively(
         "p2": composite(Point, location_table.c.x2, location_table.c.y2, init=False),
     },
 )
+
+# Slotted, read-only snapshot with the same `p1`/`p2` API as `Location`.
+LocationRow = projection(Location)
@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from sqlalchemy import INTEGER, UUID, Column, ForeignKey, String, Table
 from sqlalchemy.orm import registry, relationship
 
+from app.lib.projections import projection
+
 # Register the SQLAlchemy ORM
 MapperRegistry = registry()
 
@@ -144,6 +146,12 @@ MapperRegistry.map_imperatively(
     },
 )
 
+# ------------ Read Models ------------
+
+# Slotted, read-only snapshots for bulk reads; mapped classes can't use `slots=True`.
+UserRow = projection(UserEntity)
+ProfileRow = projection(ProfileEntity)
+
 """
 Explanation:
 ------------
@@ -0,0 +1,139 @@
+"""Columnar, vectorised access to `location_table`.
+
+Analytics jobs that only do area/distance math don't need a `Location` and two
+`Point` objects per row. `stream_location_arrays` reads the table in chunks
+straight into NumPy arrays, and the helpers below work on whole chunks at once.
+Corners may be stored in any order, the helpers normalise them.
+"""
+
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import ColumnElement, Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.one_to_one.composite import Point, location_table
+
+IntArray = npt.NDArray[np.int64]
+FloatArray = npt.NDArray[np.float64]
+
+_COLUMNS = (
+    location_table.c.id,
+    location_table.c.x1,
+    location_table.c.y1,
+    location_table.c.x2,
+    location_table.c.y2,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LocationArrays:
+    """One chunk of `location` rows as parallel arrays."""
+
+    id: IntArray
+    x1: IntArray
+    y1: IntArray
+    x2: IntArray
+    y2: IntArray
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Row[Any]]) -> "LocationArrays":
+        # flattening through fromiter is much cheaper than np.array(rows)
+        flat = np.fromiter(
+            (value for row in rows for value in row),
+            dtype=np.int64,
+            count=len(rows) * len(_COLUMNS),
+        ).reshape(-1, len(_COLUMNS))
+        return cls(*(np.ascontiguousarray(flat[:, i]) for i in range(len(_COLUMNS))))
+
+    @classmethod
+    def concatenate(cls, chunks: Sequence["LocationArrays"]) -> "LocationArrays":
+        if not chunks:
+            return cls.from_rows([])
+        return cls(
+            id=np.concatenate([c.id for c in chunks]),
+            x1=np.concatenate([c.x1 for c in chunks]),
+            y1=np.concatenate([c.y1 for c in chunks]),
+            x2=np.concatenate([c.x2 for c in chunks]),
+            y2=np.concatenate([c.y2 for c in chunks]),
+        )
+
+    @property
+    def min_x(self) -> IntArray:
+        return np.minimum(self.x1, self.x2)
+
+    @property
+    def max_x(self) -> IntArray:
+        return np.maximum(self.x1, self.x2)
+
+    @property
+    def min_y(self) -> IntArray:
+        return np.minimum(self.y1, self.y2)
+
+    @property
+    def max_y(self) -> IntArray:
+        return np.maximum(self.y1, self.y2)
+
+
+async def stream_location_arrays(
+    session: AsyncSession,
+    *criteria: ColumnElement[bool],
+    chunk_size: int = 100_000,
+) -> AsyncIterator[LocationArrays]:
+    """Yield `location` rows in chunks of at most `chunk_size`, ordered by id.
+
+    Uses a server-side cursor, so memory stays bounded by one chunk.
+    """
+
+    stmt = select(*_COLUMNS).where(*criteria).order_by(location_table.c.id).execution_options(yield_per=chunk_size)
+    result = await session.stream(stmt)
+    try:
+        async for partition in result.partitions():
+            yield LocationArrays.from_rows(partition)
+    finally:
+        await result.close()
+
+
+async def load_location_arrays(
+    session: AsyncSession,
+    *criteria: ColumnElement[bool],
+    chunk_size: int = 100_000,
+) -> LocationArrays:
+    chunks = [chunk async for chunk in stream_location_arrays(session, *criteria, chunk_size=chunk_size)]
+    return LocationArrays.concatenate(chunks)
+
+
+def area(locations: LocationArrays) -> IntArray:
+    return (locations.max_x - locations.min_x) * (locations.max_y - locations.min_y)
+
+
+def centroid(locations: LocationArrays) -> tuple[FloatArray, FloatArray]:
+    return (locations.x1 + locations.x2) / 2, (locations.y1 + locations.y2) / 2
+
+
+def intersection(locations: LocationArrays, p1: Point, p2: Point) -> LocationArrays:
+    """Clip every location to the rectangle `p1`-`p2`.
+
+    Locations that don't overlap the rectangle come back with zero width or
+    height, so their `area` is 0.
+    """
+
+    x1 = np.clip(locations.min_x, min(p1.x, p2.x), max(p1.x, p2.x))
+    x2 = np.clip(locations.max_x, min(p1.x, p2.x), max(p1.x, p2.x))
+    y1 = np.clip(locations.min_y, min(p1.y, p2.y), max(p1.y, p2.y))
+    y2 = np.clip(locations.max_y, min(p1.y, p2.y), max(p1.y, p2.y))
+    return LocationArrays(id=locations.id, x1=x1, y1=y1, x2=x2, y2=y2)
+
+
+def distance(locations: LocationArrays, point: Point) -> FloatArray:
+    """Euclidean distance from `point` to each rectangle, 0 when it's inside."""
+
+    dx = np.maximum(np.maximum(locations.min_x - point.x, 0), point.x - locations.max_x)
+    dy = np.maximum(np.maximum(locations.min_y - point.y, 0), point.y - locations.max_y)
+    return np.hypot(dx, dy)
@@ -0,0 +1,39 @@
+"""Queries of the one-to-one example, built once with bound parameters."""
+
+import uuid
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import selectinload
+
+from app.lib.repository import Prepared, Repository
+from app.one_to_one.entities import ProfileEntity, ProfileTable, UserEntity, UserTable
+
+
+class UserRepository(Repository):
+    with_profile = Prepared(
+        select(UserEntity)
+        .options(
+            selectinload(UserEntity.profile),  # pyright: ignore[reportArgumentType]
+            selectinload(UserEntity.social_medias),  # pyright: ignore[reportArgumentType]
+        )
+        .where(UserTable.c.id == bindparam("user_id")),
+        {"user_id": select(UserTable.c.id).limit(1)},
+    )
+
+    async def get_with_profile(self, user_id: uuid.UUID) -> UserEntity | None:
+        return (await self.execute(self.with_profile, user_id=user_id)).scalar_one_or_none()
+
+
+class ProfileRepository(Repository):
+    with_user = Prepared(
+        select(ProfileEntity)
+        .options(selectinload(ProfileEntity.user))  # pyright: ignore[reportArgumentType]
+        .where(ProfileTable.c.id == bindparam("profile_id")),
+        {"profile_id": select(ProfileTable.c.id).where(ProfileTable.c.user_id.is_not(None)).limit(1)},
+    )
+
+    async def get_with_user(self, profile_id: uuid.UUID) -> ProfileEntity | None:
+        return (await self.execute(self.with_user, profile_id=profile_id)).scalar_one_or_none()
+
+
+REPOSITORIES: list[type[Repository]] = [UserRepository, ProfileRepository]
@@ -0,0 +1,109 @@
+"""Alternative mapping of `Location` on native Postgres geometry.
+
+Instead of four integer columns, each corner is a `point` column and the
+rectangle is indexed as `box(p1, p2)` with GiST. Overlap, containment and
+nearest-neighbour queries then use the index instead of scanning with
+four-column arithmetic.
+
+A `box` column would normalise its corners (upper-right first), so `p1`/`p2`
+wouldn't round-trip; two `point` columns keep the `Location` API as it is.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Self
+
+from sqlalchemy import Column, ColumnElement, Float, Index, Integer, Table, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import UserDefinedType
+
+from app.one_to_one.composite import Entity, Point
+from app.one_to_one.entities import MapperRegistry
+
+
+class PointType(UserDefinedType[Point]):
+    """Postgres `point` column holding a `Point`."""
+
+    cache_ok = True
+    # asyncpg encodes points in binary, so it has to know every parameter's type
+    render_bind_cast = True
+
+    def get_col_spec(self, **kw: Any) -> str:
+        return "POINT"
+
+    def bind_processor(self, dialect: Any) -> Any:
+        def process(value: Point | None) -> tuple[float, float] | None:
+            if value is None:
+                return None
+            return (float(value.x), float(value.y))
+
+        return process
+
+    def result_processor(self, dialect: Any, coltype: Any) -> Any:
+        def process(value: Any) -> Point | None:
+            if value is None:
+                return None
+            return Point(int(value[0]), int(value[1]))
+
+        return process
+
+
+@dataclass(eq=False)
+class SpatialLocation(Entity):
+    p1: Point
+    p2: Point
+
+    @classmethod
+    async def overlapping(cls, session: AsyncSession, p1: Point, p2: Point) -> list[Self]:
+        """Locations sharing any area with the rectangle `p1`-`p2`."""
+
+        return await cls._query(session, location_box.op("&&")(region_box(p1, p2)))
+
+    @classmethod
+    async def containing(cls, session: AsyncSession, p1: Point, p2: Point) -> list[Self]:
+        """Locations that fully contain the rectangle `p1`-`p2`."""
+
+        return await cls._query(session, location_box.op("@>")(region_box(p1, p2)))
+
+    @classmethod
+    async def within(cls, session: AsyncSession, p1: Point, p2: Point) -> list[Self]:
+        """Locations fully inside the rectangle `p1`-`p2`."""
+
+        return await cls._query(session, location_box.op("<@")(region_box(p1, p2)))
+
+    @classmethod
+    async def nearest(cls, session: AsyncSession, point: Point, limit: int = 10) -> list[Self]:
+        """The `limit` locations closest to `point`, using a GiST KNN scan."""
+
+        distance = location_box.op("<->", return_type=Float)(_point(point))
+        stmt = select(cls).order_by(distance).limit(limit)
+        return list((await session.scalars(stmt)).all())
+
+    @classmethod
+    async def _query(cls, session: AsyncSession, criteria: ColumnElement[bool]) -> list[Self]:
+        stmt = select(cls).where(criteria).order_by(spatial_location_table.c.id)
+        return list((await session.scalars(stmt)).all())
+
+
+def _point(value: Point) -> ColumnElement[Point]:
+    return literal(value, PointType())
+
+
+def region_box(p1: Point, p2: Point) -> ColumnElement[Any]:
+    return func.box(_point(p1), _point(p2))
+
+
+spatial_location_table = Table(
+    "spatial_location",
+    MapperRegistry.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("p1", PointType(), nullable=False),
+    Column("p2", PointType(), nullable=False),
+)
+
+# queries must use this exact expression for the planner to pick the index
+location_box = func.box(spatial_location_table.c.p1, spatial_location_table.c.p2)
+
+Index("ix_spatial_location_box", location_box, postgresql_using="gist")
+
+
+MapperRegistry.map_imperatively(SpatialLocation, spatial_location_table)
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.one_to_one.composite import Location, Point
+from app.one_to_one.location_arrays import (
+    LocationArrays,
+    area,
+    centroid,
+    distance,
+    intersection,
+    load_location_arrays,
+    stream_location_arrays,
+)
+
+
+def make_arrays(*boxes: tuple[int, int, int, int]) -> LocationArrays:
+    ids = np.arange(1, len(boxes) + 1, dtype=np.int64)
+    x1, y1, x2, y2 = (np.array(column, dtype=np.int64) for column in zip(*boxes, strict=True))
+    return LocationArrays(id=ids, x1=x1, y1=y1, x2=x2, y2=y2)
+
+
+def test_vectorized_helpers():
+    # the second box has its corners stored in reverse order
+    locations = make_arrays((0, 0, 10, 10), (30, 30, 20, 20), (100, 100, 101, 102))
+
+    assert area(locations).tolist() == [100, 100, 2]
+
+    cx, cy = centroid(locations)
+    assert cx.tolist() == [5.0, 25.0, 100.5]
+    assert cy.tolist() == [5.0, 25.0, 101.0]
+
+    clipped = intersection(locations, Point(5, 5), Point(25, 25))
+    assert area(clipped).tolist() == [25, 25, 0]
+
+    assert distance(locations, Point(13, 14)).tolist() == [5.0, math.hypot(7, 6), math.hypot(87, 86)]
+
+
+@pytest.mark.asyncio
+async def test_stream_location_arrays_in_chunks(db_session: AsyncSession):
+    locations = [Location(p1=Point(i, i), p2=Point(i + 2, i + 3)) for i in range(5)]
+    db_session.add_all(locations)
+    await db_session.commit()
+
+    chunks = [chunk async for chunk in stream_location_arrays(db_session, chunk_size=2)]
+    # server-side cursors stay open until the transaction ends
+    await db_session.commit()
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    everything = LocationArrays.concatenate(chunks)
+    assert everything.id.tolist() == [loc.id for loc in locations]
+    assert area(everything).tolist() == [6] * 5
+
+    loaded = await load_location_arrays(db_session)
+    await db_session.commit()
+    assert loaded.x1.tolist() == [0, 1, 2, 3, 4]
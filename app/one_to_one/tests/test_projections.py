@@ -0,0 +1,45 @@
+import dataclasses
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lib.projections import load_projection, stream_projection
+from app.one_to_one.composite import Location, LocationRow, Point
+from app.one_to_one.entities import UserEntity, UserRow, UserTable
+
+
+@pytest.mark.asyncio
+async def test_projection_rows_are_slotted_and_read_only(db_session: AsyncSession):
+    user = UserEntity(name="abel")
+    db_session.add(user)
+    await db_session.commit()
+    await db_session.reset()
+
+    rows = await load_projection(db_session, UserRow, UserTable.c.id == user.id)
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row.id == user.id
+    assert row.name == "abel"
+    # no per-instance __dict__ and no ORM state attached
+    assert not hasattr(row, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        row.name = "changed"
+
+
+@pytest.mark.asyncio
+async def test_projection_builds_composites(db_session: AsyncSession):
+    location = Location(p1=Point(1, 2), p2=Point(3, 4))
+    db_session.add(location)
+    await db_session.commit()
+    await db_session.reset()
+
+    rows = [row async for row in stream_projection(db_session, LocationRow, chunk_size=2)]
+    # server-side cursors stay open until the transaction ends
+    await db_session.commit()
+
+    assert len(rows) == 1
+    assert rows[0].id == location.id
+    assert rows[0].p1 == Point(1, 2)
+    assert rows[0].p2 == Point(3, 4)
+    assert not hasattr(rows[0].p1, "__dict__")
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.one_to_one.composite import Point
+from app.one_to_one.spatial import SpatialLocation
+
+
+@pytest.fixture
+async def locations(db_session: AsyncSession) -> list[SpatialLocation]:
+    locations = [
+        SpatialLocation(p1=Point(0, 0), p2=Point(10, 10)),
+        SpatialLocation(p1=Point(20, 20), p2=Point(30, 30)),
+        # corners given in "reverse" order must round-trip unchanged
+        SpatialLocation(p1=Point(105, 105), p2=Point(100, 100)),
+    ]
+    db_session.add_all(locations)
+    await db_session.commit()
+    await db_session.reset()
+    return locations
+
+
+@pytest.mark.asyncio
+async def test_spatial_location_keeps_point_api(
+    db_session: AsyncSession,
+    locations: list[SpatialLocation],
+):
+    db_location = await db_session.get(SpatialLocation, locations[2].id)
+    assert db_location
+    assert db_location.p1 == Point(105, 105)
+    assert db_location.p2 == Point(100, 100)
+
+
+@pytest.mark.asyncio
+async def test_spatial_location_query_helpers(
+    db_session: AsyncSession,
+    locations: list[SpatialLocation],
+):
+    first, second, third = locations
+
+    overlapping = await SpatialLocation.overlapping(db_session, Point(5, 5), Point(25, 25))
+    assert [loc.id for loc in overlapping] == [first.id, second.id]
+
+    containing = await SpatialLocation.containing(db_session, Point(21, 21), Point(22, 22))
+    assert [loc.id for loc in containing] == [second.id]
+
+    within = await SpatialLocation.within(db_session, Point(-1, -1), Point(31, 31))
+    assert [loc.id for loc in within] == [first.id, second.id]
+
+    nearest = await SpatialLocation.nearest(db_session, Point(99, 99), limit=2)
+    assert [loc.id for loc in nearest] == [third.id, second.id]
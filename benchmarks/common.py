@@ -0,0 +1,20 @@
+from sqlalchemy import MetaData
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.engine import create_engine as create_configured_engine
+from app.db.engine import create_session_factory
+from app.db.settings import DatabaseSettings
+
+__all__ = ["create_engine", "create_session_factory", "reset_schema"]
+
+# Benchmarks drop and recreate the tables they use, point DATABASE_URL at a scratch database.
+
+
+def create_engine() -> AsyncEngine:
+    return create_configured_engine(DatabaseSettings.from_env(pool_size=5, max_overflow=0))
+
+
+async def reset_schema(engine: AsyncEngine, metadata: MetaData) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
@@ -0,0 +1,112 @@
+"""`EnrollmentBitmapIndex` vs SQL self-joins on `enrollment`.
+
+Query: students enrolled in course A and course B but not course C.
+
+Usage:
+    python -m benchmarks.enrollment_bitmap --students 1000000 --courses 1000 --enrollments 10000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.many_to_many.bitmap_index import EnrollmentBitmapIndex
+from app.many_to_many.entities import CourseTable, EnrollmentTable, MapperRegistry
+from benchmarks.common import create_engine, create_session_factory, reset_schema
+
+
+async def populate(
+    session_factory: async_sessionmaker[AsyncSession], students: int, courses: int, enrollments: int
+) -> None:
+    async with session_factory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO student (id, name) SELECT gen_random_uuid(), 'student-' || i FROM generate_series(1, :n) i"
+            ),
+            {"n": students},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO course (id, name) SELECT gen_random_uuid(), 'course-' || i FROM generate_series(1, :n) i"
+            ),
+            {"n": courses},
+        )
+        # course popularity is skewed (random()^2), students are uniform
+        await session.execute(
+            text(
+                "INSERT INTO enrollment (course_id, student_id) "
+                "SELECT c.id, s.id "
+                "FROM (SELECT (random() * (:students - 1))::int AS sn, (power(random(), 2) * (:courses - 1))::int AS cn "
+                "      FROM generate_series(1, :n) OFFSET 0) AS pick "
+                "JOIN (SELECT id, row_number() OVER () - 1 AS n FROM student) AS s ON s.n = pick.sn "
+                "JOIN (SELECT id, row_number() OVER () - 1 AS n FROM course) AS c ON c.n = pick.cn "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {"students": students, "courses": courses, "n": enrollments},
+        )
+        await session.commit()
+    async with session_factory() as session:
+        await session.execute(text("ANALYZE student"))
+        await session.execute(text("ANALYZE course"))
+        await session.execute(text("ANALYZE enrollment"))
+        await session.commit()
+
+
+def self_join(a: uuid.UUID, b: uuid.UUID, c: uuid.UUID):
+    e1, e2, e3 = EnrollmentTable.alias("e1"), EnrollmentTable.alias("e2"), EnrollmentTable.alias("e3")
+    return (
+        select(e1.c.student_id)
+        .join(e2, (e2.c.student_id == e1.c.student_id) & (e2.c.course_id == b))
+        .where(e1.c.course_id == a)
+        .where(~exists().where(e3.c.student_id == e1.c.student_id, e3.c.course_id == c))
+    )
+
+
+async def main(students: int, courses: int, enrollments: int, queries: int) -> None:
+    engine = create_engine()
+    session_factory = create_session_factory(engine)
+    await reset_schema(engine, MapperRegistry.metadata)
+    await populate(session_factory, students, courses, enrollments)
+
+    async with session_factory() as session:
+        start = time.perf_counter()
+        index = await EnrollmentBitmapIndex.build(session)
+        build_seconds = time.perf_counter() - start
+        course_ids = list((await session.scalars(select(CourseTable.c.id))).all())
+
+    rng = random.Random(42)  # noqa: S311 - same courses for both sides
+    triples = [tuple(rng.sample(course_ids, 3)) for _ in range(queries)]
+
+    async with session_factory() as session:
+        start = time.perf_counter()
+        sql_results = [set((await session.scalars(self_join(*triple))).all()) for triple in triples]
+        sql_ms = (time.perf_counter() - start) / queries * 1000
+
+    start = time.perf_counter()
+    bitmap_results = [set((index.course(a) & index.course(b) - index.course(c)).ids()) for a, b, c in triples]
+    bitmap_ms = (time.perf_counter() - start) / queries * 1000
+
+    assert sql_results == bitmap_results
+    matches = sum(map(len, sql_results)) / queries
+
+    print(f"{students} students, {courses} courses, {enrollments} enrollments drawn, {queries} queries")  # noqa: T201
+    print(f"index build {build_seconds:.1f} s, course bitmaps {index.nbytes / 2**20:.1f} MiB")  # noqa: T201
+    print(f"A and B but not C ({matches:.0f} students on average)")  # noqa: T201
+    print(f"  sql self-join {sql_ms:>10.2f} ms   bitmap {bitmap_ms:>10.3f} ms")  # noqa: T201
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=1_000_000)
+    parser.add_argument("--courses", type=int, default=1_000)
+    parser.add_argument("--enrollments", type=int, default=10_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.students, args.courses, args.enrollments, args.queries))
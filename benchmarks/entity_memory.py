@@ -0,0 +1,82 @@
+"""Bytes per loaded object: ORM entities vs slotted projections.
+
+Usage:
+    python -m benchmarks.entity_memory --rows 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.lib.projections import load_projection
+from app.one_to_one.composite import Location, LocationRow
+from app.one_to_one.entities import MapperRegistry, UserEntity, UserRow
+from benchmarks.common import create_engine, create_session_factory, reset_schema
+
+
+async def populate(session_factory: async_sessionmaker[AsyncSession], rows: int) -> None:
+    async with session_factory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO \"user\" (id, name) SELECT gen_random_uuid(), 'user-' || g FROM generate_series(1, :n) g"
+            ),
+            {"n": rows},
+        )
+        await session.execute(
+            text("INSERT INTO location (x1, y1, x2, y2) SELECT g, g, g + 10, g + 10 FROM generate_series(1, :n) g"),
+            {"n": rows},
+        )
+        await session.commit()
+
+
+async def measure(
+    session_factory: async_sessionmaker[AsyncSession],
+    load: Callable[[AsyncSession], Awaitable[list[Any]]],
+) -> tuple[int, float]:
+    async with session_factory() as session:
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        objects = await load(session)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        count = len(objects)
+        del objects
+    return count, (after - before) / max(count, 1)
+
+
+async def main(rows: int) -> None:
+    engine = create_engine()
+    session_factory = create_session_factory(engine)
+    await reset_schema(engine, MapperRegistry.metadata)
+    await populate(session_factory, rows)
+
+    cases: dict[str, Callable[[AsyncSession], Awaitable[list[Any]]]] = {
+        "UserEntity (ORM)": lambda s: _scalars(s, UserEntity),
+        "UserRow (projection)": lambda s: load_projection(s, UserRow),
+        "Location (ORM + 2 Point composites)": lambda s: _scalars(s, Location),
+        "LocationRow (projection)": lambda s: load_projection(s, LocationRow),
+    }
+    for name, load in cases.items():
+        count, per_object = await measure(session_factory, load)
+        print(f"{name:<40} {count:>10} objects {per_object:>10.1f} bytes/object")  # noqa: T201
+
+    await engine.dispose()
+
+
+async def _scalars(session: AsyncSession, entity: type) -> list[Any]:
+    return list((await session.scalars(select(entity))).all())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
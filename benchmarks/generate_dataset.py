@@ -0,0 +1,63 @@
+"""Fill the schema with a synthetic dataset for load testing.
+
+Rows come from the polyfactory factories in `app.lib.factories` and are
+streamed into binary `COPY` batch by batch (`bulk_insert(..., method="copy")`),
+so memory stays flat whatever the scale. Each table is committed and
+`ANALYZE`d once written, so planner statistics match the data right away.
+
+`--scale 1` writes about 140k rows; `--scale 700` about 100M. The same
+`--seed` and `--scale` reproduce the same dataset.
+
+Usage:
+    python -m benchmarks.generate_dataset --scale 10 --seed 7 --tree-shape deep
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import typing
+
+from sqlalchemy import text
+
+from app.db.registries import METADATA
+from app.lib.bulk import bulk_insert, target_table
+from app.lib.factories import DATASET_GROUPS, TreeShape, dataset
+from benchmarks.common import create_engine, create_session_factory, reset_schema
+
+
+async def main(scale: float, seed: int, groups: list[str], tree_shape: TreeShape, batch_size: int) -> None:
+    engine = create_engine()
+    session_factory = create_session_factory(engine)
+    for metadata in METADATA:
+        await reset_schema(engine, metadata)
+
+    total, started = 0, time.perf_counter()
+    for target, rows in dataset(scale, seed, groups=groups, tree_shape=tree_shape):
+        table = target_table(target)
+        async with session_factory() as session:
+            report = await bulk_insert(session, target, rows, batch_size=batch_size, method="copy")
+            await session.commit()
+            await session.execute(text(f'ANALYZE "{table.name}"'))
+            # ANALYZE is transactional: rolled back on close, it would leave no statistics
+            await session.commit()
+        total += report.rows
+        print(  # noqa: T201
+            f"{report.table:<20} {report.rows:>12,} rows {report.seconds:>9.1f} s {report.rows_per_second:>10,.0f} rows/s",
+            file=sys.stderr,
+        )
+
+    elapsed = time.perf_counter() - started
+    print(f"{'total':<20} {total:>12,} rows {elapsed:>9.1f} s {total / elapsed:>10,.0f} rows/s", file=sys.stderr)  # noqa: T201
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--group", nargs="+", choices=list(DATASET_GROUPS), default=list(DATASET_GROUPS))
+    parser.add_argument("--tree-shape", choices=typing.get_args(TreeShape), default="wide")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per COPY call")
+    args = parser.parse_args()
+    asyncio.run(main(args.scale, args.seed, args.group, args.tree_shape, args.batch_size))
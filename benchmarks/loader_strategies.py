@@ -0,0 +1,338 @@
+"""Relationship loading strategies compared on every mapping in `app`.
+
+For each relationship below, loads all parents with their related objects using
+
+- `selectinload`, `joinedload`, `subqueryload`
+- `raiseload` on the relationship plus explicit batched queries (`RelationshipLoader`)
+- raw Core: parent rows, then related rows by parent key, grouped in Python
+
+and reports latency, statements issued and peak allocated memory as JSON, one
+record per (relationship, strategy, parents, fan-out), for regression tracking.
+
+Usage:
+    python -m benchmarks.loader_strategies --parents 1000 10000 --fanout 1 10 50 --output loaders.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy import ColumnElement, Select, bindparam, event, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import QueryableAttribute, joinedload, raiseload, selectinload, subqueryload
+
+from app.adjececy_list_relationship.entities import NodeEntity, NodeTable
+from app.db.registries import METADATA
+from app.lib.dataloader import MAX_BATCH_SIZE, RelationshipLoader
+from app.lib.relationships import RelationshipInfo, relationship_info
+from app.many_to_many.entities import StudentEntity
+from app.many_to_many_association.entities import SpeakerEntity
+from app.one_to_many.entities import PublisherEntity
+from app.one_to_one.entities import UserEntity
+from benchmarks.common import create_engine, create_session_factory, reset_schema
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    relationship: QueryableAttribute[Any]
+    tables: tuple[str, ...]  # truncated before populating
+    # SQL taking :parents, :fanout and :pool; students and speakers get `fanout`
+    # consecutive courses and conferences out of `pool`
+    populate: tuple[str, ...]
+    where: ColumnElement[bool] | None = None  # which rows are parents
+    fans_out: bool = True  # False: one related row per parent whatever the fan-out
+
+    @property
+    def info(self) -> RelationshipInfo:
+        return relationship_info(self.relationship)
+
+    def parents(self) -> Select[Any]:
+        stmt = select(self.info.parent)
+        return stmt.where(self.where) if self.where is not None else stmt
+
+
+SCENARIOS = (
+    Scenario(
+        name="one_to_one",
+        relationship=UserEntity.profile,  # pyright: ignore[reportArgumentType]
+        tables=("user", "profile"),
+        populate=(
+            "INSERT INTO \"user\" (id, name) SELECT gen_random_uuid(), 'user-' || g FROM generate_series(1, :parents) g",
+            "INSERT INTO profile (id, profile_picture, user_id) SELECT gen_random_uuid(), 'picture', id FROM \"user\"",
+        ),
+        fans_out=False,
+    ),
+    Scenario(
+        name="one_to_many",
+        relationship=PublisherEntity.books,  # pyright: ignore[reportArgumentType]
+        tables=("publisher", "book"),
+        populate=(
+            (
+                "INSERT INTO publisher (id, name) SELECT gen_random_uuid(), 'publisher-' || g "
+                "FROM generate_series(1, :parents) g"
+            ),
+            (
+                "INSERT INTO book (id, name, publisher_id) SELECT gen_random_uuid(), 'book-' || k, p.id "
+                "FROM publisher AS p CROSS JOIN generate_series(1, :fanout) k"
+            ),
+        ),
+    ),
+    Scenario(
+        name="many_to_many",
+        relationship=StudentEntity.courses,  # pyright: ignore[reportArgumentType]
+        tables=("student", "course", "enrollment"),
+        populate=(
+            "INSERT INTO student (id, name) SELECT gen_random_uuid(), 'student-' || g FROM generate_series(1, :parents) g",
+            "INSERT INTO course (id, name) SELECT gen_random_uuid(), 'course-' || g FROM generate_series(1, :pool) g",
+            (
+                "INSERT INTO enrollment (course_id, student_id) SELECT c.id, s.id "
+                "FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM student) AS s CROSS JOIN generate_series(0, :fanout - 1) k "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM course) AS c ON c.n = (s.n + k) % :pool"
+            ),
+        ),
+    ),
+    Scenario(
+        name="association_object",
+        relationship=SpeakerEntity.talks,  # pyright: ignore[reportArgumentType]
+        tables=("speaker", "conference", "talk_association"),
+        populate=(
+            "INSERT INTO speaker (id, name) SELECT gen_random_uuid(), 'speaker-' || g FROM generate_series(1, :parents) g",
+            (
+                "INSERT INTO conference (id, name) SELECT gen_random_uuid(), 'conference-' || g "
+                "FROM generate_series(1, :pool) g"
+            ),
+            (
+                "INSERT INTO talk_association (speaker_id, conference_id, topic) SELECT s.id, c.id, 'topic-' || k "
+                "FROM (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM speaker) AS s CROSS JOIN generate_series(0, :fanout - 1) k "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM conference) AS c ON c.n = (s.n + k) % :pool"
+            ),
+        ),
+    ),
+    Scenario(
+        name="adjacency_list",
+        relationship=NodeEntity.children,  # pyright: ignore[reportArgumentType]
+        tables=("node",),
+        populate=(
+            (
+                "INSERT INTO node (id, parent_id, data) SELECT gen_random_uuid(), NULL, 'root-' || g "
+                "FROM generate_series(1, :parents) g"
+            ),
+            (
+                "INSERT INTO node (id, parent_id, data) SELECT gen_random_uuid(), r.id, 'child-' || k "
+                "FROM node AS r CROSS JOIN generate_series(1, :fanout) k WHERE r.parent_id IS NULL"
+            ),
+        ),
+        where=NodeTable.c.parent_id.is_(None),
+    ),
+)
+
+
+# ------ strategies: each returns the number of related rows it loaded ------
+
+
+def _related(scenario: Scenario, parents: list[Any]) -> int:
+    key, uselist = scenario.info.key, scenario.info.uselist
+    if uselist:
+        return sum(len(getattr(parent, key)) for parent in parents)
+    return sum(getattr(parent, key) is not None for parent in parents)
+
+
+async def _eager(session: AsyncSession, scenario: Scenario, option: Callable[..., Any]) -> int:
+    result = await session.scalars(scenario.parents().options(option(scenario.relationship)))
+    # joined collections repeat the parent once per child row
+    return _related(scenario, list(result.unique().all()))
+
+
+async def _explicit(session: AsyncSession, scenario: Scenario) -> int:
+    parents = list((await session.scalars(scenario.parents().options(raiseload(scenario.relationship)))).all())
+    await RelationshipLoader(session).load_many(scenario.relationship, parents)
+    return _related(scenario, parents)
+
+
+@functools.cache
+def _core_statements(scenario: Scenario) -> tuple[Select[Any], Select[Any]]:
+    info = scenario.info
+    parents = select(info.parent.local_table)
+    if scenario.where is not None:
+        parents = parents.where(scenario.where)
+    related = select(info.target.local_table, info.key_column.label("parent_key"))
+    if info.secondary is not None:
+        related = related.join(info.secondary, info.secondary_target_column == info.target_column)
+    related = related.where(info.key_column.in_(bindparam("parent_keys", expanding=True)))
+    return parents, related
+
+
+async def _core(session: AsyncSession, scenario: Scenario) -> int:
+    parents_stmt, related_stmt = _core_statements(scenario)
+    parents = (await session.execute(parents_stmt)).all()
+    keys = [row._mapping[scenario.info.parent_column] for row in parents]
+    related: dict[Any, list[Any]] = defaultdict(list)
+    for start in range(0, len(keys), MAX_BATCH_SIZE):
+        result = await session.execute(related_stmt, {"parent_keys": keys[start : start + MAX_BATCH_SIZE]})
+        for row in result:
+            related[row.parent_key].append(row)
+    return sum(len(related[key]) for key in keys)
+
+
+Strategy = Callable[[AsyncSession, Scenario], Awaitable[int]]
+
+STRATEGIES: dict[str, Strategy] = {
+    "selectinload": functools.partial(_eager, option=selectinload),
+    "joinedload": functools.partial(_eager, option=joinedload),
+    "subqueryload": functools.partial(_eager, option=subqueryload),
+    "raiseload+explicit": _explicit,
+    "core": _core,
+}
+
+
+# ------ measurement ------
+
+
+async def populate(
+    session_factory: async_sessionmaker[AsyncSession], scenario: Scenario, parents: int, fanout: int
+) -> None:
+    params = {"parents": parents, "fanout": fanout, "pool": max(fanout * 2, 100)}
+    async with session_factory() as session:
+        tables = ", ".join(f'"{table}"' for table in scenario.tables)
+        await session.execute(text(f"TRUNCATE TABLE {tables} RESTART IDENTITY CASCADE"))
+        for statement in scenario.populate:
+            await session.execute(text(statement), params)
+        await session.commit()
+    async with session_factory() as session:
+        for table in scenario.tables:
+            await session.execute(text(f'ANALYZE "{table}"'))
+        await session.commit()
+
+
+async def measure(
+    engine: AsyncEngine,
+    session_factory: async_sessionmaker[AsyncSession],
+    scenario: Scenario,
+    strategy: Strategy,
+    repeat: int,
+) -> dict[str, Any]:
+    statements = 0
+
+    def count(*args: Any) -> None:
+        nonlocal statements
+        statements += 1
+
+    async def run() -> int:
+        async with session_factory() as session:
+            return await strategy(session, scenario)
+
+    related = await run()  # warm-up: connections, compiled statement cache
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        await run()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        await run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "related": related,
+        "statements": statements,
+        "latency_ms": {
+            "median": round(statistics.median(latencies), 3),
+            "min": round(min(latencies), 3),
+            "max": round(max(latencies), 3),
+        },
+        "peak_bytes": peak,
+    }
+
+
+async def main(
+    parent_sizes: list[int],
+    fanouts: list[int],
+    scenarios: list[str],
+    strategies: list[str],
+    repeat: int,
+    output: str,
+) -> None:
+    engine = create_engine()
+    session_factory = create_session_factory(engine)
+    for metadata in METADATA:
+        await reset_schema(engine, metadata)
+
+    results = []
+    for scenario in (s for s in SCENARIOS if s.name in scenarios):
+        for parents in parent_sizes:
+            for fanout in fanouts if scenario.fans_out else [1]:
+                await populate(session_factory, scenario, parents, fanout)
+                loaded = set()
+                for name in strategies:
+                    record = await measure(engine, session_factory, scenario, STRATEGIES[name], repeat)
+                    loaded.add(record["related"])
+                    results.append(
+                        {
+                            "scenario": scenario.name,
+                            "relationship": str(scenario.relationship),
+                            "strategy": name,
+                            "parents": parents,
+                            "fanout": fanout,
+                            **record,
+                        }
+                    )
+                    print(  # noqa: T201
+                        f"{scenario.name:<20} {parents:>7} x {fanout:<4} {name:<20}"
+                        f" {record['latency_ms']['median']:>10.2f} ms {record['statements']:>4} statements"
+                        f" {record['peak_bytes'] / 2**20:>8.1f} MiB",
+                        file=sys.stderr,
+                    )
+                assert len(loaded) == 1, f"strategies disagree on {scenario.name}: {loaded}"
+
+    report = {
+        "benchmark": "loader_strategies",
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "repeat": repeat,
+        "results": results,
+    }
+    if output == "-":
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(output, "w") as file:  # noqa: PTH123
+            json.dump(report, file, indent=2)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parents", type=int, nargs="+", default=[1_000])
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument(
+        "--scenario", nargs="+", choices=[s.name for s in SCENARIOS], default=[s.name for s in SCENARIOS]
+    )
+    parser.add_argument("--strategy", nargs="+", choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="-", help="JSON report path, - for stdout")
+    args = parser.parse_args()
+    asyncio.run(main(args.parents, args.fanout, args.scenario, args.strategy, args.repeat, args.output))
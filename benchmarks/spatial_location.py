@@ -0,0 +1,133 @@
+"""Four-column `Location` vs `SpatialLocation` (point columns + GiST box index).
+
+Usage:
+    python -m benchmarks.spatial_location --rows 10000000 --queries 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import ColumnElement, Float, cast, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.one_to_one.composite import Point, location_table
+from app.one_to_one.entities import MapperRegistry
+from app.one_to_one.spatial import SpatialLocation
+from benchmarks.common import create_engine, create_session_factory, reset_schema
+
+# coordinates live in [0, EXTENT), rectangles are at most MAX_SIDE wide
+EXTENT = 1_000_000
+MAX_SIDE = 1_000
+
+lx1 = func.least(location_table.c.x1, location_table.c.x2)
+lx2 = func.greatest(location_table.c.x1, location_table.c.x2)
+ly1 = func.least(location_table.c.y1, location_table.c.y2)
+ly2 = func.greatest(location_table.c.y1, location_table.c.y2)
+
+
+async def populate(session_factory: async_sessionmaker[AsyncSession], rows: int) -> None:
+    async with session_factory() as session:
+        await session.execute(
+            text(
+                "INSERT INTO location (x1, y1, x2, y2) "
+                "SELECT x, y, x + (random() * :side)::int, y + (random() * :side)::int "
+                "FROM (SELECT (random() * :extent)::int AS x, (random() * :extent)::int AS y "
+                "      FROM generate_series(1, :n)) s"
+            ),
+            {"n": rows, "side": MAX_SIDE, "extent": EXTENT},
+        )
+        await session.execute(
+            text("INSERT INTO spatial_location (id, p1, p2) SELECT id, point(x1, y1), point(x2, y2) FROM location")
+        )
+        await session.commit()
+    async with session_factory() as session:
+        await session.execute(text("ANALYZE location"))
+        await session.execute(text("ANALYZE spatial_location"))
+        await session.commit()
+
+
+def four_column_overlap(p1: Point, p2: Point) -> ColumnElement[bool]:
+    return (lx1 <= max(p1.x, p2.x)) & (lx2 >= min(p1.x, p2.x)) & (ly1 <= max(p1.y, p2.y)) & (ly2 >= min(p1.y, p2.y))
+
+
+def four_column_contains(p1: Point, p2: Point) -> ColumnElement[bool]:
+    return (lx1 <= min(p1.x, p2.x)) & (lx2 >= max(p1.x, p2.x)) & (ly1 <= min(p1.y, p2.y)) & (ly2 >= max(p1.y, p2.y))
+
+
+def four_column_distance(point: Point) -> ColumnElement[float]:
+    dx = cast(func.greatest(lx1 - point.x, 0, point.x - lx2), Float)
+    dy = cast(func.greatest(ly1 - point.y, 0, point.y - ly2), Float)
+    return func.sqrt(dx * dx + dy * dy)
+
+
+def random_region(rng: random.Random, side: int) -> tuple[Point, Point]:
+    x, y = rng.randrange(EXTENT), rng.randrange(EXTENT)
+    return Point(x, y), Point(x + side, y + side)
+
+
+async def timed(
+    session_factory: async_sessionmaker[AsyncSession],
+    queries: int,
+    run: Callable[[AsyncSession, random.Random], Awaitable[object]],
+) -> float:
+    rng = random.Random(42)  # noqa: S311 - same regions for both layouts
+    async with session_factory() as session:
+        start = time.perf_counter()
+        for _ in range(queries):
+            await run(session, rng)
+        return (time.perf_counter() - start) / queries * 1000
+
+
+async def main(rows: int, queries: int) -> None:
+    engine = create_engine()
+    session_factory = create_session_factory(engine)
+    await reset_schema(engine, MapperRegistry.metadata)
+    await populate(session_factory, rows)
+
+    async def overlap_4col(session: AsyncSession, rng: random.Random) -> object:
+        return (
+            await session.execute(select(location_table.c.id).where(four_column_overlap(*random_region(rng, 5_000))))
+        ).all()
+
+    async def overlap_gist(session: AsyncSession, rng: random.Random) -> object:
+        return await SpatialLocation.overlapping(session, *random_region(rng, 5_000))
+
+    async def contains_4col(session: AsyncSession, rng: random.Random) -> object:
+        return (
+            await session.execute(select(location_table.c.id).where(four_column_contains(*random_region(rng, 10))))
+        ).all()
+
+    async def contains_gist(session: AsyncSession, rng: random.Random) -> object:
+        return await SpatialLocation.containing(session, *random_region(rng, 10))
+
+    async def nearest_4col(session: AsyncSession, rng: random.Random) -> object:
+        point = random_region(rng, 0)[0]
+        stmt = select(location_table.c.id).order_by(four_column_distance(point)).limit(10)
+        return (await session.execute(stmt)).all()
+
+    async def nearest_gist(session: AsyncSession, rng: random.Random) -> object:
+        return await SpatialLocation.nearest(session, random_region(rng, 0)[0], limit=10)
+
+    cases = {
+        "overlap": (overlap_4col, overlap_gist),
+        "containment": (contains_4col, contains_gist),
+        "nearest (k=10)": (nearest_4col, nearest_gist),
+    }
+    print(f"{rows} rows, {queries} queries per case, mean latency")  # noqa: T201
+    for name, (four_column, gist) in cases.items():
+        four_column_ms = await timed(session_factory, queries, four_column)
+        gist_ms = await timed(session_factory, queries, gist)
+        print(f"{name:<16} four-column {four_column_ms:>10.2f} ms   gist box {gist_ms:>10.2f} ms")  # noqa: T201
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.queries))
@@ -0,0 +1,49 @@
+"""Test suite wall time with TRUNCATE vs transaction-rollback `db_session` isolation.
+
+Runs the suite in a subprocess per mode (see `tests/isolation.py`), alternating
+modes so both see the same machine state.
+
+Usage:
+    python -m benchmarks.suite_isolation --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from tests.isolation import ISOLATION_MODES
+
+
+def run_suite(mode: str, pytest_args: list[str]) -> float:
+    env = {**os.environ, "TEST_DB_ISOLATION": mode}
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *pytest_args]
+    start = time.perf_counter()
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=False)  # noqa: S603
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(f"suite failed with TEST_DB_ISOLATION={mode}:\n{completed.stdout[-2000:]}")
+    return seconds
+
+
+def main(repeat: int, pytest_args: list[str]) -> None:
+    timings: dict[str, list[float]] = {mode: [] for mode in ISOLATION_MODES}
+    for _ in range(repeat):
+        for mode in ISOLATION_MODES:
+            timings[mode].append(run_suite(mode, pytest_args))
+
+    print(f"test suite wall time, median of {repeat} runs")  # noqa: T201
+    baseline = statistics.median(timings["truncate"])
+    for mode, seconds in timings.items():
+        median = statistics.median(seconds)
+        print(f"  {mode:<10} {median:>7.2f} s  ({baseline / median:.2f}x vs truncate)")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("pytest_args", nargs="*", help="extra pytest arguments, e.g. a test path")
+    args = parser.parse_args()
+    main(args.repeat, args.pytest_args)
@@ -0,0 +1,127 @@
+"""One test database per pytest-xdist worker, cloned from a prebuilt template.
+
+Every ``MapperRegistry.metadata`` in ``app`` is created once in a template
+database named after a hash of the DDL it emits (tables, indexes, triggers and
+views added by ``after_create`` listeners). A schema change gives a new hash,
+so a new template; stale ones are dropped once nothing is connected to them
+(never forcibly: another checkout may be cloning one). Each worker then gets a
+fresh ``CREATE DATABASE <base>_<worker> TEMPLATE <template>``, which is a file
+copy and much faster than replaying the DDL.
+
+Templates are built and cloned under a Postgres advisory lock taken on the
+maintenance database, so ``pytest -n auto`` workers starting together build
+the template once.
+
+``TEST_DATABASE_URL`` points at the server and maintenance database (the role
+needs ``CREATEDB``); the workers' databases are created next to it.
+"""
+
+import os
+import re
+
+from sqlalchemy import URL, MetaData, make_url, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.registries import METADATA
+from app.db.schema import ensure_schema, metadata_fingerprint
+from app.db.settings import DEFAULT_DATABASE_URL
+
+# pg_advisory_lock key serialising template builds and clones across workers
+_LOCK_KEY = 4_404_044
+
+_OBJECT_IN_USE = "55006"
+
+# worker database per template fingerprint, prepared once per process
+_prepared: dict[str, URL] = {}
+
+
+def server_url() -> URL:
+    return make_url(os.environ.get("TEST_DATABASE_URL", DEFAULT_DATABASE_URL))
+
+
+def worker_id() -> str:
+    """The pytest-xdist worker (`gw0`, `gw1`, ...), or `main` without xdist."""
+
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+def worker_database_url() -> URL:
+    url = server_url()
+    return url.set(database=f"{url.database}_{worker_id()}")
+
+
+def _quote(name: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+        raise ValueError(f"unexpected database name {name!r}")
+    return f'"{name}"'
+
+
+async def _database_exists(connection: AsyncConnection, name: str) -> bool:
+    result = await connection.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name})
+    return result.scalar() is not None
+
+
+async def _drop_stale_templates(connection: AsyncConnection, pattern: str) -> None:
+    # Only unused ones, and never WITH (FORCE): a checkout with another schema (or an older
+    # version of this module, without the lock) may be cloning from its template right now.
+    stale = await connection.scalars(
+        text(
+            "SELECT datname FROM pg_database d WHERE datname LIKE :pattern"
+            " AND NOT EXISTS (SELECT 1 FROM pg_stat_activity a WHERE a.datname = d.datname)"
+        ),
+        {"pattern": pattern},
+    )
+    for name in stale.all():
+        try:
+            await connection.execute(text(f"DROP DATABASE IF EXISTS {_quote(name)}"))
+        except DBAPIError as error:
+            # someone connected since the query above; left for a later sweep
+            if getattr(error.orig, "sqlstate", None) != _OBJECT_IN_USE:
+                raise
+
+
+async def _build_template(url: URL, metadata: list[MetaData]) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        # also stores the fingerprint, which the clones inherit
+        await ensure_schema(engine, metadata)
+    finally:
+        await engine.dispose()
+
+
+async def prepare_worker_database(metadata: tuple[MetaData, ...] = METADATA) -> URL:
+    """Create this worker's database from the template matching `metadata`; once per process."""
+
+    metadata = list(metadata)
+    fingerprint = metadata_fingerprint(metadata)
+    if fingerprint in _prepared:
+        return _prepared[fingerprint]
+
+    url = server_url()
+    template = f"{url.database}_template_{fingerprint}"
+    target = worker_database_url()
+    # CREATE/DROP DATABASE cannot run inside a transaction block
+    admin = create_async_engine(url, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    try:
+        async with admin.connect() as connection:
+            await connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+            try:
+                if not await _database_exists(connection, template):
+                    await _drop_stale_templates(connection, f"{url.database}\\_template\\_%")
+                    await connection.execute(text(f"CREATE DATABASE {_quote(template)}"))
+                    try:
+                        await _build_template(url.set(database=template), metadata)
+                    except BaseException:
+                        await connection.execute(text(f"DROP DATABASE IF EXISTS {_quote(template)}"))
+                        raise
+                await connection.execute(text(f"DROP DATABASE IF EXISTS {_quote(target.database)} WITH (FORCE)"))
+                await connection.execute(text(f"CREATE DATABASE {_quote(target.database)} TEMPLATE {_quote(template)}"))
+            finally:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+    finally:
+        await admin.dispose()
+
+    _prepared[fingerprint] = target
+    return target
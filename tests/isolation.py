@@ -0,0 +1,84 @@
+"""Per-test database isolation for the `db_session` fixtures.
+
+``rollback`` (the default) binds the test's session to a connection with an
+outer transaction that is rolled back after the test. The session joins it with
+``join_transaction_mode="create_savepoint"``, so the test's own ``commit()`` and
+``rollback()`` only release or roll back a SAVEPOINT and nothing the test
+writes ever becomes visible to other connections.
+
+``truncate`` commits for real and empties every table afterwards with
+``TRUNCATE ... RESTART IDENTITY CASCADE``. It is slower (an ACCESS EXCLUSIVE lock
+per table, per test) but needed by tests whose data must be seen from another
+connection. Mark those with ``@pytest.mark.db_truncate``, or run the whole suite
+this way with ``TEST_DB_ISOLATION=truncate``.
+"""
+
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Literal
+
+import pytest
+from sqlalchemy import MetaData, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+IsolationMode = Literal["rollback", "truncate"]
+
+ISOLATION_MODES: tuple[IsolationMode, ...] = ("rollback", "truncate")
+
+
+def isolation_mode(request: pytest.FixtureRequest) -> IsolationMode:
+    if request.node.get_closest_marker("db_truncate") is not None:
+        return "truncate"
+    mode = os.environ.get("TEST_DB_ISOLATION", "rollback")
+    if mode not in ISOLATION_MODES:
+        raise ValueError(f"TEST_DB_ISOLATION must be one of {ISOLATION_MODES}, got {mode!r}")
+    return mode  # type: ignore[return-value]
+
+
+@asynccontextmanager
+async def isolated_session(
+    session_factory: async_sessionmaker[AsyncSession],
+    metadata: MetaData,
+    mode: IsolationMode,
+) -> AsyncIterator[AsyncSession]:
+    if mode == "rollback":
+        async with _rollback_session(session_factory) as session:
+            yield session
+    else:
+        async with _truncate_session(session_factory, metadata) as session:
+            yield session
+
+
+@asynccontextmanager
+async def _rollback_session(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncSession]:
+    engine = session_factory.kw["bind"]
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = session_factory(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            await session.close()
+            if transaction.is_active:
+                await transaction.rollback()
+
+
+@asynccontextmanager
+async def _truncate_session(
+    session_factory: async_sessionmaker[AsyncSession],
+    metadata: MetaData,
+) -> AsyncIterator[AsyncSession]:
+    async with session_factory() as session:
+        try:
+            yield session
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise e
+        finally:
+            # a failed test may leave the transaction aborted
+            await session.rollback()
+            tables = ", ".join('"' + table.name + '"' for table in metadata.sorted_tables)
+            await session.execute(text(f"TRUNCATE TABLE {tables} RESTART IDENTITY CASCADE;"))
+            await session.commit()